@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Interned addresses and repeat-caller counts
+Addresses are normalized and mapped to integer ids once; each request then
+becomes one int64 key (address id << 32 | service id) and repeat calls are
+counted over sorted unique keys instead of grouping raw address strings.
+Both the report engine and the live dashboard feed the same RepeatCallIndex,
+which takes new requests incrementally.
+"""
+
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Street suffixes folded to their USPS abbreviations by normalize_address
+STREET_SUFFIXES = {
+    'STREET': 'ST', 'AVENUE': 'AVE', 'ROAD': 'RD', 'DRIVE': 'DR', 'LANE': 'LN', 'COURT': 'CT',
+    'BOULEVARD': 'BLVD', 'PLACE': 'PL', 'CIRCLE': 'CIR', 'PARKWAY': 'PKWY', 'HIGHWAY': 'HWY', 'TERRACE': 'TER'
+}
+_SUFFIX_PATTERN = re.compile(r"\b(" + "|".join(STREET_SUFFIXES) + r")\b")
+
+_SERVICE_BITS = 32
+
+
+def normalize_address(address: str):
+    """Uppercase, drop punctuation, collapse whitespace and abbreviate street suffixes"""
+    address = re.sub(r"[.,#]", " ", address.upper())
+    address = re.sub(r"\s+", " ", address).strip()
+    return _SUFFIX_PATTERN.sub(lambda m: STREET_SUFFIXES[m.group(1)], address)
+
+
+class Interner:
+    """Incremental value -> dense integer id map (ids never change once assigned)"""
+
+    def __init__(self, normalize=None):
+        self.normalize = normalize
+        self.values = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, values):
+        """int64 id per value (-1 for missing or blank); only distinct values touch Python"""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        lookup = np.empty(len(uniques) + 1, dtype=np.int64)
+        lookup[-1] = -1
+        for i, value in enumerate(uniques):
+            if self.normalize is not None:
+                value = self.normalize(str(value))
+            lookup[i] = self._intern_one(value) if value != '' else -1
+        return lookup[codes]
+
+    def _intern_one(self, value):
+        id_ = self._ids.get(value)
+        if id_ is None:
+            id_ = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return id_
+
+    def get(self, value):
+        if self.normalize is not None:
+            value = self.normalize(value)
+        return self._ids.get(value)
+
+
+class RepeatCallIndex:
+    """
+    Request counts per (address, service) pair over interned ids
+    Counts live in two parallel arrays (sorted packed keys, counts); add()
+    increments matching keys in place and merges new keys in one insert.
+    """
+
+    def __init__(self):
+        self.addresses = Interner(normalize_address)
+        self.services = Interner()
+        self.requests = 0
+        self._keys = np.empty(0, dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, addresses, services):
+        """Count a batch of requests (rows missing an address or service are skipped)"""
+        with self._lock:
+            address_ids = self.addresses.intern(addresses)
+            service_ids = self.services.intern(services)
+            valid = (address_ids >= 0) & (service_ids >= 0)
+            self.requests += int(valid.sum())
+            keys, counts = np.unique((address_ids[valid] << _SERVICE_BITS) | service_ids[valid], return_counts=True)
+            self._add_counts(keys, counts)
+
+    def merge(self, other):
+        """Fold in another index's counts (e.g. one built from a chunk in a worker process)"""
+        with self._lock:
+            address_ids = np.array([self.addresses._intern_one(a) for a in other.addresses.values], dtype=np.int64)
+            service_ids = np.array([self.services._intern_one(s) for s in other.services.values], dtype=np.int64)
+            self.requests += other.requests
+            keys = (address_ids[other._keys >> _SERVICE_BITS] << _SERVICE_BITS) \
+                | service_ids[other._keys & ((1 << _SERVICE_BITS) - 1)]
+            order = np.argsort(keys)
+            self._add_counts(keys[order], other._counts[order])
+
+    def _add_counts(self, keys, counts):
+        """Add counts for sorted unique keys, inserting keys not seen yet"""
+        positions = np.searchsorted(self._keys, keys)
+        found = positions < len(self._keys)
+        found[found] = self._keys[positions[found]] == keys[found]
+        self._counts[positions[found]] += counts[found]
+        if not found.all():
+            self._keys = np.insert(self._keys, positions[~found], keys[~found])
+            self._counts = np.insert(self._counts, positions[~found], counts[~found])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _repeats(self, min_calls):
+        repeat = self._counts >= min_calls
+        keys, counts = self._keys[repeat], self._counts[repeat]
+        return keys >> _SERVICE_BITS, keys & ((1 << _SERVICE_BITS) - 1), counts
+
+    def summary(self, top: int = 15, min_calls: int = 2):
+        """
+        Repeat-caller stats: pairs and calls with at least min_calls requests,
+        per-service [service, calls, addresses] and the top [address, service, calls]
+        patterns (ties broken by address, then service)
+        """
+        with self._lock:
+            address_ids, service_ids, counts = self._repeats(min_calls)
+            addresses = np.array(self.addresses.values, dtype=object)
+            services = np.array(self.services.values, dtype=object)
+
+        service_calls = np.bincount(service_ids, weights=counts, minlength=len(services)).astype(np.int64)
+        service_addresses = np.bincount(service_ids, minlength=len(services))
+        by_service = sorted(((services[i], int(service_calls[i]), int(service_addresses[i]))
+                             for i in np.flatnonzero(service_addresses)), key=lambda row: (-row[1], row[0]))
+
+        order = np.lexsort((services[service_ids].astype(str), addresses[address_ids].astype(str), -counts))[:top]
+        patterns = [[addresses[address_ids[i]], services[service_ids[i]], int(counts[i])] for i in order]
+        return {
+            'requests': self.requests,
+            'addresses': len(self.addresses),
+            'pairs': len(counts),
+            'calls': int(counts.sum()),
+            'services': by_service,
+            'top_patterns': patterns
+        }
+
+    def address_calls(self, address: str):
+        """{service: requests} for one address (normalized the same way as indexed addresses)"""
+        with self._lock:
+            address_id = self.addresses.get(address)
+            if address_id is None:
+                return {}
+            start, end = np.searchsorted(self._keys, [address_id << _SERVICE_BITS, (address_id + 1) << _SERVICE_BITS])
+            service_ids = self._keys[start:end] & ((1 << _SERVICE_BITS) - 1)
+            return {self.services.values[s]: int(n) for s, n in zip(service_ids, self._counts[start:end])}
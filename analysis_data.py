@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Shared data loading for the offline analysis scripts
+Joins the processed NLP extract with `source` from the raw 311 export once,
+keeps only the columns the reports use, and caches the merged frame on disk
+(see data_cache.py) so later runs skip both CSV parses and the merge.
+
+The topics_json / ner_json columns are decoded once into long-format tables
+(one row per topic or entity) that the reports group with plain pandas.
+
+stream_merged() is the bounded-memory alternative for extracts larger than
+RAM: it reads the processed CSV in chunks and attaches `source` through a
+compact sorted id -> source lookup instead of a full merge. aggregate_chunks()
+runs the decoding and a per-chunk aggregation in worker processes.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_cache import cached_frame
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional faster decoder
+    _json_loads = json.loads
+
+# File paths (override to run the reports against another extract)
+PROCESSED_CSV = os.getenv(
+    "L311_PROCESSED_CSV",
+    "/Users/rachael/Documents/projects/rachaelroland/pipelines/pipelines/311/data/processed/311_processed_with_nlp.csv"
+)
+RAW_CSV = os.getenv(
+    "L311_RAW_CSV",
+    "/Users/rachael/Documents/projects/rachaelroland/pipelines/pipelines/311/data/raw/louisville_311_2024.csv"
+)
+
+# Rows decoded per chunk when exploding the NLP JSON columns, and worker processes
+NLP_CHUNK_ROWS = int(os.getenv("L311_NLP_CHUNK_ROWS", 50_000))
+NLP_WORKERS = os.cpu_count() or 1
+
+# Columns the reports read from the processed extract
+ANALYSIS_COLUMNS = [
+    'service_request_id', 'service_name', 'agency_responsible', 'address', 'description',
+    'urgency_level', 'sentiment', 'topics_json', 'ner_json'
+]
+
+
+def read_processed(processed_csv=PROCESSED_CSV, **read_csv_kwargs):
+    """Read the processed extract, limited to ANALYSIS_COLUMNS"""
+    return pd.read_csv(processed_csv, usecols=lambda c: c in ANALYSIS_COLUMNS,
+                       dtype={'service_request_id': str}, **read_csv_kwargs)
+
+
+def read_sources(raw_csv=RAW_CSV):
+    """service_request_id -> source from the raw export"""
+    return pd.read_csv(raw_csv, encoding='utf-8', usecols=['service_request_id', 'source'],
+                       dtype={'service_request_id': str, 'source': str})
+
+
+def _cache_name(kind: str, processed_csv, raw_csv):
+    options = json.dumps({'processed': str(Path(processed_csv).resolve()), 'raw': str(Path(raw_csv).resolve()),
+                          'columns': ANALYSIS_COLUMNS})
+    return f"analysis-{kind}-{hashlib.sha256(options.encode()).hexdigest()[:12]}"
+
+
+def load_merged(processed_csv=PROCESSED_CSV, raw_csv=RAW_CSV, cache_dir=None):
+    """
+    Processed requests with the raw `source` column attached (left join)
+    frame.attrs records the processed and raw row counts for the reports.
+    """
+    name = _cache_name('merged', processed_csv, raw_csv)
+
+    def build():
+        processed_df = read_processed(processed_csv)
+        sources = read_sources(raw_csv)
+        merged_df = processed_df.merge(sources, on='service_request_id', how='left')
+        merged_df.attrs = {'processed_rows': len(processed_df), 'raw_rows': len(sources)}
+        return merged_df
+
+    return cached_frame(name, [processed_csv, raw_csv], build, cache_dir=cache_dir)
+
+
+class SourceLookup:
+    """
+    Compact service_request_id -> source map built from the raw export
+    Ids are kept as one sorted fixed-width bytes array and sources as int8
+    codes into a short list of distinct values (a few bytes per request,
+    versus a Python string pair per row in a merged frame). Duplicate ids keep
+    their first source.
+    """
+
+    def __init__(self, ids, codes, categories, rows: int):
+        self.ids = ids
+        self.codes = codes
+        self.categories = categories
+        self.rows = rows
+        self._values = np.array(list(categories) + [np.nan], dtype=object)  # code -1 -> NaN
+
+    @classmethod
+    def from_csv(cls, raw_csv=RAW_CSV, chunk_rows=NLP_CHUNK_ROWS):
+        """Build the lookup reading the raw export chunk by chunk"""
+        categories = {}
+        id_parts, code_parts = [], []
+        rows = 0
+        for chunk in pd.read_csv(raw_csv, encoding='utf-8', usecols=['service_request_id', 'source'],
+                                 dtype={'service_request_id': str, 'source': str}, chunksize=chunk_rows):
+            rows += len(chunk)
+            chunk = chunk[chunk['service_request_id'].notna()]
+            codes, uniques = pd.factorize(chunk['source'])
+            remap = np.array([categories.setdefault(value, len(categories)) for value in uniques] + [-1], dtype=np.int8)
+            id_parts.append(_id_bytes(chunk['service_request_id']))
+            code_parts.append(remap[codes])
+
+        ids = np.concatenate(id_parts) if id_parts else np.array([], dtype='S1')
+        codes = np.concatenate(code_parts) if code_parts else np.array([], dtype=np.int8)
+        order = np.argsort(ids, kind='stable')
+        ids, codes = ids[order], codes[order]
+        first = np.r_[True, ids[1:] != ids[:-1]] if len(ids) else np.array([], dtype=bool)
+        return cls(ids[first], codes[first], list(categories), rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def map(self, request_ids):
+        """Source for each id in request_ids (NaN where the raw export has none), indexed like request_ids"""
+        keys = _id_bytes(request_ids.fillna(''))
+        codes = np.full(len(keys), -1, dtype=np.int8)
+        if len(self.ids):
+            positions = np.searchsorted(self.ids, keys).clip(max=len(self.ids) - 1)
+            found = self.ids[positions] == keys
+            codes[found] = self.codes[positions[found]]
+        return pd.Series(self._values[codes], index=request_ids.index, name='source')
+
+
+def _id_bytes(request_ids):
+    return np.array(request_ids.str.encode('utf-8').tolist(), dtype='S')
+
+
+def stream_merged(processed_csv=PROCESSED_CSV, raw_csv=RAW_CSV, chunk_rows=NLP_CHUNK_ROWS, lookup=None):
+    """
+    Yield (frame, topics, entities) per chunk of the processed extract
+    frame carries `source` from the raw export and keeps the row labels a
+    full load_merged() frame would use, so memory stays bounded by the chunk
+    size rather than the input size.
+    """
+    lookup = lookup or SourceLookup.from_csv(raw_csv, chunk_rows)
+    for chunk in read_processed(processed_csv, chunksize=chunk_rows):
+        frame = chunk.assign(source=lookup.map(chunk['service_request_id']))
+        yield (frame,) + explode_nlp(frame, chunk_rows)
+
+
+def aggregate_chunks(aggregate, processed_csv=PROCESSED_CSV, raw_csv=RAW_CSV, chunk_rows=NLP_CHUNK_ROWS,
+                     workers: int = 1, lookup=None):
+    """
+    Yield aggregate(frame, topics, entities) for each chunk of the processed extract, in chunk order
+    With workers > 1 every chunk is decoded and aggregated in a worker
+    process (up to `workers` chunks ahead), so only the chunk's columns go out
+    and only its partial aggregate (e.g. Counters) comes back; callers merge
+    the partials in the order yielded. aggregate must be a module-level
+    function. The CSV itself is parsed here: quoted descriptions can span
+    lines, so the file can't be cut into byte ranges for the workers.
+    """
+    if workers <= 1:
+        for frame, topics, entities in stream_merged(processed_csv, raw_csv, chunk_rows, lookup):
+            yield aggregate(frame, topics, entities)
+        return
+
+    lookup = lookup or SourceLookup.from_csv(raw_csv, chunk_rows)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in read_processed(processed_csv, chunksize=chunk_rows):
+            frame = chunk.assign(source=lookup.map(chunk['service_request_id']))
+            pending.append(pool.submit(_aggregate_chunk, aggregate, frame))
+            if len(pending) > workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _aggregate_chunk(aggregate, frame):
+    """Worker entry point: decode one chunk's NLP columns and aggregate it"""
+    return aggregate(frame, *explode_nlp(frame, len(frame)))
+
+
+def is_call_center(source):
+    """Boolean mask of rows whose source is the call center"""
+    return source.str.strip().str.upper() == 'CALL CENTER'
+
+
+def call_center_requests(merged_df):
+    """Rows submitted through the call center"""
+    return merged_df[is_call_center(merged_df['source'])].copy()
+
+
+# ============================================================================
+# NLP COLUMN DECODING
+# ============================================================================
+
+def decode_json_column(values):
+    """Decode a column of JSON strings in one pass (None for blank or invalid cells)"""
+    decoded = []
+    for value in values:
+        if isinstance(value, str) and value:
+            try:
+                decoded.append(_json_loads(value))
+                continue
+            except ValueError:
+                pass
+        decoded.append(None)
+    return decoded
+
+
+def _chunks(frame, chunk_rows):
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def explode_topics(frame, chunk_rows=NLP_CHUNK_ROWS):
+    """
+    Long table of (service_request_id, topic, count), one row per topic per request
+    The index holds the source row's label in `frame`, so the table joins back
+    onto frame columns (service_name, urgency_level, ...) by index.
+    """
+    labels, request_ids, topics, counts = [], [], [], []
+    for chunk in _chunks(frame, chunk_rows):
+        for label, request_id, value in zip(chunk.index, chunk['service_request_id'],
+                                            decode_json_column(chunk['topics_json'])):
+            if not isinstance(value, dict):
+                continue
+            for topic, data in value.items():
+                labels.append(label)
+                request_ids.append(request_id)
+                topics.append(topic)
+                counts.append(data.get('count', 1) if isinstance(data, dict) else 1)
+    return pd.DataFrame({'service_request_id': request_ids, 'topic': topics, 'count': np.array(counts, dtype='int64')},
+                        index=pd.Index(labels, dtype=frame.index.dtype))
+
+
+def explode_entities(frame, chunk_rows=NLP_CHUNK_ROWS):
+    """Long table of (service_request_id, entity, type), one row per NER entity, indexed like explode_topics"""
+    labels, request_ids, entities, types = [], [], [], []
+    for chunk in _chunks(frame, chunk_rows):
+        for label, request_id, value in zip(chunk.index, chunk['service_request_id'],
+                                            decode_json_column(chunk['ner_json'])):
+            if not isinstance(value, dict):
+                continue
+            for entity in value.get('entities') or ():
+                labels.append(label)
+                request_ids.append(request_id)
+                entities.append(entity.get('entity') or '')
+                types.append(entity.get('type') or '')
+    return pd.DataFrame({'service_request_id': request_ids, 'entity': entities, 'type': types},
+                        index=pd.Index(labels, dtype=frame.index.dtype))
+
+
+def explode_nlp(frame, chunk_rows=NLP_CHUNK_ROWS):
+    """(topics, entities) long tables for frame"""
+    return explode_topics(frame, chunk_rows), explode_entities(frame, chunk_rows)
+
+
+def load_nlp_tables(processed_csv=PROCESSED_CSV, raw_csv=RAW_CSV, cache_dir=None):
+    """(topics, entities) long tables for load_merged()'s rows, cached alongside the merged frame"""
+    tables = {}
+
+    def build(kind):
+        if not tables:
+            merged_df = load_merged(processed_csv, raw_csv, cache_dir=cache_dir)
+            tables['topics'], tables['entities'] = explode_nlp(merged_df)
+        return tables[kind]
+
+    sources = [processed_csv, raw_csv]
+    topics = cached_frame(_cache_name('topics', processed_csv, raw_csv), sources,
+                          lambda: build('topics'), cache_dir=cache_dir)
+    entities = cached_frame(_cache_name('entities', processed_csv, raw_csv), sources,
+                            lambda: build('entities'), cache_dir=cache_dir)
+    return topics, entities
+
+
+def parse_args(description: str):
+    """Command line options shared by the analysis scripts"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--workers', type=int, default=NLP_WORKERS,
+                        help="Processes decoding and aggregating chunks in --stream mode (default: CPU count)")
+    parser.add_argument('--report', default=None,
+                        help="Report JSON path: rendered instead of re-reading the CSVs (output path for report_engine.py)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read the CSVs in chunks with bounded memory instead of the cached merged frame")
+    parser.add_argument('--chunk-rows', type=int, default=NLP_CHUNK_ROWS,
+                        help="Rows per chunk in --stream mode")
+    return parser.parse_args()
+
+
+# Contact-method clues in NER entity text, checked in this order per entity
+PHONE_PATTERN = r'\d{3}[-.]?\d{3}[-.]?\d{4}'
+WEB_WORDS = ['app', 'website', 'online', 'portal', 'web']
+
+
+def infer_sources(entities, rows):
+    """
+    Contact method ('email', 'phone', 'web', 'mobile') suggested by each row's NER entities
+    The first entity (in document order) carrying any clue decides the row;
+    rows without a clue are left out.
+    """
+    entities = entities[entities.index.isin(rows)]
+    text = entities['entity'].astype(str).str.lower()
+    entity_type = entities['type'].astype(str).str.lower()
+    clue = np.select(
+        [
+            text.str.contains('@', regex=False) | text.str.contains('email', regex=False),
+            entity_type.isin(['phone', 'phone_number']) | text.str.contains(PHONE_PATTERN, regex=True),
+            text.str.contains('|'.join(WEB_WORDS), regex=True),
+            text.str.contains('mobile', regex=False) | text.str.contains('cell', regex=False),
+        ],
+        ['email', 'phone', 'web', 'mobile'],
+        default=''
+    )
+    clues = pd.Series(clue, index=entities.index)
+    clues = clues[clues != '']
+    return clues.groupby(level=0, sort=False).first()
+
+
+if __name__ == '__main__':
+    args = parse_args("Build the cached merged frame and NLP tables used by the analysis scripts")
+    merged_df = load_merged()
+    topics_df, entities_df = load_nlp_tables()
+    print(f"{len(merged_df):,} requests, {len(topics_df):,} topic rows, {len(entities_df):,} entity rows")
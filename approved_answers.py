@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+In-process retrieval over the approved questions corpus
+Reads the seeded l311_approved_questions rows straight from the SQL migrations
+and builds a TF-IDF index over question text, common variations and keywords.
+High-confidence matches are answered directly without calling the LLM.
+"""
+
+import math
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# Cosine similarity required before an approved answer is returned verbatim
+APPROVED_ANSWER_MIN_SCORE = float(os.getenv("APPROVED_ANSWER_MIN_SCORE", 0.85))
+
+STOPWORDS = {
+    'a', 'an', 'the', 'i', 'me', 'my', 'we', 'our', 'you', 'your', 'it', 'its', 'is', 'are', 'was', 'be',
+    'do', 'does', 'did', 'can', 'could', 'should', 'would', 'will', 'to', 'of', 'in', 'on', 'at', 'for',
+    'with', 'about', 'and', 'or', 'if', 'there', 'this', 'that', 'what', 'whats', 'how', 'get', 'please'
+}
+
+
+# ============================================================================
+# SQL SEED PARSING
+# ============================================================================
+
+_TOKEN_RE = re.compile(r"""
+    (?P<comment>--[^\n]*)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<array>ARRAY\s*\[)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<punct>[(),;\]])
+  | (?P<space>\s+)
+""", re.VERBOSE)
+
+_LITERALS = {'NULL': None, 'TRUE': True, 'FALSE': False}
+
+
+def _tokens(sql: str, pos: int):
+    """Yield (kind, value) tokens from pos, skipping whitespace and comments"""
+    while pos < len(sql):
+        match = _TOKEN_RE.match(sql, pos)
+        if not match:
+            raise ValueError(f"Unexpected SQL at offset {pos}: {sql[pos:pos + 40]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind in ('comment', 'space'):
+            continue
+        value = match.group()
+        if kind == 'string':
+            value = value[1:-1].replace("''", "'")
+        yield kind, value
+
+
+def _parse_values(tokens):
+    """Parse "(v, v, ...), (...);" into a list of row tuples"""
+    rows, row, array, depth = [], None, None, 0
+    for kind, value in tokens:
+        if kind == 'punct' and value == ';' and depth == 0:
+            return rows
+        if kind == 'punct' and value == '(':
+            depth += 1
+            row = []
+        elif kind == 'punct' and value == ')':
+            depth -= 1
+            rows.append(tuple(row))
+        elif kind == 'array':
+            array = []
+        elif kind == 'punct' and value == ']':
+            row.append(array)
+            array = None
+        elif kind == 'punct' and value == ',':
+            continue
+        else:
+            if kind == 'word':
+                value = _LITERALS.get(value.upper(), value)
+            elif kind == 'number':
+                value = float(value) if '.' in value else int(value)
+            (array if array is not None else row).append(value)
+    return rows
+
+
+def parse_seed_sql(sql: str, table: str = 'l311_approved_questions'):
+    """Return the rows inserted into `table` by a migration file as dicts"""
+    records = []
+    for match in re.finditer(rf"INSERT\s+INTO\s+{table}\s*\(([^)]*)\)\s*VALUES", sql, re.IGNORECASE):
+        columns = [c.strip() for c in match.group(1).split(',')]
+        for row in _parse_values(_tokens(sql, match.end())):
+            records.append(dict(zip(columns, row)))
+    return records
+
+
+def load_approved_questions(migrations_dir=MIGRATIONS_DIR):
+    """Load every approved question seeded by the migrations (first insert wins, like the UNIQUE constraint)"""
+    questions = {}
+    for path in sorted(Path(migrations_dir).glob("*.sql")):
+        for record in parse_seed_sql(path.read_text(encoding='utf-8')):
+            if record.get('is_approved', True) is not False:
+                questions.setdefault(record['question_text'], record)
+    return list(questions.values())
+
+
+# ============================================================================
+# RETRIEVAL INDEX
+# ============================================================================
+
+def tokenize(text: str):
+    """Lowercase word tokens with stopwords dropped and plurals folded"""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text.lower().replace("'", "")):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class ApprovedAnswerIndex:
+    """
+    TF-IDF index over the approved questions corpus
+    Each question, variation and keyword list is its own document pointing back
+    at the approved entry; a query scores the best cosine match per entry.
+    """
+
+    def __init__(self, entries, min_score: float = APPROVED_ANSWER_MIN_SCORE):
+        self.entries = list(entries)
+        self.min_score = min_score
+        self.hits = 0
+        self.misses = 0
+
+        documents = []  # (entry index, tokens)
+        for i, entry in enumerate(self.entries):
+            surfaces = [entry['question_text']] + list(entry.get('common_variations') or [])
+            documents.extend((i, tokenize(text)) for text in surfaces)
+            if entry.get('keywords'):
+                documents.append((i, tokenize(' '.join(entry['keywords']))))
+        documents = [(i, tokens) for i, tokens in documents if tokens]
+
+        doc_freq = defaultdict(int)
+        for _, tokens in documents:
+            for token in set(tokens):
+                doc_freq[token] += 1
+        n_docs = len(documents)
+        self.idf = {token: math.log((1 + n_docs) / (1 + df)) + 1 for token, df in doc_freq.items()}
+        # Words the corpus never uses still count against a match
+        self.unseen_idf = math.log(1 + n_docs) + 1
+
+        # Inverted index of L2-normalised TF-IDF weights
+        self.postings = defaultdict(list)
+        self.doc_entry = []
+        for doc_id, (entry_idx, tokens) in enumerate(documents):
+            weights = self._weights(tokens)
+            for token, weight in weights.items():
+                self.postings[token].append((doc_id, weight))
+            self.doc_entry.append(entry_idx)
+
+    @classmethod
+    def from_migrations(cls, migrations_dir=MIGRATIONS_DIR, **kwargs):
+        return cls(load_approved_questions(migrations_dir), **kwargs)
+
+    def _weights(self, tokens):
+        counts = defaultdict(int)
+        for token in tokens:
+            counts[token] += 1
+        weights = {t: (1 + math.log(c)) * self.idf.get(t, self.unseen_idf) for t, c in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {t: w / norm for t, w in weights.items()}
+
+    def search(self, question: str, limit: int = 3):
+        """Return up to `limit` (score, entry) pairs, best first"""
+        scores = defaultdict(float)
+        for token, q_weight in self._weights(tokenize(question)).items():
+            for doc_id, d_weight in self.postings.get(token, ()):
+                scores[doc_id] += q_weight * d_weight
+
+        best = {}
+        for doc_id, score in scores.items():
+            entry_idx = self.doc_entry[doc_id]
+            if score > best.get(entry_idx, 0.0):
+                best[entry_idx] = score
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, self.entries[i]) for i, score in ranked]
+
+    def match(self, question: str):
+        """Return the approved entry for a high-confidence match, else None"""
+        results = self.search(question, limit=1)
+        if results and results[0][0] >= self.min_score:
+            self.hits += 1
+            return results[0][1]
+        self.misses += 1
+        return None
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Route benchmark suite for the dashboard
+Drives every route through TestClient, with /chat/ask answered by a local
+fake OpenRouter server (fake_openrouter.py) after a configurable delay.
+Each route gets one cold request (empty chart/table caches), `iterations`
+timed requests and one more under tracemalloc. Latency (p50/p95/p99) is
+reported per route, along with the peak memory that one request allocated.
+
+    python bench_routes.py --iterations 50 --output bench.json
+    python bench_routes.py --rows 169598 --llm-latency 0.2 --baseline bench.json
+    python bench_routes.py --rows 1000000 --routes "GET /" "GET /api/filter"
+
+--rows resamples the loaded CSV (or --data) to that many rows with fresh
+request ids, so the facet, address and topic distributions stay those of
+the source file. With --baseline the exit status is 1 when any route's p95
+regressed past --threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+# Routes left out of the suite on purpose
+SKIPPED_ROUTES = {
+    'GET /admin/profiles': "admin only (PROFILING=1)",
+    'GET /admin/profiles/{name}': "admin only (PROFILING=1)",
+    'GET /{fname:path}.{ext:static}': "static files",
+}
+
+# A p95 this much slower than the baseline (and by at least MIN_REGRESSION_MS) is a regression
+REGRESSION_THRESHOLD = 0.25
+MIN_REGRESSION_MS = 2.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every dashboard route through TestClient")
+    parser.add_argument('--iterations', type=int, default=20, help="Timed requests per route (default 20)")
+    parser.add_argument('--rows', type=int, default=None,
+                        help="Resample the data to this many rows (e.g. 169598 or 1000000)")
+    parser.add_argument('--data', type=Path, default=None, help="CSV to serve instead of the dashboard's CSV_PATH")
+    parser.add_argument('--seed', type=int, default=311, help="Seed for --rows resampling")
+    parser.add_argument('--llm-latency', type=float, default=0.05,
+                        help="Seconds the fake OpenRouter waits before replying (default 0.05)")
+    parser.add_argument('--token-latency', type=float, default=0.0, help="Seconds between streamed tokens")
+    parser.add_argument('--routes', nargs='*', default=None,
+                        help='Only these routes, e.g. "GET /" "POST /chat/ask"')
+    parser.add_argument('--output', type=Path, default=None, help="Write JSON results here")
+    parser.add_argument('--baseline', type=Path, default=None, help="Compare against earlier JSON results")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help=f"Allowed p95 slowdown vs the baseline (default {REGRESSION_THRESHOLD})")
+    return parser.parse_args(argv)
+
+
+# ============================================================================
+# DATA
+# ============================================================================
+
+def scale_frame(frame, rows: int, seed: int = 311):
+    """Resample frame to `rows` rows (with replacement) and give each a unique service_request_id"""
+    rng = np.random.default_rng(seed)
+    scaled = frame.iloc[rng.integers(0, len(frame), size=rows)].reset_index(drop=True)
+    scaled['service_request_id'] = [f"SR-{i:07d}" for i in range(rows)]
+    return scaled
+
+
+def write_scaled_csv(source_csv, rows: int, out_dir, seed: int = 311):
+    """Write the resampled CSV into out_dir and return its path"""
+    path = Path(out_dir) / f"bench_{rows}_rows.csv"
+    scale_frame(pd.read_csv(source_csv, low_memory=False), rows, seed).to_csv(path, index=False)
+    return path
+
+
+# ============================================================================
+# ROUTE CASES
+# ============================================================================
+
+def _stream_id(html):
+    match = re.search(r'/chat/stream/([0-9a-f-]{36})', html)
+    return match.group(1) if match else 'missing'
+
+
+def route_cases(dashboard_app):
+    """
+    {route: prepare(client, i) -> request kwargs}, keyed "METHOD template"
+    prepare() runs untimed (e.g. /chat/stream first asks a question to get a stream id).
+    """
+    frame = dashboard_app.df
+    top_service = str(frame['service_name'].value_counts().index[0])
+    top_address = str(frame['address'].value_counts().index[0]) if 'address' in frame.columns else ''
+
+    def get(path):
+        return lambda client, i: {'method': 'GET', 'url': path}
+
+    def ask(client, i):
+        # A distinct question and client IP each time: no response cache hits, no rate limiting
+        return {'method': 'POST', 'url': '/chat/ask', 'data': {'message': f"Which neighborhoods report potholes? ({i})"},
+                'headers': {'X-Forwarded-For': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"}}
+
+    def stream(client, i):
+        dashboard_app.CHAT_STREAMING = True
+        try:
+            html = client.request(**ask(client, 1_000_000 + i)).text
+        finally:
+            dashboard_app.CHAT_STREAMING = False
+        return {'method': 'GET', 'url': f"/chat/stream/{_stream_id(html)}"}
+
+    return {
+        'GET /': get('/'),
+        'GET /call-center': get('/call-center'),
+        'GET /topics': get('/topics'),
+        'GET /sentiment': get('/sentiment'),
+        'GET /urgency': get('/urgency'),
+        'GET /business': get('/business'),
+        'GET /chat': get('/chat'),
+        'POST /chat/ask': ask,
+        'GET /chat/stream/{stream_id}': stream,
+        'POST /chat/clear': lambda client, i: {'method': 'POST', 'url': '/chat/clear'},
+        'GET /chat/export': get('/chat/export'),
+        'POST /chat/feedback': lambda client, i: {'method': 'POST', 'url': '/chat/feedback',
+                                                  'data': {'message_id': f"bench-{i}", 'feedback': 'positive'}},
+        'GET /api/chat-cache': get('/api/chat-cache'),
+        'GET /api/chat-sessions': get('/api/chat-sessions'),
+        'GET /api/filter': get(f"/api/filter?{urlencode({'service': top_service, 'urgency': 'high', 'limit': 10})}"),
+        'GET /api/records': get("/api/records?urgency=high&sentiment=negative&sort=urgency_score&limit=25"),
+        'GET /records/rows': get("/records/rows?urgency=high&sentiment=negative&sort=urgency_score&cursor=100"),
+        'GET /api/timing': get('/api/timing'),
+        'GET /api/repeat-callers': get(f"/api/repeat-callers?{urlencode({'top': 15, 'address': top_address})}"),
+        'GET /metrics': get('/metrics'),
+    }
+
+
+def app_routes(app):
+    """Every "METHOD template" the app serves (HEAD aside)"""
+    routes = set()
+    for route in app.routes:
+        for method in getattr(route, 'methods', None) or ():
+            if method != 'HEAD':
+                routes.add(f"{method} {route.path}")
+    return routes
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def percentile_summary(samples_ms):
+    values = np.asarray(samples_ms, dtype=float)
+    return {
+        'count': len(values),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def _timed(client, request):
+    start = time.perf_counter()
+    response = client.request(**request)
+    return (time.perf_counter() - start) * 1000, response.status_code
+
+
+def bench_route(client, prepare, iterations: int):
+    """Cold request, `iterations` timed requests, then one request under tracemalloc"""
+    cold_ms, status = _timed(client, prepare(client, 0))
+    samples, statuses = [], {status}
+    for i in range(1, iterations + 1):
+        ms, status = _timed(client, prepare(client, i))
+        samples.append(ms)
+        statuses.add(status)
+
+    request = prepare(client, iterations + 1)
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        _, status = _timed(client, request)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    statuses.add(status)
+
+    return {
+        'cold_ms': round(cold_ms, 3),
+        **percentile_summary(samples),
+        'alloc_peak_kb': round((peak - before) / 1024, 1),
+        'alloc_retained_kb': round((after - before) / 1024, 1),
+        'statuses': sorted(statuses),
+    }
+
+
+def run_benchmarks(client, cases: dict, iterations: int, clear_caches=None, log=print):
+    """{route: bench_route() result}, clearing chart/table caches before each route's cold request"""
+    results = {}
+    for route, prepare in cases.items():
+        if clear_caches is not None:
+            clear_caches()
+        results[route] = bench_route(client, prepare, iterations)
+        r = results[route]
+        log(f"  {route:<34} cold {r['cold_ms']:>9.1f}  p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  "
+            f"p99 {r['p99_ms']:>8.2f} ms  alloc {r['alloc_peak_kb']:>9.1f} KB  {r['statuses']}")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD,
+            min_ms: float = MIN_REGRESSION_MS):
+    """[(route, baseline p95, current p95, ratio)] for routes whose p95 regressed"""
+    regressions = []
+    for route, current in results.items():
+        before = baseline.get(route)
+        if before is None:
+            continue
+        delta = current['p95_ms'] - before['p95_ms']
+        if delta > min_ms and current['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append((route, before['p95_ms'], current['p95_ms'], current['p95_ms'] / max(before['p95_ms'], 1e-9)))
+    return regressions
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = Path(tempfile.mkdtemp(prefix='l311-bench-'))
+    # Keep the parsed-frame cache and feedback writes out of the checkout
+    os.environ.setdefault('DATA_CACHE_DIR', str(work_dir / 'cache'))
+    os.environ.setdefault('OPENROUTER_API_KEY', 'bench')
+
+    import dashboard_app
+    from fake_openrouter import FakeOpenRouter
+    from feedback_log import FeedbackLog
+    from llm_client import OpenRouterClient
+    from starlette.testclient import TestClient
+
+    source_csv = args.data or dashboard_app.CSV_PATH
+    source_name = Path(source_csv).name
+    if args.rows:
+        print(f"Resampling {source_csv} to {args.rows:,} rows...")
+        source_csv = write_scaled_csv(source_csv, args.rows, work_dir, args.seed)
+    if source_csv != dashboard_app.CSV_PATH:
+        dashboard_app.CSV_PATH = Path(source_csv)
+        dashboard_app.reload_data()
+
+    uncovered = app_routes(dashboard_app.app) - set(route_cases(dashboard_app)) - set(SKIPPED_ROUTES)
+    if uncovered:
+        print(f"⚠️  Routes without a benchmark case: {', '.join(sorted(uncovered))}")
+
+    cases = route_cases(dashboard_app)
+    if args.routes:
+        unknown = set(args.routes) - set(cases)
+        if unknown:
+            sys.exit(f"Unknown routes: {', '.join(sorted(unknown))}")
+        cases = {route: cases[route] for route in args.routes}
+
+    def clear_caches():
+        dashboard_app.chart_cache.clear()
+        dashboard_app.table_cache.clear()
+
+    with FakeOpenRouter(latency=args.llm_latency, token_latency=args.token_latency) as fake:
+        dashboard_app.CHAT_ENABLED = True
+        dashboard_app.CHAT_STREAMING = False
+        dashboard_app.CHAT_CONTEXT = dashboard_app.build_311_context()
+        dashboard_app.llm_client = OpenRouterClient("bench", base_url=fake.base_url)
+        dashboard_app.feedback_log = FeedbackLog(work_dir / 'chat_feedback.jsonl')
+
+        print(f"Benchmarking {len(cases)} routes x {args.iterations} iterations on {len(dashboard_app.df):,} rows "
+              f"(LLM latency {args.llm_latency}s)")
+        with TestClient(dashboard_app.app) as client:
+            results = run_benchmarks(client, cases, args.iterations, clear_caches)
+        dashboard_app.feedback_log.close()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'rows': len(dashboard_app.df),
+        'source': source_name,
+        'iterations': args.iterations,
+        'llm_latency': args.llm_latency,
+        'python': platform.python_version(),
+        'routes': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('rows') != report['rows']:
+            print(f"⚠️  Baseline was run on {baseline.get('rows'):,} rows, this run on {report['rows']:,}")
+        regressions = compare(results, baseline['routes'], args.threshold)
+        for route, before, after, ratio in regressions:
+            print(f"❌ {route}: p95 {before:.2f} -> {after:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"✅ No p95 regressions beyond {args.threshold:.0%} of the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
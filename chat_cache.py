@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Response cache and request coalescing for first-turn chat questions
+The quick-question buttons send the same strings over and over; replies to
+questions asked with an empty history are cached by normalized text, system
+prompt and model, with a TTL and an LRU size bound. Identical prompts that
+arrive while the first one is still in flight share its upstream call.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Cache bounds (entries, seconds)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 512))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 6 * 3600))
+
+
+def normalize_question(text: str):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", text.strip().lower()).rstrip("?!. ")
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU map of cache key -> assistant reply"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._context_hashes = {}
+
+    def make_key(self, question: str, context: str, model: str):
+        """Key on normalized question text + hash of the system prompt + model"""
+        context_hash = self._context_hashes.get(context)
+        if context_hash is None:
+            context_hash = hashlib.sha256(context.encode()).hexdigest()[:16]
+            self._context_hashes = {context: context_hash}
+        return (normalize_question(question), context_hash, model)
+
+    def get(self, key):
+        """Return the cached reply, or None when missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def set(self, key, reply: str):
+        """Store a reply, evicting the least recently used entries past max_entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, reply)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls with the same key
+    The first caller (leader) does the work; callers arriving while it is in
+    flight await the leader's result (or exception) instead of calling upstream.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self._calls = {}
+
+    def in_flight(self, key):
+        """Future for a call already running under key, else None"""
+        return self._calls.get(key)
+
+    def start(self, key):
+        """Register the caller as leader for key and return the shared future"""
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        return future
+
+    def resolve(self, key, result=None, error: BaseException = None, future=None):
+        """
+        Publish the leader's outcome to every waiter and close the flight
+        Pass the future from start() so a late resolve never touches a newer
+        leader's flight under the same key.
+        """
+        if future is None:
+            future = self._calls.pop(key, None)
+        elif self._calls.get(key) is future:
+            del self._calls[key]
+        if future is None or future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+            future.exception()  # mark retrieved when nobody else was waiting
+        else:
+            future.set_result(result)
+
+    async def wait(self, future):
+        """Await a leader's future without letting a cancelled waiter cancel it"""
+        self.shared += 1
+        return await asyncio.shield(future)
+
+    async def run(self, key, fn):
+        """Return await fn(), sharing one execution among concurrent callers with the same key"""
+        future = self.in_flight(key)
+        if future is not None:
+            return await self.wait(future)
+
+        future = self.start(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.resolve(key, error=e, future=future)
+            raise
+        self.resolve(key, result, future=future)
+        return result
+
+    def __len__(self):
+        return len(self._calls)
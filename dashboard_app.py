@@ -12,9 +12,28 @@ import plotly.express as px
 from pathlib import Path
 import os
 from datetime import datetime
-import requests
 import uuid
-from collections import defaultdict, deque
+import hashlib
+from html import escape as escape_html
+from urllib.parse import urlencode
+import threading
+import time
+from collections import OrderedDict
+from data_cache import read_csv_cached
+from llm_client import OpenRouterClient, LLMTimeout, LLMHTTPError
+from approved_answers import ApprovedAnswerIndex
+from chat_cache import ResponseCache, SingleFlight
+from rate_limit import ChatRateLimiter
+from session_store import SessionStore
+from feedback_log import FeedbackLog
+from address_index import RepeatCallIndex
+from facet_index import FacetIndex, FACET_COLUMNS
+from request_timing import (
+    SERVER_TIMING_ENABLED, ROUTE_METRICS_ENABLED, ServerTimingMiddleware, RouteLatencyMiddleware,
+    handler_started, handler_finished, route_latency, span
+)
+from metrics import Metrics, process_rss_bytes
+from profiler import PROFILING_ENABLED, PROFILE_HEADER, ProfilingMiddleware, authorized, profile_store
 
 # ============================================================================
 # CONFIGURATION
@@ -28,16 +47,37 @@ if not CSV_PATH.exists():
     # Fallback to full dataset if available locally
     CSV_PATH = Path("/Users/rachael/Documents/projects/rachaelroland/pipelines/pipelines/311/data/processed/311_processed_with_nlp.csv")
 JSON_PATH = CURRENT_DIR / "311_nlp_results.json"
-FEEDBACK_PATH = CURRENT_DIR / "chat_feedback.json"
+# Written by report_engine.py from the full extract (Call Center page figures)
+CALL_CENTER_REPORT_PATH = Path(os.getenv("CALL_CENTER_REPORT_PATH", CURRENT_DIR / "call_center_report.json"))
+
+# Low-cardinality columns kept as categoricals in memory and in the on-disk cache
+CATEGORICAL_COLUMNS = ['sentiment', 'urgency_level', 'service_name', 'agency_responsible']
 
-# Load data on startup
+# Load data on startup (CSV is parsed once, later starts read the cached frame)
 print("Loading 311 NLP data...")
-df = pd.read_csv(CSV_PATH, low_memory=False)
+df = read_csv_cached(CSV_PATH, categorical_columns=CATEGORICAL_COLUMNS, low_memory=False)
 with open(JSON_PATH, 'r') as f:
     topic_data = json.load(f)
 
 print(f"Loaded {len(df):,} service requests")
 
+def get_dataset_version():
+    """Version token for the loaded data (changes whenever the CSV or topic JSON changes)"""
+    parts = [f"{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in (CSV_PATH, JSON_PATH)]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:12]
+
+DATASET_VERSION = get_dataset_version()
+
+def load_call_center_report():
+    """Call center report artifact, or None when it hasn't been generated"""
+    try:
+        with open(CALL_CENTER_REPORT_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+CALL_CENTER_REPORT = load_call_center_report()
+
 # Initialize OpenRouter for chat
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 if OPENROUTER_API_KEY:
@@ -47,27 +87,46 @@ else:
     CHAT_ENABLED = False
     print("⚠️  OpenRouter API key not found - chat disabled")
 
+# Shared async client (pooled keep-alive connections, capped concurrency, per-request deadline)
+llm_client = OpenRouterClient(OPENROUTER_API_KEY or "")
+
+# Stream chat replies token-by-token over SSE (set CHAT_STREAMING=0 to wait for the full reply)
+CHAT_STREAMING = os.getenv("CHAT_STREAMING", "1") == "1"
+
+# Approved Q&A corpus (seeded by migrations/) answers FAQ-style questions without an LLM call
+approved_answers = ApprovedAnswerIndex.from_migrations()
+print(f"Loaded {len(approved_answers)} approved answers")
+
+# Replies to first-turn questions, keyed on normalized question + system prompt + model
+response_cache = ResponseCache()
+
+# Identical first-turn prompts in flight at the same time share one upstream call
+single_flight = SingleFlight()
+
+# Feedback clicks are appended to chat_feedback.jsonl by a background writer
+feedback_log = FeedbackLog()
+
+# Counters for /metrics (scrape-time gauges are registered at the end of the module)
+metrics = Metrics()
+metrics.counter('chat_questions_total', "Chat questions by how they were answered")
+
 # ============================================================================
 # CONVERSATION MEMORY
 # ============================================================================
 
-# Simple in-memory session store
-# Key: session_id, Value: deque of message dicts (max 20 messages)
-chat_sessions = defaultdict(lambda: deque(maxlen=20))
+# Rate limiting (per-session quota + per-IP sliding window, see rate_limit.py)
+rate_limiter = ChatRateLimiter()
 
-# Session cleanup (remove sessions older than 1 hour)
-session_timestamps = {}
 
-# Rate limiting
-# Key: session_id, Value: count of questions asked
-session_question_counts = defaultdict(int)
+def session_evicted(session_id, reason):
+    """Idle expiry starts a fresh quota; capacity evictions keep the question count"""
+    if reason == 'expired':
+        rate_limiter.reset_session(session_id)
 
-# Key: IP address, Value: list of timestamps for questions
-ip_question_timestamps = defaultdict(list)
 
-# Rate limits
-MAX_QUESTIONS_PER_SESSION = 20
-MAX_QUESTIONS_PER_IP_PER_HOUR = 50
+# Message history per session (last 20 messages), expired after an hour idle
+# and capped by session count and total bytes; only expiry resets the quota
+chat_sessions = SessionStore(on_evict=session_evicted)
 
 def get_session_id(request):
     """Get or create session ID from cookie"""
@@ -89,48 +148,11 @@ def check_rate_limit(session_id: str, ip_address: str):
     Check if user has exceeded rate limits
     Returns: (is_allowed: bool, remaining_questions: int, error_message: str)
     """
-    current_time = datetime.now()
-
-    # Check session-based limit (20 questions per session)
-    session_count = session_question_counts[session_id]
-    if session_count >= MAX_QUESTIONS_PER_SESSION:
-        return False, 0, f"You've reached the limit of {MAX_QUESTIONS_PER_SESSION} questions per session. Please clear your chat to start a new session."
-
-    # Check IP-based limit (50 questions per hour)
-    # Remove timestamps older than 1 hour
-    timestamps = ip_question_timestamps[ip_address]
-    recent_timestamps = [ts for ts in timestamps if (current_time - ts).seconds < 3600]
-    ip_question_timestamps[ip_address] = recent_timestamps
-
-    if len(recent_timestamps) >= MAX_QUESTIONS_PER_IP_PER_HOUR:
-        return False, 0, f"You've reached the limit of {MAX_QUESTIONS_PER_IP_PER_HOUR} questions per hour. Please try again later."
-
-    # Calculate remaining questions
-    remaining = min(
-        MAX_QUESTIONS_PER_SESSION - session_count,
-        MAX_QUESTIONS_PER_IP_PER_HOUR - len(recent_timestamps)
-    )
-
-    return True, remaining, ""
+    return rate_limiter.check(session_id, ip_address)
 
 def increment_rate_limit(session_id: str, ip_address: str):
     """Increment rate limit counters after a successful question"""
-    session_question_counts[session_id] += 1
-    ip_question_timestamps[ip_address].append(datetime.now())
-
-def cleanup_old_sessions():
-    """Remove sessions older than 1 hour (basic cleanup)"""
-    current_time = datetime.now()
-    old_sessions = [
-        sid for sid, timestamp in session_timestamps.items()
-        if (current_time - timestamp).seconds > 3600
-    ]
-    for sid in old_sessions:
-        if sid in chat_sessions:
-            del chat_sessions[sid]
-        del session_timestamps[sid]
-        if sid in session_question_counts:
-            del session_question_counts[sid]
+    rate_limiter.record(session_id, ip_address)
 
 def generate_follow_up_questions(user_question: str):
     """
@@ -213,10 +235,22 @@ def generate_follow_up_questions(user_question: str):
 # FASTHTML APP SETUP
 # ============================================================================
 
+async def open_llm_pool():
+    """Bind the chat client's keep-alive pool to the server's event loop"""
+    await llm_client.start()
+
+
+async def close_llm_pool():
+    await llm_client.aclose()
+
+
 app, rt = fast_app(
+    on_startup=[open_llm_pool],
+    on_shutdown=[close_llm_pool],
     hdrs=(
         Link(rel='stylesheet', href='https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css'),
         Script(src='https://cdn.plot.ly/plotly-2.27.0.min.js'),
+        Script(src='https://cdn.jsdelivr.net/npm/htmx-ext-sse@2.2.2/sse.js'),
         Style("""
             .chat-container {
                 max-width: 900px;
@@ -370,6 +404,20 @@ app, rt = fast_app(
     )
 )
 
+# Server-Timing header with per-request spans (SERVER_TIMING=1)
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+    app.before.append(handler_started)
+    app.after.append(handler_finished)
+
+# Per-route request counts and latency histograms for /api/timing and /metrics
+if ROUTE_METRICS_ENABLED:
+    app.add_middleware(RouteLatencyMiddleware)
+
+# On-demand sampling profiles of requests carrying the admin token (PROFILING=1)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # ============================================================================
 # NAVIGATION
 # ============================================================================
@@ -423,33 +471,106 @@ def create_nav(current_page=None):
 # DATA CALCULATIONS
 # ============================================================================
 
-def get_summary_stats():
-    """Calculate summary statistics"""
-    total = len(df)
+# Dimensions of the precomputed aggregate cube
+CUBE_DIMENSIONS = ['service_name', 'agency_responsible', 'sentiment', 'urgency_level']
 
-    # Sentiment distribution
-    sentiment_counts = df['sentiment'].value_counts()
+def build_aggregates(frame):
+    """
+    Count requests once by service x agency x sentiment x urgency
+    Routes and the chat context read these counts instead of rescanning df
+    """
+    cube = frame.groupby(CUBE_DIMENSIONS, observed=True, dropna=False).size()
+    cube = cube[cube > 0]
 
-    # Urgency distribution
-    urgency_counts = df['urgency_level'].value_counts()
+    def marginal(*dims):
+        # Roll the cube up to the given dimensions (blank values dropped, like value_counts)
+        counts = cube.groupby(level=list(dims), observed=True).sum()
+        return counts.sort_values(ascending=False, kind='stable') if len(dims) == 1 else counts
 
-    # Service type counts
-    service_counts = df['service_name'].value_counts().head(10)
+    return {
+        'total': len(frame),
+        'cube': cube,
+        'sentiment': marginal('sentiment'),
+        'urgency': marginal('urgency_level'),
+        'services': marginal('service_name'),
+        'agencies': marginal('agency_responsible'),
+        'service_types': frame['service_name'].nunique(dropna=False),
+        'sentiment_by_service': marginal('service_name', 'sentiment').unstack(fill_value=0),
+        'urgency_by_service': marginal('service_name', 'urgency_level').unstack(fill_value=0),
+        'critical': int(marginal('urgency_level', 'sentiment').get(('high', 'negative'), 0)),
+    }
 
-    # Agency counts
-    agency_counts = df['agency_responsible'].value_counts().head(10)
+AGGREGATES = build_aggregates(df)
 
-    return {
-        'total': total,
-        'sentiment': sentiment_counts.to_dict(),
-        'urgency': urgency_counts.to_dict(),
-        'services': service_counts.to_dict(),
-        'agencies': agency_counts.to_dict()
+def build_repeat_index(frame):
+    """Requests per interned (address, service) pair; add() more requests as they arrive"""
+    index = RepeatCallIndex()
+    index.add(frame['address'], frame['service_name'])
+    return index
+
+REPEAT_CALLERS = build_repeat_index(df)
+
+# Bitmaps per service / agency / sentiment / urgency value for facet filters
+FACETS = FacetIndex(df)
+
+def facet_rows(columns, limit: int, **filters):
+    """First `limit` rows of df matching the facet filters, selected columns only (blanks as '')"""
+    positions = FACETS.positions(FACETS.match(**filters), limit)
+    return df.iloc[positions][columns].astype(object).fillna('')
+
+def service_breakdown(table: str, service: str):
+    """Counts for one service from a *_by_service aggregate table"""
+    breakdown = AGGREGATES[table]
+    return breakdown.loc[service].to_dict() if service in breakdown.index else {}
+
+def get_summary_stats():
+    """Summary statistics from the precomputed aggregates"""
+    with span('stats'):
+        return {
+            'total': AGGREGATES['total'],
+            'sentiment': AGGREGATES['sentiment'].to_dict(),
+            'urgency': AGGREGATES['urgency'].to_dict(),
+            'services': AGGREGATES['services'].head(10).to_dict(),
+            'agencies': AGGREGATES['agencies'].head(10).to_dict()
+        }
+
+def call_center_figures(report=None):
+    """Call Center page figures from the report artifact (2024 analysis figures without one)"""
+    figures = {
+        'calls': '106,631 calls/year (62.9% of all requests)',
+        'nsr_share': '48.4% are simple information requests',
+        'low_medium_share': '87.6% are low/medium urgency',
+        'urgent_calls': 'Focus agents on 11,765 truly urgent calls',
+        'nsr_metro': '34,981 calls/year (32.8%)',
+        'waste': '15,880 calls/year (14.9%)',
+        'status_checks': '52,646 calls/year (49.4%)',
+        'nsr_social': '6,075 calls/year (5.7%)'
     }
+    if not report or not report['totals']['call_center']:
+        return figures
+
+    totals, cc = report['totals'], report['call_center']
+    total = totals['call_center']
+    categories = dict(report['nsr']['categories'])
+
+    def share(count):
+        return f"{count:,} calls/year ({count / total * 100:.1f}%)"
+
+    figures.update({
+        'calls': f"{total:,} calls/year ({total / totals['requests'] * 100:.1f}% of all requests)",
+        'nsr_share': f"{cc['segments']['nsr'] / total * 100:.1f}% are simple information requests",
+        'low_medium_share': f"{cc['segments']['low_medium_urgency'] / total * 100:.1f}% are low/medium urgency",
+        'urgent_calls': f"Focus agents on {cc['segments']['bottleneck']:,} truly urgent calls",
+        'nsr_metro': share(categories.get('NSR Metro Agencies', 0)),
+        'waste': share(cc['waste']['total']),
+        'status_checks': share(cc['segments']['minimal_description']),
+        'nsr_social': share(categories.get('NSR Social Services', 0))
+    })
+    return figures
 
 def create_sentiment_pie():
     """Create sentiment distribution pie chart"""
-    sentiment_counts = df['sentiment'].value_counts()
+    sentiment_counts = AGGREGATES['sentiment']
 
     # Calculate percentages
     total = sentiment_counts.sum()
@@ -477,7 +598,7 @@ def create_sentiment_pie():
 
 def create_urgency_bar():
     """Create urgency distribution bar chart"""
-    urgency_counts = df['urgency_level'].value_counts()
+    urgency_counts = AGGREGATES['urgency']
     urgency_order = ['low', 'medium', 'high']
     urgency_counts = urgency_counts.reindex(urgency_order, fill_value=0)
 
@@ -505,7 +626,7 @@ def create_urgency_bar():
 
 def create_top_services_bar():
     """Create top 10 service types bar chart"""
-    service_counts = df['service_name'].value_counts().head(10)
+    service_counts = AGGREGATES['services'].head(10)
 
     fig = go.Figure(data=[go.Bar(
         y=service_counts.index[::-1],
@@ -585,6 +706,166 @@ def create_topic_wordcloud():
 
     return fig.to_html(include_plotlyjs=False, div_id='topics-bar')
 
+# ============================================================================
+# CHART CACHE
+# ============================================================================
+
+# Upper bound on cached chart HTML (bytes)
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+
+class ChartCache:
+    """
+    LRU cache of rendered chart HTML keyed by (chart_id, dataset version)
+    Evicts least recently used charts once the stored HTML exceeds max_bytes
+    """
+
+    def __init__(self, max_bytes: int, span_prefix: str = 'chart'):
+        self.max_bytes = max_bytes
+        self.span_prefix = span_prefix
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, chart_id: str, render):
+        """Return cached HTML for chart_id, calling render() on a miss"""
+        with span(f"{self.span_prefix}:{chart_id}"):
+            return self._get_or_render(chart_id, render)
+
+    def _get_or_render(self, chart_id: str, render):
+        key = (chart_id, DATASET_VERSION)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        # Render outside the lock so a slow chart doesn't block cached ones
+        html = render()
+        size = len(html)
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = html
+                self.total_bytes += size
+                while self.total_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.total_bytes -= len(evicted)
+        return html
+
+    def clear(self):
+        """Drop every cached chart"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+chart_cache = ChartCache(CHART_CACHE_MAX_BYTES)
+
+# ============================================================================
+# TABLE RENDERING
+# ============================================================================
+
+SENTIMENT_COLORS = {'positive': '#22c55e', 'negative': '#ef4444'}
+URGENCY_COLORS = {'high': '#ef4444', 'medium': '#f59e0b'}
+
+# Upper bound on cached table body HTML (bytes); same LRU as the charts
+TABLE_CACHE_MAX_BYTES = int(os.getenv("TABLE_CACHE_MAX_BYTES", 2 * 1024 * 1024))
+table_cache = ChartCache(TABLE_CACHE_MAX_BYTES, span_prefix='table')
+
+def table_column(name: str, truncate: int = None, ellipsis: str = '...', colors: dict = None,
+                 default_color: str = '#6b7280', style: str = None, blank: str = None):
+    """
+    Cell spec for table_rows(): `truncate` cuts longer text to that many chars + ellipsis,
+    `colors` wraps the value in a colored Span (value -> color, else default_color),
+    `blank` replaces empty values with a plain Span, `style` is the Td style
+    """
+    return {'name': name, 'truncate': truncate, 'ellipsis': ellipsis, 'colors': colors, 'default_color': default_color,
+            'style': style, 'blank': blank}
+
+def _column_cells(values, spec):
+    """Td components for one column, formatted from the column array in one pass"""
+    text = values.astype(object).fillna('').astype(str)
+    if spec['truncate']:
+        limit = spec['truncate']
+        text = text.where(text.str.len() <= limit, text.str.slice(0, limit) + spec['ellipsis'])
+    td_kwargs = {'style': spec['style']} if spec['style'] else {}
+    if spec['colors'] is None:
+        return [Td(value, **td_kwargs) for value in text]
+
+    span_styles = {value: f"color: {spec['colors'].get(value, spec['default_color'])}; font-weight: 600;"
+                   for value in text.unique()}
+    return [
+        Td(Span(spec['blank']) if spec['blank'] is not None and value == '' else Span(value, style=span_styles[value]),
+           **td_kwargs)
+        for value in text
+    ]
+
+def table_rows(frame, columns, empty=None):
+    """
+    Tr components for frame built column by column (no per-row Series)
+    columns are table_column() specs; `empty` is the Tr shown when frame has no rows.
+    """
+    if len(frame) == 0:
+        return [empty] if empty is not None else []
+    cells = [_column_cells(frame[spec['name']], spec) for spec in columns]
+    return [Tr(*row) for row in zip(*cells)]
+
+def cached_table_body(table_id: str, build_rows):
+    """Tbody for a slice that only changes with the dataset, rendered once per dataset version"""
+    return NotStr(table_cache.get_or_render(table_id, lambda: to_xml(Tbody(*build_rows()))))
+
+def reload_data():
+    """Reload the dataset from disk, rebuild derived data and invalidate cached charts"""
+    global df, topic_data, AGGREGATES, REPEAT_CALLERS, FACETS, DATASET_VERSION, CHAT_CONTEXT, CALL_CENTER_REPORT
+    # Version first, so a file replaced while loading is picked up by the next check
+    version = get_dataset_version()
+    new_df = read_csv_cached(CSV_PATH, categorical_columns=CATEGORICAL_COLUMNS, low_memory=False)
+    with open(JSON_PATH, 'r') as f:
+        new_topic_data = json.load(f)
+    aggregates, repeat_callers, facets = build_aggregates(new_df), build_repeat_index(new_df), FacetIndex(new_df)
+    # Swap everything in together; requests in flight keep the frames they already read
+    df, topic_data, AGGREGATES, REPEAT_CALLERS, FACETS = new_df, new_topic_data, aggregates, repeat_callers, facets
+    CALL_CENTER_REPORT = load_call_center_report()
+    DATASET_VERSION = version
+    chart_cache.clear()
+    table_cache.clear()
+    CHAT_CONTEXT = build_311_context() if CHAT_ENABLED else ""
+    print(f"Reloaded {len(df):,} service requests (version {DATASET_VERSION})")
+
+# Seconds between size/mtime checks of the CSV and topic JSON at request time (0 disables).
+# A change reloads the data in a background thread; requests keep the loaded data meanwhile.
+DATA_RELOAD_CHECK_SECONDS = float(os.getenv("DATA_RELOAD_CHECK_SECONDS", 30))
+_data_reload = {'checked': float('-inf'), 'thread': None}
+_data_reload_lock = threading.Lock()
+
+def check_data_files(req):
+    """FastHTML `before` hook: start a background reload_data() when the data files changed on disk"""
+    now = time.monotonic()
+    if now - _data_reload['checked'] < DATA_RELOAD_CHECK_SECONDS:
+        return
+    _data_reload['checked'] = now
+    try:
+        changed = get_dataset_version() != DATASET_VERSION
+    except OSError:  # file being replaced, retry at the next check
+        return
+    if changed and _data_reload_lock.acquire(blocking=False):
+        _data_reload['thread'] = threading.Thread(target=_reload_in_background, name='data-reload', daemon=True)
+        _data_reload['thread'].start()
+
+def _reload_in_background():
+    try:
+        reload_data()
+    finally:
+        _data_reload_lock.release()
+
+if DATA_RELOAD_CHECK_SECONDS > 0:
+    app.before.append(check_data_files)
+
 # ============================================================================
 # ROUTES
 # ============================================================================
@@ -678,13 +959,13 @@ def get():
         Div(
             # Sentiment pie
             Div(
-                Div(NotStr(create_sentiment_pie())),
+                Div(NotStr(chart_cache.get_or_render('sentiment-pie', create_sentiment_pie))),
                 style='background: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);',
                 cls='col-md-6 mb-4'
             ),
             # Urgency bar
             Div(
-                Div(NotStr(create_urgency_bar())),
+                Div(NotStr(chart_cache.get_or_render('urgency-bar', create_urgency_bar))),
                 style='background: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);',
                 cls='col-md-6 mb-4'
             ),
@@ -693,13 +974,13 @@ def get():
         Div(
             # Top services
             Div(
-                Div(NotStr(create_top_services_bar())),
+                Div(NotStr(chart_cache.get_or_render('services-bar', create_top_services_bar))),
                 style='background: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);',
                 cls='col-md-6 mb-4'
             ),
             # Topics
             Div(
-                Div(NotStr(create_topic_wordcloud())),
+                Div(NotStr(chart_cache.get_or_render('topics-bar', create_topic_wordcloud))),
                 style='background: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);',
                 cls='col-md-6 mb-4'
             ),
@@ -708,8 +989,6 @@ def get():
     )
 
     # Top 10 sample requests table
-    sample_requests_data = df.head(10).to_dict('records')
-
     requests_table = Div(
         H3('📋 Sample Service Requests', style='color: #1f2937; margin-bottom: 1.5rem;'),
         Table(
@@ -722,26 +1001,13 @@ def get():
                     Th('Urgency')
                 )
             ),
-            Tbody(
-                *[
-                    Tr(
-                        Td(str(row.get('service_request_id', ''))),
-                        Td(str(row.get('service_name', ''))[:40] + '...' if len(str(row.get('service_name', ''))) > 40 else str(row.get('service_name', ''))),
-                        Td(str(row.get('description', ''))[:60] + '...' if len(str(row.get('description', ''))) > 60 else str(row.get('description', ''))),
-                        Td(
-                            Span(str(row.get('sentiment', '')),
-                                 style=f"color: {'#22c55e' if row.get('sentiment') == 'positive' else '#ef4444' if row.get('sentiment') == 'negative' else '#6b7280'}; font-weight: 600;"
-                            ) if row.get('sentiment') else Span('-')
-                        ),
-                        Td(
-                            Span(str(row.get('urgency_level', '')),
-                                 style=f"color: {'#ef4444' if row.get('urgency_level') == 'high' else '#f59e0b' if row.get('urgency_level') == 'medium' else '#22c55e'}; font-weight: 600;"
-                            ) if row.get('urgency_level') else Span('-')
-                        )
-                    )
-                    for row in sample_requests_data
-                ]
-            ),
+            cached_table_body('home-sample', lambda: table_rows(df.head(10), [
+                table_column('service_request_id'),
+                table_column('service_name', truncate=40),
+                table_column('description', truncate=60),
+                table_column('sentiment', colors=SENTIMENT_COLORS, blank='-'),
+                table_column('urgency_level', colors=URGENCY_COLORS, default_color='#22c55e', blank='-')
+            ])),
             cls='table table-striped table-hover'
         ),
         style='background: white; padding: 2rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); overflow-x: auto;'
@@ -841,9 +1107,8 @@ def get():
 @rt('/call-center')
 def get():
     """Call center bottleneck analysis page"""
-    # Calculate call center stats
-    # Note: In real app, would filter by source='Call Center'
-    # For demo, showing all data
+    # Figures come from the report artifact built from the call center rows (report_engine.py)
+    figures = call_center_figures(CALL_CENTER_REPORT)
 
     call_center_stats = Div(
         Div(
@@ -856,10 +1121,10 @@ def get():
                     Div(
                         H4('Current State', style='color: #1f2937; font-size: 1.2rem;'),
                         Ul(
-                            Li('106,631 calls/year (62.9% of all requests)'),
+                            Li(figures['calls']),
                             Li('$222,150 annual cost in agent time'),
-                            Li('48.4% are simple information requests'),
-                            Li('87.6% are low/medium urgency'),
+                            Li(figures['nsr_share']),
+                            Li(figures['low_medium_share']),
                         ),
                         cls='col-md-6'
                     ),
@@ -869,7 +1134,7 @@ def get():
                             Li('Reduce call volume by 56.3% (60,035 calls)'),
                             Li(Strong('Save $125,075/year in agent time')),
                             Li('24/7 self-service for routine requests'),
-                            Li('Focus agents on 11,765 truly urgent calls'),
+                            Li(figures['urgent_calls']),
                         ),
                         cls='col-md-6'
                     ),
@@ -884,7 +1149,7 @@ def get():
                 Div(
                     Div(
                         H5('1. NSR Metro Agencies', style='color: #ef4444;'),
-                        P('34,981 calls/year (32.8%)', style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
+                        P(figures['nsr_metro'], style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
                         P('Information requests, referrals, policy questions', style='color: #6b7280; margin-bottom: 0.5rem;'),
                         P(Strong('Solution:'), ' FAQ + Chatbot + IVR', style='color: #059669;'),
                         style='background: white; padding: 1.5rem; border-radius: 8px; box-shadow: 0 1px 4px rgba(0,0,0,0.1);',
@@ -892,7 +1157,7 @@ def get():
                     ),
                     Div(
                         H5('2. Waste Management', style='color: #f59e0b;'),
-                        P('15,880 calls/year (14.9%)', style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
+                        P(figures['waste'], style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
                         P('Cart requests, missed pickups, appointments', style='color: #6b7280; margin-bottom: 0.5rem;'),
                         P(Strong('Solution:'), ' Online cart ordering + schedule lookup', style='color: #059669;'),
                         style='background: white; padding: 1.5rem; border-radius: 8px; box-shadow: 0 1px 4px rgba(0,0,0,0.1);',
@@ -900,7 +1165,7 @@ def get():
                     ),
                     Div(
                         H5('3. Status Checks', style='color: #6366f1;'),
-                        P('52,646 calls/year (49.4%)', style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
+                        P(figures['status_checks'], style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
                         P('Empty/minimal descriptions = "Where\'s my request?"', style='color: #6b7280; margin-bottom: 0.5rem;'),
                         P(Strong('Solution:'), ' Self-service status tracking + SMS alerts', style='color: #059669;'),
                         style='background: white; padding: 1.5rem; border-radius: 8px; box-shadow: 0 1px 4px rgba(0,0,0,0.1);',
@@ -908,7 +1173,7 @@ def get():
                     ),
                     Div(
                         H5('4. NSR Social Services', style='color: #8b5cf6;'),
-                        P('6,075 calls/year (5.7%)', style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
+                        P(figures['nsr_social'], style='font-size: 1.1rem; font-weight: 600; color: #2193b0; margin-bottom: 0.5rem;'),
                         P('Resource lookups, social service referrals', style='color: #6b7280; margin-bottom: 0.5rem;'),
                         P(Strong('Solution:'), ' Searchable directory + live chat', style='color: #059669;'),
                         style='background: white; padding: 1.5rem; border-radius: 8px; box-shadow: 0 1px 4px rgba(0,0,0,0.1);',
@@ -1004,7 +1269,6 @@ def get():
 
     # Sample requests for top service
     top_service = list(stats['services'].keys())[0]
-    top_service_requests = df[df['service_name'] == top_service].head(5)[['service_request_id', 'description', 'sentiment', 'urgency_level']].fillna('')
 
     return Title('Topics Analysis'), Main(
         create_nav('topics'),
@@ -1013,7 +1277,7 @@ def get():
 
             # Summary
             Div(
-                H3(f'Top 10 Service Types (out of {len(df["service_name"].unique())} unique types)', style='color: #2193b0; margin-bottom: 1.5rem;'),
+                H3(f'Top 10 Service Types (out of {AGGREGATES["service_types"]} unique types)', style='color: #2193b0; margin-bottom: 1.5rem;'),
                 Div(*service_cards, cls='row'),
                 style='margin-bottom: 2rem;'
             ),
@@ -1025,17 +1289,13 @@ def get():
                 H5('Sample Requests:', style='margin-top: 1.5rem; color: #6b7280;'),
                 Table(
                     Thead(Tr(Th('ID'), Th('Description'), Th('Sentiment'), Th('Urgency'))),
-                    Tbody(
-                        *[
-                            Tr(
-                                Td(row['service_request_id']),
-                                Td(str(row['description'])[:80] + '...' if len(str(row['description'])) > 80 else row['description']),
-                                Td(Span(row['sentiment'], style=f"color: {'#22c55e' if row['sentiment'] == 'positive' else '#ef4444' if row['sentiment'] == 'negative' else '#6b7280'}; font-weight: 600;")),
-                                Td(Span(row['urgency_level'], style=f"color: {'#ef4444' if row['urgency_level'] == 'high' else '#f59e0b' if row['urgency_level'] == 'medium' else '#22c55e'}; font-weight: 600;"))
-                            )
-                            for _, row in top_service_requests.iterrows()
-                        ]
-                    ),
+                    cached_table_body('topics-top-service', lambda: table_rows(
+                        facet_rows(['service_request_id', 'description', 'sentiment', 'urgency_level'], 5, service=top_service), [
+                            table_column('service_request_id'),
+                            table_column('description', truncate=80),
+                            table_column('sentiment', colors=SENTIMENT_COLORS),
+                            table_column('urgency_level', colors=URGENCY_COLORS, default_color='#22c55e')
+                        ])),
                     cls='table table-striped'
                 ),
                 style='background: white; padding: 2rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);'
@@ -1055,25 +1315,28 @@ def get():
     sentiment_by_service = []
 
     for service in top_services:
-        service_df = df[df['service_name'] == service]
-        sent_counts = service_df['sentiment'].value_counts()
+        service_total = stats['services'][service]
+        sent_counts = service_breakdown('sentiment_by_service', service)
 
         sentiment_by_service.append(
             Tr(
                 Td(service),
-                Td(f"{len(service_df):,}"),
+                Td(f"{service_total:,}"),
                 Td(f"{sent_counts.get('positive', 0):,}", style='color: #22c55e; font-weight: 600;'),
                 Td(f"{sent_counts.get('negative', 0):,}", style='color: #ef4444; font-weight: 600;'),
                 Td(f"{sent_counts.get('neutral', 0):,}", style='color: #6b7280; font-weight: 600;'),
-                Td(f"{sent_counts.get('negative', 0) / len(service_df) * 100:.1f}%", style='color: #ef4444;')
+                Td(f"{sent_counts.get('negative', 0) / service_total * 100:.1f}%", style='color: #ef4444;')
             )
         )
 
-    # Sample negative requests
-    negative_requests = df[df['sentiment'] == 'negative'].head(10)[['service_request_id', 'service_name', 'description', 'urgency_level']].fillna('')
-
-    # Sample positive requests
-    positive_requests = df[df['sentiment'] == 'positive'].head(5)[['service_request_id', 'service_name', 'description', 'urgency_level']].fillna('')
+    # Sample negative / positive requests
+    sample_columns = [
+        table_column('service_request_id'),
+        table_column('service_name', truncate=30, ellipsis=''),
+        table_column('description', truncate=80),
+        table_column('urgency_level', colors=URGENCY_COLORS, default_color='#22c55e')
+    ]
+    sample_fields = [spec['name'] for spec in sample_columns]
 
     return Title('Sentiment Analysis'), Main(
         create_nav('sentiment'),
@@ -1122,17 +1385,8 @@ def get():
                 H3('⚠️ Sample Negative Requests', style='color: #ef4444; margin-bottom: 1.5rem;'),
                 Table(
                     Thead(Tr(Th('ID'), Th('Service'), Th('Description'), Th('Urgency'))),
-                    Tbody(
-                        *[
-                            Tr(
-                                Td(row['service_request_id']),
-                                Td(str(row['service_name'])[:30]),
-                                Td(str(row['description'])[:80] + '...' if len(str(row['description'])) > 80 else row['description']),
-                                Td(Span(row['urgency_level'], style=f"color: {'#ef4444' if row['urgency_level'] == 'high' else '#f59e0b' if row['urgency_level'] == 'medium' else '#22c55e'}; font-weight: 600;"))
-                            )
-                            for _, row in negative_requests.iterrows()
-                        ]
-                    ),
+                    cached_table_body('sentiment-negative', lambda: table_rows(
+                        facet_rows(sample_fields, 10, sentiment='negative'), sample_columns)),
                     cls='table table-striped'
                 ),
                 style='background: white; padding: 2rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); margin-bottom: 2rem;'
@@ -1143,17 +1397,8 @@ def get():
                 H3('✅ Sample Positive Requests', style='color: #22c55e; margin-bottom: 1.5rem;'),
                 Table(
                     Thead(Tr(Th('ID'), Th('Service'), Th('Description'), Th('Urgency'))),
-                    Tbody(
-                        *[
-                            Tr(
-                                Td(row['service_request_id']),
-                                Td(str(row['service_name'])[:30]),
-                                Td(str(row['description'])[:80] + '...' if len(str(row['description'])) > 80 else row['description']),
-                                Td(Span(row['urgency_level'], style=f"color: {'#ef4444' if row['urgency_level'] == 'high' else '#f59e0b' if row['urgency_level'] == 'medium' else '#22c55e'}; font-weight: 600;"))
-                            )
-                            for _, row in positive_requests.iterrows()
-                        ]
-                    ),
+                    cached_table_body('sentiment-positive', lambda: table_rows(
+                        facet_rows(sample_fields, 5, sentiment='positive'), sample_columns)),
                     cls='table table-striped'
                 ),
                 style='background: white; padding: 2rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);'
@@ -1173,25 +1418,22 @@ def get():
     urgency_by_service = []
 
     for service in top_services:
-        service_df = df[df['service_name'] == service]
-        urg_counts = service_df['urgency_level'].value_counts()
+        service_total = stats['services'][service]
+        urg_counts = service_breakdown('urgency_by_service', service)
 
         urgency_by_service.append(
             Tr(
                 Td(service),
-                Td(f"{len(service_df):,}"),
+                Td(f"{service_total:,}"),
                 Td(f"{urg_counts.get('high', 0):,}", style='color: #ef4444; font-weight: 600;'),
                 Td(f"{urg_counts.get('medium', 0):,}", style='color: #f59e0b; font-weight: 600;'),
                 Td(f"{urg_counts.get('low', 0):,}", style='color: #22c55e; font-weight: 600;'),
-                Td(f"{urg_counts.get('high', 0) / len(service_df) * 100:.1f}%", style='color: #ef4444;')
+                Td(f"{urg_counts.get('high', 0) / service_total * 100:.1f}%", style='color: #ef4444;')
             )
         )
 
-    # High urgency requests
-    high_urgency = df[df['urgency_level'] == 'high'].head(15)[['service_request_id', 'service_name', 'description', 'sentiment', 'urgency_score']].fillna('')
-
     # High urgency + negative sentiment (critical)
-    critical = df[(df['urgency_level'] == 'high') & (df['sentiment'] == 'negative')].head(10)[['service_request_id', 'service_name', 'description']].fillna('')
+    critical_shown = min(FACETS.count(FACETS.match(urgency='high', sentiment='negative')), 10)
 
     return Title('Urgency Analysis'), Main(
         create_nav('urgency'),
@@ -1230,24 +1472,28 @@ def get():
             # Critical requests (high urgency + negative)
             Div(
                 H3('🚨 CRITICAL: High Urgency + Negative Sentiment', style='color: #dc2626; margin-bottom: 1.5rem;'),
-                P(f'{len(critical)} requests need immediate attention', style='color: #ef4444; font-weight: 600; margin-bottom: 1rem;'),
+                P(f'{critical_shown} requests need immediate attention', style='color: #ef4444; font-weight: 600; margin-bottom: 1rem;'),
                 Table(
                     Thead(Tr(Th('ID'), Th('Service'), Th('Description'))),
-                    Tbody(
-                        *[
-                            Tr(
-                                Td(row['service_request_id'], style='font-weight: 600;'),
-                                Td(str(row['service_name'])[:30]),
-                                Td(str(row['description'])[:100] + '...' if len(str(row['description'])) > 100 else row['description'])
-                            )
-                            for _, row in critical.iterrows()
-                        ] if len(critical) > 0 else [Tr(Td('No critical requests', colspan='3', style='color: #22c55e;'))]
-                    ),
+                    cached_table_body('urgency-critical', lambda: table_rows(
+                        facet_rows(['service_request_id', 'service_name', 'description'], 10, urgency='high', sentiment='negative'), [
+                            table_column('service_request_id', style='font-weight: 600;'),
+                            table_column('service_name', truncate=30, ellipsis=''),
+                            table_column('description', truncate=100)
+                        ], empty=Tr(Td('No critical requests', colspan='3', style='color: #22c55e;')))),
                     cls='table table-striped'
                 ),
                 style='background: #fef2f2; padding: 2rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); border: 2px solid #ef4444; margin-bottom: 2rem;'
             ),
 
+            # Every critical request, highest urgency score first
+            Div(
+                H3('Browse All Critical Requests', style='color: #1f2937; margin-bottom: 1.5rem;'),
+                P('Sorted by urgency score, 25 at a time', style='color: #6b7280;'),
+                record_browser_table({'urgency': ['high'], 'sentiment': ['negative']}, sort='urgency_score'),
+                style='background: white; padding: 2rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); margin-bottom: 2rem; overflow-x: auto;'
+            ),
+
             # Urgency by service type
             Div(
                 H3('Urgency Distribution by Service Type', style='color: #1f2937; margin-bottom: 1.5rem;'),
@@ -1264,18 +1510,14 @@ def get():
                 H3('⚠️ All High Urgency Requests', style='color: #ef4444; margin-bottom: 1.5rem;'),
                 Table(
                     Thead(Tr(Th('ID'), Th('Service'), Th('Description'), Th('Sentiment'), Th('Score'))),
-                    Tbody(
-                        *[
-                            Tr(
-                                Td(row['service_request_id']),
-                                Td(str(row['service_name'])[:30]),
-                                Td(str(row['description'])[:80] + '...' if len(str(row['description'])) > 80 else row['description']),
-                                Td(Span(row['sentiment'], style=f"color: {'#ef4444' if row['sentiment'] == 'negative' else '#6b7280'}; font-weight: 600;")),
-                                Td(str(row['urgency_score']), style='font-weight: 600;')
-                            )
-                            for _, row in high_urgency.iterrows()
-                        ]
-                    ),
+                    cached_table_body('urgency-high', lambda: table_rows(
+                        facet_rows(['service_request_id', 'service_name', 'description', 'sentiment', 'urgency_score'], 15, urgency='high'), [
+                            table_column('service_request_id'),
+                            table_column('service_name', truncate=30, ellipsis=''),
+                            table_column('description', truncate=80),
+                            table_column('sentiment', colors={'negative': '#ef4444'}),
+                            table_column('urgency_score', style='font-weight: 600;')
+                        ])),
                     cls='table table-striped'
                 ),
                 style='background: white; padding: 2rem; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);'
@@ -1389,20 +1631,16 @@ def get():
 def build_311_context():
     """Build context about the 311 dataset for Claude"""
 
-    # Basic stats
-    total = len(df)
-    sentiment_counts = df['sentiment'].value_counts().to_dict()
-    urgency_counts = df['urgency_level'].value_counts().to_dict()
+    # Basic stats (from the precomputed aggregates)
+    total = AGGREGATES['total']
+    sentiment_counts = AGGREGATES['sentiment'].to_dict()
+    urgency_counts = AGGREGATES['urgency'].to_dict()
 
     # Top issues
-    top_services = df['service_name'].value_counts().head(10).to_dict()
+    top_services = AGGREGATES['services'].head(10).to_dict()
 
     # Critical requests
-    critical = df[
-        (df['urgency_level'] == 'high') &
-        (df['sentiment'] == 'negative')
-    ]
-    critical_count = len(critical)
+    critical_count = AGGREGATES['critical']
 
     context = f"""You are a friendly and helpful customer service representative for Louisville Metro 311 services. Your role is to help Louisville residents understand city services, learn how to submit service requests, and get answers about common issues.
 
@@ -1637,10 +1875,8 @@ def post(request):
     session_id = get_session_id(request)
 
     # Clear the session history and question count
-    if session_id in chat_sessions:
-        chat_sessions[session_id].clear()
-    if session_id in session_question_counts:
-        session_question_counts[session_id] = 0
+    chat_sessions.clear(session_id)
+    rate_limiter.reset_session(session_id)
 
     # Return initial greeting message
     return Div(
@@ -1655,7 +1891,7 @@ def get(request):
     from starlette.responses import Response
 
     session_id = get_session_id(request)
-    history = chat_sessions.get(session_id, deque())
+    history = chat_sessions.history(session_id)
 
     # Generate markdown transcript
     timestamp = datetime.now().strftime("%B %d, %Y at %I:%M %p")
@@ -1686,23 +1922,8 @@ def get(request):
 def post(message_id: str, feedback: str):
     """Handle feedback for a chat message"""
     try:
-        # Load existing feedback
-        if FEEDBACK_PATH.exists():
-            with open(FEEDBACK_PATH, 'r') as f:
-                feedback_data = json.load(f)
-        else:
-            feedback_data = []
-
-        # Add new feedback
-        feedback_data.append({
-            'message_id': message_id,
-            'feedback': feedback,
-            'timestamp': datetime.now().isoformat()
-        })
-
-        # Save feedback
-        with open(FEEDBACK_PATH, 'w') as f:
-            json.dump(feedback_data, f, indent=2)
+        # Queue for the background writer (appended to the JSONL log in batches)
+        feedback_log.record(message_id, feedback, datetime.now().isoformat())
 
         # Return success message
         if feedback == 'positive':
@@ -1712,8 +1933,85 @@ def post(message_id: str, feedback: str):
     except Exception as e:
         return Span("Error saving feedback", cls="feedback-message")
 
+def render_user_message(message: str, timestamp: str):
+    """User message bubble"""
+    return Div(
+        Div(message, cls="message user-message"),
+        Div(timestamp, cls="timestamp text-end"),
+        style="display: flex; flex-direction: column; align-items: flex-end;"
+    )
+
+def render_reply_controls(message_id: str, remaining: int):
+    """Feedback buttons and remaining-question counter shown under an assistant reply"""
+    return Div(
+        Div(
+            Button(
+                "👍",
+                cls="feedback-btn",
+                hx_post="/chat/feedback",
+                hx_vals=f'{{"message_id": "{message_id}", "feedback": "positive"}}',
+                hx_target="closest div",
+                hx_swap="afterend",
+                title="Helpful response"
+            ),
+            Button(
+                "👎",
+                cls="feedback-btn",
+                hx_post="/chat/feedback",
+                hx_vals=f'{{"message_id": "{message_id}", "feedback": "negative"}}',
+                hx_target="closest div",
+                hx_swap="afterend",
+                title="Not helpful"
+            ),
+            cls="feedback-buttons"
+        ),
+        Div(
+            f"💬 {remaining} questions remaining",
+            cls="text-muted",
+            style="font-size: 0.75rem; margin-top: 0.25rem;"
+        )
+    )
+
+def render_follow_ups(follow_ups):
+    """Follow-up questions section"""
+    return Div(
+        Div("💡 You might also want to ask:", cls="follow-up-label"),
+        *[
+            Button(
+                q,
+                cls="follow-up-btn",
+                hx_post="/chat/ask",
+                hx_vals=f'{{"message": "{q}"}}',
+                hx_target="#chat-history",
+                hx_swap="beforeend",
+                hx_indicator="#typing-indicator",
+                onclick="document.querySelector('.chat-container').scrollTop = document.querySelector('.chat-container').scrollHeight;"
+            )
+            for q in follow_ups
+        ],
+        cls="follow-up-questions"
+    )
+
+def chat_error_text(error: Exception):
+    """User-facing text for a failed completion"""
+    if isinstance(error, LLMHTTPError):
+        return f"I apologize, but I encountered an error (HTTP {error.status_code}). Please try again."
+    if isinstance(error, LLMTimeout):
+        return "I apologize, but the request timed out. Please try again."
+    return f"I apologize, but I encountered an error processing your question: {str(error)}"
+
+# Streams waiting for their EventSource to connect
+# Key: stream_id, Value: dict with session_id, message, messages, remaining, created
+pending_streams = {}
+PENDING_STREAM_TTL_SECONDS = 60
+
+def sse_event(event: str, data: str):
+    """Format one server-sent event (multi-line data is split per the SSE spec)"""
+    lines = data.split('\n')
+    return f"event: {event}\n" + "".join(f"data: {line}\n" for line in lines) + "\n"
+
 @rt('/chat/ask')
-def post(message: str, request):
+async def post(message: str, request):
     """Handle chat message and return response with conversation memory"""
 
     if not CHAT_ENABLED or not message or message.strip() == "":
@@ -1722,11 +2020,12 @@ def post(message: str, request):
     # Get or create session ID and client IP
     session_id = get_session_id(request)
     ip_address = get_client_ip(request)
-    session_timestamps[session_id] = datetime.now()
+    chat_sessions.touch(session_id)
 
     # Check rate limits
     is_allowed, remaining, error_msg = check_rate_limit(session_id, ip_address)
     if not is_allowed:
+        metrics.inc('chat_questions_total', outcome='rate_limited')
         return Div(
             Div(
                 "⚠️ Rate Limit Reached",
@@ -1737,65 +2036,88 @@ def post(message: str, request):
             style="max-width: 75%; margin: 1rem 0;"
         )
 
-    # Cleanup old sessions periodically
-    if len(session_timestamps) > 100:  # Every 100 sessions
-        cleanup_old_sessions()
-
     timestamp = datetime.now().strftime("%I:%M %p")
 
     # Get conversation history for this session
-    history = chat_sessions[session_id]
+    history = chat_sessions.history(session_id)
 
     # Build messages array with history
     messages = [{"role": "system", "content": CHAT_CONTEXT}]
 
     # Add conversation history (last 10 exchanges = 20 messages)
-    for msg in list(history):
-        messages.append(msg)
+    messages.extend(history)
 
     # Add current user message
     messages.append({"role": "user", "content": message})
 
     # User message bubble
-    user_msg = Div(
-        Div(message, cls="message user-message"),
-        Div(timestamp, cls="timestamp text-end"),
-        style="display: flex; flex-direction: column; align-items: flex-end;"
-    )
+    user_msg = render_user_message(message, timestamp)
+
+    # High-confidence matches against the approved corpus are answered directly
+    approved = approved_answers.match(message)
+    assistant_text = approved['answer_text'] if approved is not None else None
+
+    # First-turn questions (empty history) can be served from the response cache
+    cache_key = None
+    if assistant_text is None and not history:
+        cache_key = response_cache.make_key(message, CHAT_CONTEXT, llm_client.model)
+        assistant_text = response_cache.get(cache_key)
+
+    if assistant_text is None and CHAT_STREAMING:
+        # Count the question now; the reply streams over /chat/stream/{stream_id}
+        metrics.inc('chat_questions_total', outcome='streamed')
+        increment_rate_limit(session_id, ip_address)
+        _, remaining, _ = check_rate_limit(session_id, ip_address)
+
+        now = datetime.now()
+        for sid in [sid for sid, p in pending_streams.items()
+                    if (now - p['created']).total_seconds() > PENDING_STREAM_TTL_SECONDS]:
+            del pending_streams[sid]
+        stream_id = str(uuid.uuid4())
+        pending_streams[stream_id] = {
+            'session_id': session_id,
+            'message': message,
+            'messages': messages,
+            'remaining': remaining,
+            'cache_key': cache_key,
+            'created': now
+        }
 
-    # Call OpenRouter API (Claude Sonnet 4.5 via OpenRouter)
-    try:
-        api_response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://louisville-311-dashboard.onrender.com",
-                "X-Title": "Louisville 311 Dashboard"
-            },
-            json={
-                "model": "anthropic/claude-sonnet-4.5:beta",
-                "messages": messages,
-                "max_tokens": 1024,
-                "temperature": 0.7
-            },
-            timeout=30
+        # Tokens are appended to the bubble; the "done" event swaps in feedback + follow-ups
+        assistant_msg = Div(
+            Div(cls="message assistant-message", sse_swap="token", hx_swap="beforeend"),
+            Div(timestamp, cls="timestamp"),
+            Div(sse_swap="done", hx_swap="outerHTML"),
+            hx_ext="sse",
+            sse_connect=f"/chat/stream/{stream_id}",
+            sse_close="done",
+            style="display: flex; flex-direction: column; align-items: flex-start;"
         )
+        return Div(user_msg, assistant_msg)
 
-        if api_response.status_code == 200:
-            response_data = api_response.json()
-            assistant_text = response_data['choices'][0]['message']['content']
+    if assistant_text is not None:
+        metrics.inc('chat_questions_total', outcome='approved' if approved is not None else 'cached')
+        chat_sessions.append(session_id, {"role": "user", "content": message},
+                             {"role": "assistant", "content": assistant_text})
+    else:
+        # Call OpenRouter API (Claude Sonnet 4.5 via OpenRouter) without blocking the worker
+        try:
+            with span('llm'):
+                if cache_key is not None:
+                    assistant_text = await single_flight.run(cache_key, lambda: llm_client.complete(messages))
+                else:
+                    assistant_text = await llm_client.complete(messages)
 
             # Store conversation in history
-            history.append({"role": "user", "content": message})
-            history.append({"role": "assistant", "content": assistant_text})
-        else:
-            assistant_text = f"I apologize, but I encountered an error (HTTP {api_response.status_code}). Please try again."
+            chat_sessions.append(session_id, {"role": "user", "content": message},
+                                 {"role": "assistant", "content": assistant_text})
+            if cache_key is not None:
+                response_cache.set(cache_key, assistant_text)
+            metrics.inc('chat_questions_total', outcome='llm')
 
-    except requests.exceptions.Timeout:
-        assistant_text = "I apologize, but the request timed out. Please try again."
-    except Exception as e:
-        assistant_text = f"I apologize, but I encountered an error processing your question: {str(e)}"
+        except Exception as e:
+            metrics.inc('chat_questions_total', outcome='error')
+            assistant_text = chat_error_text(e)
 
     # Increment rate limit counters (successful question)
     increment_rate_limit(session_id, ip_address)
@@ -1813,53 +2135,12 @@ def post(message: str, request):
     assistant_msg = Div(
         Div(assistant_text, cls="message assistant-message"),
         Div(timestamp, cls="timestamp"),
-        Div(
-            Button(
-                "👍",
-                cls="feedback-btn",
-                hx_post="/chat/feedback",
-                hx_vals=f'{{"message_id": "{message_id}", "feedback": "positive"}}',
-                hx_target="closest div",
-                hx_swap="afterend",
-                title="Helpful response"
-            ),
-            Button(
-                "👎",
-                cls="feedback-btn",
-                hx_post="/chat/feedback",
-                hx_vals=f'{{"message_id": "{message_id}", "feedback": "negative"}}',
-                hx_target="closest div",
-                hx_swap="afterend",
-                title="Not helpful"
-            ),
-            cls="feedback-buttons"
-        ),
-        Div(
-            f"💬 {remaining} questions remaining",
-            cls="text-muted",
-            style="font-size: 0.75rem; margin-top: 0.25rem;"
-        ),
+        render_reply_controls(message_id, remaining),
         style="display: flex; flex-direction: column; align-items: flex-start;"
     )
 
     # Follow-up questions section
-    follow_up_section = Div(
-        Div("💡 You might also want to ask:", cls="follow-up-label"),
-        *[
-            Button(
-                q,
-                cls="follow-up-btn",
-                hx_post="/chat/ask",
-                hx_vals=f'{{"message": "{q}"}}',
-                hx_target="#chat-history",
-                hx_swap="beforeend",
-                hx_indicator="#typing-indicator",
-                onclick="document.querySelector('.chat-container').scrollTop = document.querySelector('.chat-container').scrollHeight;"
-            )
-            for q in follow_ups
-        ],
-        cls="follow-up-questions"
-    )
+    follow_up_section = render_follow_ups(follow_ups)
 
     # Return both messages with session cookie
     response = Div(user_msg, assistant_msg, follow_up_section)
@@ -1867,6 +2148,307 @@ def post(message: str, request):
     # For now, using simple approach - session persists via server-side storage
     return response
 
+@rt('/chat/stream/{stream_id}')
+async def get(stream_id: str):
+    """Relay a pending chat completion to the browser as server-sent events"""
+    pending = pending_streams.pop(stream_id, None)
+
+    async def event_stream():
+        if pending is None:
+            yield sse_event("token", "This response is no longer available. Please ask again.")
+            yield sse_event("done", "<div></div>")
+            return
+
+        parts = []
+        cache_key = pending['cache_key']
+        flight = None
+        try:
+            in_flight = single_flight.in_flight(cache_key) if cache_key is not None else None
+            if in_flight is not None:
+                # Same first-turn prompt is already streaming: reuse its reply once complete
+                assistant_text = await single_flight.wait(in_flight)
+                parts.append(assistant_text)
+                yield sse_event("token", escape_html(assistant_text, quote=False))
+            else:
+                if cache_key is not None:
+                    flight = single_flight.start(cache_key)
+                async for delta in llm_client.stream(pending['messages']):
+                    parts.append(delta)
+                    yield sse_event("token", escape_html(delta, quote=False))
+                assistant_text = "".join(parts)
+                if flight is not None:
+                    single_flight.resolve(cache_key, assistant_text, future=flight)
+                    response_cache.set(cache_key, assistant_text)
+
+            # Store the finished message in the session history
+            chat_sessions.append(pending['session_id'], {"role": "user", "content": pending['message']},
+                                 {"role": "assistant", "content": assistant_text})
+        except Exception as e:
+            if flight is not None:
+                single_flight.resolve(cache_key, error=e, future=flight)
+            yield sse_event("token", escape_html(("" if not parts else " ") + chat_error_text(e), quote=False))
+        finally:
+            if flight is not None:
+                # Browser went away mid-stream: release anyone waiting on this flight (no-op once
+                # resolved, and never touches a newer leader's flight for the same key)
+                single_flight.resolve(cache_key, error=ConnectionError("the original request was closed"),
+                                      future=flight)
+
+        # Feedback buttons and follow-ups arrive once the reply is complete
+        extras = Div(
+            render_reply_controls(str(uuid.uuid4()), pending['remaining']),
+            render_follow_ups(generate_follow_up_questions(pending['message']))
+        )
+        yield sse_event("done", to_xml(extras))
+
+    return EventStream(event_stream())
+
+@rt('/api/chat-cache')
+def get():
+    """Response cache hit/miss counters and coalesced in-flight requests"""
+    return JSONResponse({**response_cache.stats(), 'coalesced': single_flight.shared})
+
+@rt('/api/chat-sessions')
+def get():
+    """Live chat sessions, stored bytes and eviction counts"""
+    return JSONResponse({**chat_sessions.stats(), 'rate_limit': rate_limiter.stats()})
+
+# Columns returned per record by /api/filter and /api/records
+FILTER_RECORD_COLUMNS = ['service_request_id', 'service_name', 'agency_responsible', 'description',
+                         'sentiment', 'urgency_level', 'urgency_score', 'address']
+FILTER_MAX_LIMIT = 100
+
+def record_query(request, default_limit: int):
+    """
+    Facet filters, sort, cursor and limit from the query string
+    Raises ValueError with a client-facing message for invalid values.
+    """
+    params = request.query_params
+    filters = {facet: params.getlist(facet) for facet in FACET_COLUMNS}
+    sort = params.get('sort') or None
+    if sort is not None and sort not in FACETS.orders:
+        raise ValueError(f"sort must be one of: {', '.join(FACETS.orders)}")
+    try:
+        # At least one row, so a page always advances the cursor
+        limit = max(1, min(int(params.get('limit', default_limit)), FILTER_MAX_LIMIT))
+        cursor = max(0, int(params.get('cursor', 0)))
+    except ValueError:
+        raise ValueError('limit and cursor must be integers')
+    return {'filters': filters, 'sort': sort, 'cursor': cursor, 'limit': limit}
+
+def record_dicts(positions):
+    """JSON-ready records for row positions of df (blanks as null)"""
+    columns = [c for c in FILTER_RECORD_COLUMNS if c in df.columns]
+    return df.iloc[positions][columns].astype(object).where(lambda frame: frame.notna(), None).to_dict('records')
+
+@rt('/api/filter')
+def get(request):
+    """
+    Count and first records for a facet combination, e.g.
+    /api/filter?urgency=high&sentiment=negative&service=Pothole&limit=10
+    Repeat a parameter to match any of several values.
+    """
+    try:
+        query = record_query(request, default_limit=10)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    filters = query['filters']
+    bitmap = FACETS.match(**filters)
+    return JSONResponse({
+        'filters': {facet: values for facet, values in filters.items() if values},
+        'count': FACETS.count(bitmap),
+        'facets': {facet: FACETS.facet_counts(bitmap, facet) for facet in ('sentiment', 'urgency')},
+        'records': record_dicts(FACETS.positions(bitmap, query['limit']))
+    })
+
+# ============================================================================
+# RECORD BROWSER
+# ============================================================================
+
+RECORD_PAGE_SIZE = 25
+
+RECORD_BROWSER_COLUMNS = [
+    table_column('service_request_id', style='font-weight: 600;'),
+    table_column('service_name', truncate=30, ellipsis=''),
+    table_column('description', truncate=100),
+    table_column('sentiment', colors=SENTIMENT_COLORS, blank='-'),
+    table_column('urgency_level', colors=URGENCY_COLORS, default_color='#22c55e', blank='-'),
+    table_column('urgency_score', style='font-weight: 600;')
+]
+
+def record_page(query):
+    """(matching rows, positions on this page, next cursor) for a record_query()"""
+    bitmap = FACETS.match(**query['filters'])
+    positions, next_cursor = FACETS.page(bitmap, query['limit'], query['cursor'], query['sort'])
+    return FACETS.count(bitmap), positions, next_cursor
+
+def record_browser_table(filters: dict, sort: str = None):
+    """Table whose rows load page by page from /records/rows"""
+    params = {facet: values for facet, values in filters.items() if values}
+    if sort:
+        params['sort'] = sort
+    columns = [spec['name'].replace('_', ' ').title() for spec in RECORD_BROWSER_COLUMNS]
+    return Table(
+        Thead(Tr(*[Th(c) for c in columns])),
+        Tbody(Tr(Td('Loading…', colspan=str(len(columns))),
+                 hx_get=f"/records/rows?{urlencode(params, doseq=True)}", hx_trigger='load', hx_swap='outerHTML')),
+        cls='table table-striped'
+    )
+
+@rt('/api/records')
+def get(request):
+    """
+    One page of matching records, e.g.
+    /api/records?urgency=high&sentiment=negative&sort=urgency_score&limit=25&cursor=<next_cursor>
+    """
+    try:
+        query = record_query(request, default_limit=RECORD_PAGE_SIZE)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    count, positions, next_cursor = record_page(query)
+    return JSONResponse({'count': count, 'records': record_dicts(positions), 'next_cursor': next_cursor})
+
+@rt('/records/rows')
+def get(request):
+    """HTMX partial: rows for one page plus a 'Load more' row fetching the next"""
+    try:
+        query = record_query(request, default_limit=RECORD_PAGE_SIZE)
+    except ValueError as e:
+        return Response(str(e), status_code=400)
+    count, positions, next_cursor = record_page(query)
+    columns = [spec['name'] for spec in RECORD_BROWSER_COLUMNS if spec['name'] in df.columns]
+    rows = table_rows(df.iloc[positions][columns], [spec for spec in RECORD_BROWSER_COLUMNS if spec['name'] in columns],
+                      empty=Tr(Td('No matching requests', colspan=str(len(columns)), style='color: #22c55e;')))
+    if next_cursor is None:
+        return tuple(rows)
+    params = [(k, v) for k, v in request.query_params.multi_items() if k != 'cursor'] + [('cursor', next_cursor)]
+    more = Tr(Td(Button(f"Load more ({count:,} matching)", cls='btn btn-sm btn-outline-danger',
+                        hx_get=f"/records/rows?{urlencode(params)}", hx_target='closest tr', hx_swap='outerHTML'),
+                 colspan=str(len(columns))))
+    return tuple(rows) + (more,)
+
+@rt('/api/timing')
+def get():
+    """Per-route latency histograms (recorded unless ROUTE_METRICS=0)"""
+    return JSONResponse({'enabled': ROUTE_METRICS_ENABLED, 'routes': route_latency.snapshot()})
+
+@rt('/api/repeat-callers')
+def get(address: str = None, top: int = 15):
+    """Repeat-caller stats, or per-service request counts for one address"""
+    if address:
+        return JSONResponse({'address': address, 'services': REPEAT_CALLERS.address_calls(address)})
+    return JSONResponse(REPEAT_CALLERS.summary(top=max(0, min(top, 100))))
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+_dataset_memory = {}
+
+def dataset_memory_bytes():
+    """Deep memory usage of df, measured once per dataset version"""
+    if DATASET_VERSION not in _dataset_memory:
+        _dataset_memory.clear()
+        _dataset_memory[DATASET_VERSION] = int(df.memory_usage(deep=True).sum())
+    return _dataset_memory[DATASET_VERSION]
+
+def _samples(label: str, counts: dict):
+    return [({label: key}, n) for key, n in sorted(counts.items())]
+
+metrics.collect('process_resident_memory_bytes', 'gauge', "Resident set size of this process", process_rss_bytes)
+metrics.collect('dataset_rows', 'gauge', "Service requests in the loaded dataset", lambda: len(df))
+metrics.collect('dataset_memory_bytes', 'gauge', "Deep memory usage of the loaded dataset", dataset_memory_bytes)
+metrics.collect('chat_sessions', 'gauge', "Live chat sessions", lambda: chat_sessions.stats()['live_sessions'])
+metrics.collect('chat_session_bytes', 'gauge', "Bytes of stored chat history", lambda: chat_sessions.total_bytes)
+metrics.collect('chat_session_evictions_total', 'counter', "Chat sessions evicted, by reason",
+                lambda: _samples('reason', chat_sessions.evictions))
+metrics.collect('chat_rate_limited_total', 'counter', "Chat questions rejected by rate limit scope",
+                lambda: _samples('scope', rate_limiter.rejections))
+metrics.collect('chat_coalesced_total', 'counter', "Chat requests that shared an in-flight upstream call",
+                lambda: single_flight.shared)
+metrics.collect('response_cache_hits_total', 'counter', "Chat response cache hits", lambda: response_cache.hits)
+metrics.collect('response_cache_misses_total', 'counter', "Chat response cache misses", lambda: response_cache.misses)
+metrics.collect('response_cache_entries', 'gauge', "Cached chat responses", lambda: len(response_cache))
+metrics.collect('chart_cache_bytes', 'gauge', "Rendered chart HTML held in the chart cache", lambda: chart_cache.total_bytes)
+metrics.collect('llm_requests_total', 'counter', "Upstream chat completion calls", lambda: llm_client.requests)
+metrics.collect('llm_timeouts_total', 'counter', "Upstream calls past their deadline", lambda: llm_client.timeouts)
+metrics.collect('llm_transport_errors_total', 'counter', "Upstream calls failed before a response",
+                lambda: llm_client.transport_errors)
+metrics.collect('llm_responses_total', 'counter', "Upstream responses by HTTP status",
+                lambda: _samples('status', llm_client.status_codes))
+metrics.collect('feedback_written_total', 'counter', "Feedback records written to the log", lambda: feedback_log.written)
+
+@rt('/metrics')
+def get():
+    """Prometheus text exposition of app, cache, chat and upstream metrics"""
+    return Response(metrics.render(route_latency), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+def profile_admin(request, token: str = None):
+    """Profiling is on and the request carries the admin token (query `token` or X-Profile-Token)"""
+    return PROFILING_ENABLED and authorized(token or request.headers.get(PROFILE_HEADER, ''))
+
+def profile_function_table(rows, samples):
+    return Table(
+        Thead(Tr(Th('Function'), Th('Samples'), Th('%'))),
+        Tbody(*[Tr(Td(Code(label)), Td(f"{n:,}"), Td(f"{n / samples * 100:.1f}%" if samples else '-'))
+                for label, n in rows]),
+        cls='table table-striped table-sm'
+    )
+
+@rt('/admin/profiles')
+def get(request, token: str = None):
+    """Recent request profiles (admin only, 404 otherwise)"""
+    if not profile_admin(request, token):
+        return Response('Not Found', status_code=404)
+    query = urlencode({'token': token}) if token else ''
+    rows = [Tr(Td(A(p['name'], href=f"/admin/profiles/{p['name']}?{query}")), Td(p['method']), Td(Code(p['path'])),
+               Td(str(p['status'])), Td(p['started']), Td(f"{p['duration_ms']:,.1f}"), Td(f"{p['samples']:,}"))
+            for p in profile_store.recent()]
+    return Title('Request Profiles'), Main(
+        H1('Request Profiles', style='margin-bottom: 1rem; color: #1f2937;'),
+        P(f"Newest {profile_store.max_files} profiles kept in {profile_store.directory}. "
+          f"Profile a request by sending the X-Profile-Token header or ?__profile=<token>."),
+        Table(
+            Thead(Tr(Th('Profile'), Th('Method'), Th('Path'), Th('Status'), Th('Started'), Th('Duration (ms)'), Th('Samples'))),
+            Tbody(*rows) if rows else Tbody(Tr(Td('No profiles yet', colspan='7'))),
+            cls='table table-striped table-hover'
+        ),
+        cls='container-fluid px-4 py-4'
+    )
+
+@rt('/admin/profiles/{name}')
+def get(request, name: str, token: str = None, format: str = None):
+    """One stored profile: top functions, or JSON / folded stacks (format=json|folded)"""
+    profile = profile_store.load(name) if profile_admin(request, token) else None
+    if profile is None:
+        return Response('Not Found', status_code=404)
+    if format == 'json':
+        return JSONResponse(profile)
+    if format == 'folded':
+        # Collapsed stacks for flamegraph.pl / speedscope
+        return Response(''.join(f"{stack} {n}\n" for stack, n in profile['folded']), media_type='text/plain')
+
+    query = {'token': token} if token else {}
+    samples = profile['samples']
+    return Title(f"Profile {name}"), Main(
+        H1(f"{profile['method']} {profile['path']}", style='margin-bottom: 1rem; color: #1f2937;'),
+        P(f"Status {profile['status']} • started {profile['started']} • {profile['duration_ms']:,.1f} ms • "
+          f"{samples:,} samples every {profile['interval_ms']:g} ms • ",
+          A('JSON', href=f"/admin/profiles/{name}?{urlencode({**query, 'format': 'json'})}"), ' • ',
+          A('Folded stacks', href=f"/admin/profiles/{name}?{urlencode({**query, 'format': 'folded'})}"), ' • ',
+          A('All profiles', href=f"/admin/profiles?{urlencode(query)}")),
+        H3('Self samples', style='margin-top: 1.5rem;'),
+        profile_function_table(profile['top_self'], samples),
+        H3('Total samples (function anywhere on the stack)', style='margin-top: 1.5rem;'),
+        profile_function_table(profile['top_total'], samples),
+        cls='container-fluid px-4 py-4'
+    )
+
 # ============================================================================
 # RUN APP
 # ============================================================================
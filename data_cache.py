@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for the 311 CSV extracts
+Parses a CSV once, stores the typed frame (categoricals included) as a pickle,
+and reloads it on later starts until the source file changes.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+import pandas as pd
+
+# Cache location (override with DATA_CACHE_DIR, e.g. a persistent disk on Render)
+CACHE_DIR = Path(os.getenv("DATA_CACHE_DIR", Path(__file__).parent / ".data_cache"))
+
+# Bump when the cached layout changes so old artifacts are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+def _stat_fingerprint(sources):
+    """Cheap fingerprint from file size + mtime (checked on every start)"""
+    parts = []
+    for path in sources:
+        stat = Path(path).stat()
+        parts.append(f"{Path(path).resolve()}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def _content_hash(sources):
+    """Content hash of the source files (only computed when the mtime changed)"""
+    digest = hashlib.sha256()
+    for path in sources:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, write):
+    """Write via a temp file + rename so concurrent workers never see partial files"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def cached_frame(name: str, sources, build, cache_dir=None):
+    """
+    Return the DataFrame produced by build(), reusing the on-disk copy while the
+    source files are unchanged.
+    A changed mtime alone (fresh checkout, deploy) falls back to a content hash
+    before re-running build().
+    """
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    data_path = cache_dir / f"{name}.pkl"
+    meta_path = cache_dir / f"{name}.json"
+
+    stat_fp = _stat_fingerprint(sources)
+    meta = {}
+    if data_path.exists() and meta_path.exists():
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            meta = {}
+
+    content_hash = None
+    if meta.get('format') == CACHE_FORMAT_VERSION:
+        is_fresh = meta.get('stat') == stat_fp
+        if not is_fresh:
+            content_hash = _content_hash(sources)
+            is_fresh = meta.get('sha256') == content_hash
+        if is_fresh:
+            try:
+                frame = pd.read_pickle(data_path)
+            except Exception:
+                frame = None
+            if frame is not None:
+                if meta.get('stat') != stat_fp:
+                    meta['stat'] = stat_fp
+                    _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+                return frame
+
+    frame = build()
+    if content_hash is None:
+        content_hash = _content_hash(sources)
+    _write_atomic(data_path, lambda f: pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL))
+    meta = {
+        'format': CACHE_FORMAT_VERSION,
+        'stat': stat_fp,
+        'sha256': content_hash,
+        'rows': len(frame),
+    }
+    _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+    return frame
+
+
+def read_csv_cached(csv_path, categorical_columns=(), cache_dir=None, **read_csv_kwargs):
+    """
+    Load a CSV through the on-disk cache, parsing it only when the file changes.
+    Columns listed in categorical_columns are stored as pandas categoricals.
+    """
+    csv_path = Path(csv_path)
+    categorical_columns = list(categorical_columns)
+
+    # Cache key covers the file location and load options, not just the file name
+    options = json.dumps(
+        {'path': str(csv_path.resolve()), 'categorical': categorical_columns,
+         'kwargs': sorted((k, repr(v)) for k, v in read_csv_kwargs.items())},
+        sort_keys=True
+    )
+    name = f"{csv_path.stem}-{hashlib.sha256(options.encode()).hexdigest()[:12]}"
+
+    def build():
+        frame = pd.read_csv(csv_path, **read_csv_kwargs)
+        for col in categorical_columns:
+            if col in frame.columns:
+                frame[col] = frame[col].astype('category')
+        return frame
+
+    return cached_frame(name, [csv_path], build, cache_dir=cache_dir)
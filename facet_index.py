@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Bitmap index over the dashboard's facet columns
+Each value of service, agency, sentiment and urgency gets a packed bitmap
+(one bit per row of df). A facet combination is the bitwise AND of the
+bitmaps (OR within one facet), so counts and the first matching rows come
+from a few vectorized passes over n/8 bytes instead of boolean masks over
+the frame.
+
+Precomputed sort orders (row positions sorted by a column) let page() walk
+the matches in that order from a cursor without sorting or copying rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Query parameter name -> frame column
+FACET_COLUMNS = {
+    'service': 'service_name',
+    'agency': 'agency_responsible',
+    'sentiment': 'sentiment',
+    'urgency': 'urgency_level'
+}
+
+# Numeric columns with a precomputed descending sort order (blanks last)
+SORT_COLUMNS = ['urgency_score']
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bits):
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+else:  # numpy < 2.0
+    _POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bits):
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+
+class FacetIndex:
+    """Packed bitmaps per (facet, value) for one frame"""
+
+    def __init__(self, frame, facets=FACET_COLUMNS, sort_columns=SORT_COLUMNS):
+        self.rows = len(frame)
+        self.facets = dict(facets)
+        self._bitmaps = {}
+        for facet, column in self.facets.items():
+            codes, uniques = pd.factorize(frame[column], use_na_sentinel=True)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            bitmaps = {}
+            for i, value in enumerate(uniques):
+                mask = np.zeros(self.rows, dtype=bool)
+                mask[order[bounds[i]:bounds[i + 1]]] = True
+                bitmaps[str(value)] = np.packbits(mask)
+            self._bitmaps[facet] = bitmaps
+        self._all = np.packbits(np.ones(self.rows, dtype=bool))
+
+        self.orders = {}
+        for column in sort_columns:
+            if column in frame.columns:
+                values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                self.orders[column] = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable')
+
+    def values(self, facet: str):
+        return list(self._bitmaps[facet])
+
+    def bitmap(self, facet: str, value: str):
+        """Rows with facet == value (an empty bitmap for unknown values)"""
+        bitmap = self._bitmaps[facet].get(value)
+        return bitmap if bitmap is not None else np.zeros_like(self._all)
+
+    def match(self, **filters):
+        """
+        Bitmap of rows matching every facet filter
+        A filter value may be a string or a list of strings (any of them);
+        None or an empty list leaves that facet unfiltered.
+        """
+        result = self._all
+        for facet, wanted in filters.items():
+            if facet not in self._bitmaps:
+                raise KeyError(f"Unknown facet: {facet}")
+            if not wanted:
+                continue
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            selected = self.bitmap(facet, wanted[0])
+            for value in wanted[1:]:
+                selected = selected | self.bitmap(facet, value)
+            result = result & selected
+        return result
+
+    def count(self, bitmap):
+        return _popcount(bitmap)
+
+    def positions(self, bitmap, limit: int = None, start: int = 0):
+        """Row positions set in bitmap, ascending, from row `start` on (at most `limit` of them)"""
+        if limit is None:
+            found = np.flatnonzero(np.unpackbits(bitmap)[:self.rows])
+            return found[found >= start]
+        nonzero = np.flatnonzero(bitmap[start // 8:]) + start // 8
+        # Unpack only the non-zero bytes, a block at a time, until limit rows are found
+        found = []
+        total = 0
+        block = max(limit, 64)
+        for offset in range(0, len(nonzero), block):
+            byte_positions = nonzero[offset:offset + block]
+            bits = np.unpackbits(bitmap[byte_positions][:, None], axis=1)
+            rows_, cols = np.nonzero(bits)
+            hits = byte_positions[rows_] * 8 + cols
+            hits = hits[(hits >= start) & (hits < self.rows)]
+            found.append(hits)
+            total += len(hits)
+            if total >= limit:
+                break
+        return np.concatenate(found)[:limit] if found else np.empty(0, dtype=np.int64)
+
+    def contains(self, bitmap, positions):
+        """Boolean array: is each row position set in bitmap"""
+        return ((bitmap[positions >> 3] >> (7 - (positions & 7))) & 1).astype(bool)
+
+    def page(self, bitmap, limit: int, cursor: int = 0, sort: str = None):
+        """
+        (positions, next_cursor) for one page of matching rows
+        Rows come in frame order, or by the precomputed `sort` order; the
+        cursor is the position in that order to resume from (None after the
+        last page). Later pages cost the same as the first.
+        """
+        if sort is None:
+            positions = self.positions(bitmap, limit + 1, start=cursor)
+            next_cursor = int(positions[limit]) if len(positions) > limit else None
+            return positions[:limit], next_cursor
+
+        order = self.orders[sort]
+        found = []
+        total = 0
+        block = max(4 * limit, 256)
+        for start in range(cursor, len(order), block):
+            ranks = np.arange(start, min(start + block, len(order)))
+            hits = ranks[self.contains(bitmap, order[ranks])]
+            found.append(hits)
+            total += len(hits)
+            if total > limit:
+                break
+        ranks = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        next_cursor = int(ranks[limit]) if len(ranks) > limit else None
+        return order[ranks[:limit]], next_cursor
+
+    def facet_counts(self, bitmap, facet: str):
+        """{value: matching rows} for one facet within bitmap, largest first"""
+        counts = {value: _popcount(bitmap & values) for value, values in self._bitmaps[facet].items()}
+        return dict(sorted(((v, n) for v, n in counts.items() if n), key=lambda item: -item[1]))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenRouter chat completions API
+Used by the tests (and for manual runs) so /chat/ask can be exercised without
+an API key or network access.
+
+    python fake_openrouter.py --port 8099 --latency 0.5
+    OPENROUTER_API_KEY=test OPENROUTER_BASE_URL=http://127.0.0.1:8099/api/v1 python dashboard_app.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenRouter:
+    """
+    Threaded HTTP server answering POST /api/v1/chat/completions with a canned reply
+    latency delays the first byte; token_latency spaces out streamed chunks
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, reply="Happy to help with 311 services!", status=200,
+                 token_latency=0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.reply = reply
+        self.status = status
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                payload = json.loads(body or b'{}')
+                with fake._lock:
+                    fake.request_count += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    fake.requests.append(payload)
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    if self.path.rstrip('/') != '/api/v1/chat/completions':
+                        self._send_json(404, {'error': {'message': 'not found'}})
+                    elif fake.status != 200:
+                        self._send_json(fake.status, {'error': {'message': 'upstream error'}})
+                    elif payload.get('stream'):
+                        self._send_stream(payload)
+                    else:
+                        self._send_json(200, {
+                            'id': f"fake-{fake.request_count}",
+                            'model': payload.get('model'),
+                            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': fake.reply}}],
+                        })
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (deadline tests); nothing left to send
+                    self.close_connection = True
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _send_stream(self, payload):
+                # One SSE chunk per word, then [DONE]; the connection is closed to end the body
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                self.wfile.write(b": OPENROUTER PROCESSING\n\n")
+                words = fake.reply.split(' ')
+                for i, word in enumerate(words):
+                    chunk = {'model': payload.get('model'),
+                             'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word}}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    if fake.token_latency:
+                        time.sleep(fake.token_latency)
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def _send_json(self, status, data):
+                encoded = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+        return Handler
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fake OpenRouter chat completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds to wait before replying")
+    parser.add_argument('--status', type=int, default=200, help="HTTP status to return")
+    args = parser.parse_args()
+
+    fake = FakeOpenRouter(args.host, args.port, latency=args.latency, status=args.status)
+    print(f"Fake OpenRouter listening at {fake.base_url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
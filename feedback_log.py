@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Append-only log for chat feedback
+/chat/feedback hands entries to a background writer that appends them to a
+JSONL file in batches and fsyncs on an interval, so a click costs the same no
+matter how large the log grows. compact() folds the log into per-message
+helpful / not-helpful counts, resuming from where the previous run stopped.
+
+    python feedback_log.py --compact
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+CURRENT_DIR = Path(__file__).parent
+FEEDBACK_LOG_PATH = Path(os.getenv("FEEDBACK_LOG_PATH", CURRENT_DIR / "chat_feedback.jsonl"))
+FEEDBACK_SUMMARY_PATH = Path(os.getenv("FEEDBACK_SUMMARY_PATH", CURRENT_DIR / "chat_feedback_summary.json"))
+LEGACY_FEEDBACK_PATH = CURRENT_DIR / "chat_feedback.json"
+
+# Seconds between fsyncs, and the most entries written per batch
+FEEDBACK_FSYNC_INTERVAL = float(os.getenv("FEEDBACK_FSYNC_INTERVAL", 1.0))
+FEEDBACK_MAX_BATCH = 1000
+
+
+class FeedbackLog:
+    """Background batching writer for the feedback JSONL log"""
+
+    def __init__(self, path=FEEDBACK_LOG_PATH, fsync_interval: float = FEEDBACK_FSYNC_INTERVAL,
+                 max_batch: int = FEEDBACK_MAX_BATCH):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+                self._thread.start()
+
+    def record(self, message_id: str, feedback: str, timestamp: str = None):
+        """Queue one feedback entry (returns immediately)"""
+        self._ensure_writer()
+        self._queue.put({
+            'message_id': message_id,
+            'feedback': feedback,
+            'timestamp': timestamp or datetime.now().isoformat()
+        })
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything queued so far is written and fsynced"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self.flush()
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            last_sync = time.monotonic()
+            dirty = False
+            while True:
+                # Sleep until something arrives or a pending fsync is due
+                wait = max(0.0, self.fsync_interval - (time.monotonic() - last_sync)) if dirty else None
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    item = None if not dirty else False
+
+                batch, waiters, stop = [], [], item is None
+                while item not in (None, False):
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if len(batch) >= self.max_batch:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+
+                if batch:
+                    try:
+                        f.write(b"".join(json.dumps(entry).encode() + b"\n" for entry in batch))
+                        self.written += len(batch)
+                        self.batches += 1
+                        dirty = True
+                    except OSError:
+                        self.errors += 1
+
+                if dirty and (waiters or stop or time.monotonic() - last_sync >= self.fsync_interval):
+                    try:
+                        f.flush()
+                        os.fsync(f.fileno())
+                    except OSError:
+                        self.errors += 1
+                    last_sync = time.monotonic()
+                    dirty = False
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'errors': self.errors
+        }
+
+
+# ============================================================================
+# COMPACTION
+# ============================================================================
+
+def migrate_legacy_json(legacy_path=LEGACY_FEEDBACK_PATH, log_path=FEEDBACK_LOG_PATH):
+    """Append entries from the old chat_feedback.json array to the log once, then rename it"""
+    legacy_path, log_path = Path(legacy_path), Path(log_path)
+    if not legacy_path.exists():
+        return 0
+    with open(legacy_path, 'r') as f:
+        entries = json.load(f)
+    with open(log_path, 'a') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    legacy_path.rename(legacy_path.with_name(legacy_path.name + ".migrated"))
+    return len(entries)
+
+
+def compact(log_path=FEEDBACK_LOG_PATH, summary_path=FEEDBACK_SUMMARY_PATH):
+    """
+    Fold new log lines into the per-message summary and return it
+    The summary stores the byte offset it has read up to, so each run only
+    reads entries appended since the last one.
+    """
+    log_path, summary_path = Path(log_path), Path(summary_path)
+    summary = {'offset': 0, 'total': {'helpful': 0, 'not_helpful': 0}, 'messages': {}}
+    if summary_path.exists():
+        with open(summary_path, 'r') as f:
+            summary = json.load(f)
+    if not log_path.exists():
+        return summary
+    if log_path.stat().st_size < summary['offset']:
+        # Log was replaced; start over
+        summary = {'offset': 0, 'total': {'helpful': 0, 'not_helpful': 0}, 'messages': {}}
+
+    with open(log_path, 'rb') as f:
+        f.seek(summary['offset'])
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partially written tail; picked up next run
+            summary['offset'] += len(line)
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            key = 'helpful' if entry.get('feedback') == 'positive' else 'not_helpful'
+            counts = summary['messages'].setdefault(entry.get('message_id'), {'helpful': 0, 'not_helpful': 0})
+            counts[key] += 1
+            summary['total'][key] += 1
+
+    tmp_path = summary_path.with_name(f"{summary_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, summary_path)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Chat feedback log maintenance")
+    parser.add_argument('--compact', action='store_true', help="Fold new entries into the summary file")
+    parser.add_argument('--migrate', action='store_true', help="Import the legacy chat_feedback.json array")
+    args = parser.parse_args()
+
+    if args.migrate:
+        print(f"Migrated {migrate_legacy_json()} legacy entries into {FEEDBACK_LOG_PATH}")
+    if args.compact or not args.migrate:
+        summary = compact()
+        print(f"{len(summary['messages'])} messages: {summary['total']['helpful']} helpful, "
+              f"{summary['total']['not_helpful']} not helpful")
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Synthetic Louisville 311 extracts for scale testing
+Writes a processed CSV in the schema the dashboard and analysis scripts read
+(service_name, agency_responsible, description, sentiment, urgency_level,
+urgency_score, address, topics_json, ner_json, ...) and the matching raw
+CSV with `source`, at any size:
+
+    python generate_synthetic_data.py --rows 1000000 --output synthetic_311.csv --raw-output synthetic_311_raw.csv
+    L311_PROCESSED_CSV=synthetic_311.csv L311_RAW_CSV=synthetic_311_raw.csv python generate_summary_stats.py
+    python bench_routes.py --data synthetic_311.csv
+
+Source, service, sentiment and urgency mixes follow the 2024 aggregates in
+docs/Louisville_311_NLP_Analysis_Report.md and docs/BOTTLENECK_ANALYSIS_REPORT.md.
+The reports only break services down for the call center, so that mix is
+used for every source. Text, addresses and topic labels are illustrative.
+Output is deterministic for a given --seed and --chunk-rows.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TOTAL_REQUESTS = 169_598
+
+# Raw `source` values: call center vs blank (the two add up to every request)
+SOURCE_COUNTS = {'CALL CENTER': 106_631, '': 62_967}
+
+# Sentiment per source ('' = not classified); non-call-center = overall minus call center
+SENTIMENT_COUNTS = {
+    'CALL CENTER': {'neutral': 61_332, 'negative': 42_911, 'positive': 116, '': 2_272},
+    '': {'neutral': 28_831, 'negative': 31_705, 'positive': 145, '': 2_286},
+}
+
+# Urgency per source; non-call-center levels use the report's overall estimates (~12.5% high, ~37.5% medium)
+URGENCY_COUNTS = {
+    'CALL CENTER': {'low': 72_132, 'medium': 21_311, 'high': 12_937, '': 251},
+    '': {'low': 12_443, 'medium': 42_120, 'high': 8_207, '': 197},
+}
+
+# High urgency concentrates in negative requests: 11,765 of the 12,937 high-urgency calls are negative
+HIGH_NEGATIVE_CALLS = 11_765
+
+URGENCY_SCORE_RANGES = {'low': (1.0, 4.0), 'medium': (4.0, 7.0), 'high': (7.0, 10.0)}
+
+# Call center share of descriptions that are empty or minimal, and the rate for other sources
+BLANK_DESCRIPTION_RATE = {'CALL CENTER': 0.494, '': 0.10}
+
+NER_RATE = 0.996
+TOPICS_RATE = 0.99
+ABSA_RATE = 0.772
+
+# Blank-source requests whose entities name a contact method, and the method mix
+CONTACT_CLUE_RATE = 0.013
+CONTACT_CLUES = {'web': 430, 'phone': 292, 'email': 72, 'mobile': 27}
+
+# service_name: (call center volume, agency, topic labels, description templates)
+# The top ten volumes are from the call center report; the rest split roughly the remaining 23.2%.
+SERVICES = {
+    'NSR Metro Agencies': (34_981, 'Metro 311', ['Metro Transit Services', 'Government Agencies'], [
+        "Caller asked for the phone number of a metro agency",
+        "Question about metro agencies events near {street}",
+        "Caller transferred to another metro agency",
+    ]),
+    'Streets': (6_839, 'Public Works', ['Infrastructure', 'Public Safety'], [
+        "Pothole in the right lane on {street}",
+        "Deep potholes in the alley behind {street}",
+        "Road surface breaking up near {street}",
+    ]),
+    'NSR Social Services': (6_075, 'Resilience and Community Services', ['Social Services', 'Government Agencies'], [
+        "Caller needs help with utility assistance",
+        "Looking for social services near {street}",
+        "Caller asked about rental assistance programs",
+    ]),
+    'Solid Waste Container Request': (5_993, 'Solid Waste Management', ['Waste Management'], [
+        "Need a new garbage cart, lid is broken",
+        "Request recycling container for {street}",
+        "Waste container was stolen from the curb",
+    ]),
+    'Solid Waste Missed Services': (5_225, 'Solid Waste Management', ['Waste Management'], [
+        "Trash was not picked up on my street again",
+        "Missed recycling pickup for two weeks on {street}",
+        "Garbage missed, whole block was skipped",
+    ]),
+    'NSR Miscellaneous': (4_488, 'Metro 311', ['Government Agencies'], [
+        "General question about city services",
+        "Caller asked about office hours",
+    ]),
+    'Exterior': (3_850, 'Codes and Regulations', ['Property Maintenance', 'Illegal Dumping'], [
+        "Trash and debris piled in the yard at {street}",
+        "Vacant property with broken windows on {street}",
+        "Furniture dumped in the alley behind {street}",
+    ]),
+    'NSR Government': (3_682, 'Metro 311', ['Government Agencies'], [
+        "Caller asked how to reach council district office",
+        "Question about property tax bill",
+    ]),
+    'Animal Issue': (3_335, 'Animal Services', ['Animal Control', 'Public Safety'], [
+        "Dead deer on the road at {street}",
+        "Loose dogs running in the street near {street}",
+        "Stray dog in the yard, seems aggressive",
+    ]),
+    'High Weeds/Grass': (3_171, 'Codes and Regulations', ['Property Maintenance'], [
+        "High grass and weeds at vacant lot on {street}",
+        "Overgrown yard, grass needs to be cut",
+    ]),
+    'Interior': (3_100, 'Codes and Regulations', ['Property Maintenance', 'Public Safety'], [
+        "Roach infestation in neighboring unit, unsanitary conditions",
+        "No heat in apartment, landlord not responding",
+        "Mold in the bathroom and leaking ceiling",
+    ]),
+    'Traffic Signals': (2_800, 'Public Works', ['Infrastructure', 'Public Safety'], [
+        "Traffic light out at {street}",
+        "Signal stuck on red at the intersection near {street}",
+    ]),
+    'Street Lights': (2_700, 'Public Works', ['Infrastructure', 'Public Safety'], [
+        "Street lights out on the entire block of {street}",
+        "Light pole flickering all night on {street}",
+    ]),
+    'Trees': (2_500, 'Metro Parks', ['Property Maintenance', 'Public Safety'], [
+        "Tree limb down blocking the sidewalk on {street}",
+        "Dead tree leaning over the road near {street}",
+    ]),
+    'Illegal Dumping': (2_400, 'Solid Waste Management', ['Illegal Dumping', 'Property Maintenance'], [
+        "Illegal dumping in the alley behind {street}",
+        "Tires and furniture dumped on {street}",
+    ]),
+    'Large Item Appointment': (2_300, 'Solid Waste Management', ['Waste Management'], [
+        "Large item appointment for a couch",
+        "Schedule large item pickup for {street}",
+    ]),
+    'Parking Concern': (2_200, 'Public Works', ['Parking', 'Public Safety'], [
+        "Vehicle parked on {street} for two months",
+        "Truck parked in the lane, no plate",
+    ]),
+    'Abandoned Vehicle': (2_000, 'Codes and Regulations', ['Parking'], [
+        "Abandoned car with flat tires on {street}",
+        "Car has not moved in weeks, expired tags",
+    ]),
+    'Graffiti': (1_800, 'Codes and Regulations', ['Illegal Dumping', 'Property Maintenance'], [
+        "Graffiti on the wall of the building at {street}",
+    ]),
+    'Sidewalk Repair': (1_600, 'Public Works', ['Infrastructure'], [
+        "Broken sidewalk is a tripping hazard on {street}",
+    ]),
+    'Odor Complaint': (1_200, 'Codes and Regulations', ['Property Maintenance'], [
+        "Strong sewage smell near {street}",
+        "Odor coming from the property next door",
+    ]),
+}
+
+STREETS = [
+    'BARDSTOWN RD', 'PRESTON HWY', 'DIXIE HWY', 'W BROADWAY', 'E BROADWAY', 'FRANKFORT AVE', 'TAYLORSVILLE RD',
+    'SHELBYVILLE RD', 'BROWNSBORO RD', 'OUTER LOOP', 'POPLAR LEVEL RD', 'S 4TH ST', 'W MARKET ST', 'E MAIN ST',
+    'BANK ST', 'MAGAZINE ST', 'CHESTNUT ST', 'HIKES LN', 'BLANKENBAKER PKWY', 'HURSTBOURNE PKWY', 'GREENWOOD RD',
+    'CANE RUN RD', 'PARK HILL DR', 'ALGONQUIN PKWY', 'STARKS AVE', 'EASTERN PKWY', 'CRESCENT AVE', 'LEXINGTON RD',
+]
+ZIP_CODES = [40202, 40203, 40204, 40205, 40206, 40207, 40208, 40209, 40210, 40211, 40212, 40213, 40214, 40215,
+             40216, 40217, 40218, 40219, 40220, 40222, 40223, 40228, 40229, 40241, 40243, 40245, 40258, 40272, 40291]
+COUNCIL_DISTRICTS = 26
+CENTER = (38.2527, -85.7585)
+
+STATUS_WEIGHTS = {'CLOSED': 0.85, 'OPEN': 0.10, 'IN PROGRESS': 0.05}
+YEAR_START = pd.Timestamp('2024-01-01').value // 10**9
+YEAR_SECONDS = 366 * 24 * 3600
+
+# Processed CSV column order
+COLUMNS = [
+    'service_request_id', 'requested_datetime', 'status_description', 'service_name', 'description',
+    'agency_responsible', 'address', 'zip_code', 'council_district', 'latitude', 'longitude', 'sentiment',
+    'urgency_level', 'urgency_score', 'ner_json', 'topics_json', 'absa_json'
+]
+RAW_COLUMNS = ['service_request_id', 'requested_datetime', 'service_name', 'description', 'address', 'source']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic 311 processed + raw CSVs")
+    parser.add_argument('--rows', type=int, default=TOTAL_REQUESTS, help=f"Requests to generate (default {TOTAL_REQUESTS:,})")
+    parser.add_argument('--output', type=Path, default=Path('synthetic_311_data.csv'), help="Processed CSV path")
+    parser.add_argument('--raw-output', type=Path, default=Path('synthetic_311_raw.csv'), help="Raw CSV path (with source)")
+    parser.add_argument('--seed', type=int, default=311)
+    parser.add_argument('--chunk-rows', type=int, default=200_000, help="Rows generated and written per chunk")
+    return parser.parse_args(argv)
+
+
+def _shares(counts: dict):
+    values = np.array(list(counts.values()), dtype=float)
+    return list(counts), values / values.sum()
+
+
+def _choice(rng, counts: dict, size: int):
+    labels, p = _shares(counts)
+    return np.array(labels, dtype=object)[rng.choice(len(labels), size=size, p=p)]
+
+
+def high_urgency_given_sentiment(source: str):
+    """(P(high | negative), P(high | not negative)) keeping the source's high share and the call center lift"""
+    cc_sentiment, cc_urgency = SENTIMENT_COUNTS['CALL CENTER'], URGENCY_COUNTS['CALL CENTER']
+    cc_total = sum(cc_sentiment.values())
+    lift = (HIGH_NEGATIVE_CALLS / cc_sentiment['negative']) / (
+        (cc_urgency['high'] - HIGH_NEGATIVE_CALLS) / (cc_total - cc_sentiment['negative']))
+
+    sentiment, urgency = SENTIMENT_COUNTS[source], URGENCY_COUNTS[source]
+    total = sum(sentiment.values())
+    negative_share = sentiment['negative'] / total
+    high_share = urgency['high'] / sum(urgency.values())
+    other = high_share / (lift * negative_share + (1 - negative_share))
+    return lift * other, other
+
+
+class AddressPool:
+    """Fixed set of addresses with skewed request weights, so some addresses call repeatedly"""
+
+    def __init__(self, rng, size: int):
+        numbers = rng.integers(100, 9999, size=size)
+        streets = rng.integers(0, len(STREETS), size=size)
+        self.addresses = np.array([f"{n} {STREETS[s]}" for n, s in zip(numbers, streets)], dtype=object)
+        self.streets = np.array(STREETS, dtype=object)[streets]
+        self.zip_codes = np.array(ZIP_CODES)[rng.integers(0, len(ZIP_CODES), size=size)]
+        self.districts = rng.integers(1, COUNCIL_DISTRICTS + 1, size=size)
+        self.latitudes = np.round(CENTER[0] + rng.normal(0, 0.06, size=size), 6)
+        self.longitudes = np.round(CENTER[1] + rng.normal(0, 0.08, size=size), 6)
+        weights = 1.0 / (np.arange(size) + 200.0)
+        self.p = weights / weights.sum()
+
+    def sample(self, rng, n: int):
+        return rng.choice(len(self.addresses), size=n, p=self.p)
+
+
+def _contact_entity(rng, method: str):
+    if method == 'email':
+        return {'entity': f"resident{rng.integers(1000, 9999)}@example.com", 'type': 'email'}
+    if method == 'phone':
+        return {'entity': f"502-{rng.integers(200, 999)}-{rng.integers(1000, 9999)}", 'type': 'phone'}
+    if method == 'web':
+        return {'entity': 'online portal', 'type': 'channel'}
+    return {'entity': 'cell', 'type': 'channel'}
+
+
+def generate_chunk(rng, pool: AddressPool, start: int, n: int, id_width: int = 7):
+    """(processed, raw) DataFrames for requests start .. start + n - 1"""
+    names = list(SERVICES)
+    volumes = np.array([SERVICES[s][0] for s in names], dtype=float)
+    services = np.array(names, dtype=object)[rng.choice(len(names), size=n, p=volumes / volumes.sum())]
+    sources = _choice(rng, SOURCE_COUNTS, n)
+    address_rows = pool.sample(rng, n)
+
+    sentiment = np.empty(n, dtype=object)
+    urgency = np.empty(n, dtype=object)
+    blank_description = np.zeros(n, dtype=bool)
+    for source in SOURCE_COUNTS:
+        rows = np.flatnonzero(sources == source)
+        sentiment[rows] = _choice(rng, SENTIMENT_COUNTS[source], len(rows))
+        p_negative, p_other = high_urgency_given_sentiment(source)
+        high = rng.random(len(rows)) < np.where(sentiment[rows] == 'negative', p_negative, p_other)
+        not_high = {level: count for level, count in URGENCY_COUNTS[source].items() if level != 'high'}
+        urgency[rows] = _choice(rng, not_high, len(rows))
+        urgency[rows[high]] = 'high'
+        blank_description[rows] = rng.random(len(rows)) < BLANK_DESCRIPTION_RATE[source]
+
+    scores = np.full(n, np.nan)
+    for level, (low, high) in URGENCY_SCORE_RANGES.items():
+        rows = np.flatnonzero(urgency == level)
+        scores[rows] = np.round(rng.uniform(low, high - 0.1, size=len(rows)), 1)
+
+    streets = pool.streets[address_rows]
+    template_picks = rng.random(n)
+    descriptions = []
+    for service, street, pick, blank in zip(services, streets, template_picks, blank_description):
+        volume, agency, topics, templates = SERVICES[service]
+        descriptions.append('' if blank else templates[int(pick * len(templates))].format(street=street.title(), agency=agency))
+
+    has_ner = rng.random(n) < NER_RATE
+    has_topics = rng.random(n) < TOPICS_RATE
+    has_absa = (rng.random(n) < ABSA_RATE) & ~blank_description
+    clue = (sources == '') & (rng.random(n) < CONTACT_CLUE_RATE)
+    clue_methods = _choice(rng, CONTACT_CLUES, n)
+    topic_counts = rng.integers(1, 4, size=(n, 2))
+    ner_json, topics_json, absa_json = [], [], []
+    for i in range(n):
+        _, agency, topics, _ = SERVICES[services[i]]
+        entities = []
+        if has_ner[i]:
+            entities = [{'entity': streets[i].title(), 'type': 'location'}, {'entity': agency, 'type': 'organization'}]
+            if clue[i]:
+                entities.append(_contact_entity(rng, clue_methods[i]))
+        ner_json.append(json.dumps({'entities': entities}) if has_ner[i] else '')
+        topics_json.append(json.dumps({t: {'count': int(c)} for t, c in zip(topics, topic_counts[i])})
+                           if has_topics[i] else '')
+        absa_json.append(json.dumps({'aspects': [{'aspect': topics[0], 'sentiment': sentiment[i] or 'neutral'}]})
+                         if has_absa[i] else '{}')
+
+    ids = [f"SR-{i:0{id_width}d}" for i in range(start, start + n)]
+    requested = pd.to_datetime(YEAR_START + rng.integers(0, YEAR_SECONDS, size=n), unit='s').strftime('%Y-%m-%dT%H:%M:%S')
+    processed = pd.DataFrame({
+        'service_request_id': ids,
+        'requested_datetime': requested,
+        'status_description': _choice(rng, STATUS_WEIGHTS, n),
+        'service_name': services,
+        'description': descriptions,
+        'agency_responsible': [SERVICES[s][1] for s in services],
+        'address': pool.addresses[address_rows],
+        'zip_code': pool.zip_codes[address_rows],
+        'council_district': pool.districts[address_rows],
+        'latitude': pool.latitudes[address_rows],
+        'longitude': pool.longitudes[address_rows],
+        'sentiment': sentiment,
+        'urgency_level': urgency,
+        'urgency_score': scores,
+        'ner_json': ner_json,
+        'topics_json': topics_json,
+        'absa_json': absa_json,
+    }, columns=COLUMNS)
+    raw = processed[[c for c in RAW_COLUMNS if c != 'source']].assign(source=sources)
+    return processed, raw
+
+
+def generate(rows: int, output, raw_output, seed: int = 311, chunk_rows: int = 200_000):
+    """Write `rows` synthetic requests to output (processed) and raw_output (with source)"""
+    root = np.random.default_rng(seed)
+    pool = AddressPool(root, max(1_000, rows // 3))
+    id_width = max(7, len(str(rows - 1)))
+    chunk_seeds = np.random.SeedSequence(seed).spawn((rows + chunk_rows - 1) // chunk_rows)
+    for i, start in enumerate(range(0, rows, chunk_rows)):
+        processed, raw = generate_chunk(np.random.default_rng(chunk_seeds[i]), pool, start,
+                                        min(chunk_rows, rows - start), id_width)
+        header = start == 0
+        processed.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+        raw.to_csv(raw_output, mode='w' if header else 'a', header=header, index=False)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    print(f"Generating {args.rows:,} synthetic 311 requests...")
+    generate(args.rows, args.output, args.raw_output, args.seed, args.chunk_rows)
+    print(f"✅ Wrote {args.output} and {args.raw_output}")
+    print(f"   L311_PROCESSED_CSV={args.output} L311_RAW_CSV={args.raw_output} python generate_summary_stats.py")
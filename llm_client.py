@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Async OpenRouter client for the chat assistant
+Keeps a keep-alive connection pool (opened at app startup), caps concurrent completions and enforces a
+per-request deadline so slow completions never block dashboard pages.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+from collections import Counter
+
+import httpx
+
+# Endpoint and model (override the base URL to point at fake_openrouter.py)
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "anthropic/claude-sonnet-4.5:beta")
+
+# Concurrency cap and per-request deadline (seconds, includes time queued for a slot)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+
+
+class LLMTimeout(Exception):
+    """The completion did not finish before its deadline"""
+
+
+class LLMHTTPError(Exception):
+    """OpenRouter answered with a non-200 status"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class OpenRouterClient:
+    """Pooled async client for OpenRouter chat completions"""
+
+    def __init__(self, api_key: str, base_url: str = OPENROUTER_BASE_URL, model: str = OPENROUTER_MODEL,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT_SECONDS):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client = None
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._loop = None
+        # Upstream outcomes (updated on the event loop thread only)
+        self.requests = 0
+        self.timeouts = 0
+        self.transport_errors = 0
+        self.status_codes = Counter()
+
+    def _new_client(self):
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://louisville-311-dashboard.onrender.com",
+                "X-Title": "Louisville 311 Dashboard"
+            },
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=5.0)
+        )
+
+    async def start(self):
+        """Open the keep-alive pool on the running event loop (app startup; aclose() at shutdown)"""
+        await self.aclose()
+        self._client = self._new_client()
+        self._loop = asyncio.get_running_loop()
+
+    def _slots(self):
+        """The concurrency cap, re-created if the event loop changed (e.g. under TestClient)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    @contextlib.asynccontextmanager
+    async def _connection(self):
+        """
+        The pool opened by start() when on its event loop, otherwise a client for this call only
+        A pool can't outlive its loop, so calls from other loops (asyncio.run, TestClient
+        without lifespan) close their connections before returning instead of leaking them.
+        """
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            yield self._client
+            return
+        async with self._new_client() as client:
+            yield client
+
+    async def _post_completion(self, payload: dict):
+        async with self._connection() as client, self._slots():
+            return await client.post("/chat/completions", json=payload)
+
+    async def complete(self, messages, max_tokens: int = 1024, temperature: float = 0.7, timeout: float = None):
+        """
+        Run one chat completion and return the assistant text
+        Raises LLMTimeout past the deadline and LLMHTTPError on non-200 responses
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        self.requests += 1
+        try:
+            response = await asyncio.wait_for(self._post_completion(payload), timeout or self.timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            self.timeouts += 1
+            raise LLMTimeout()
+        except httpx.HTTPError:
+            self.transport_errors += 1
+            raise
+
+        self.status_codes[response.status_code] += 1
+        if response.status_code != 200:
+            raise LLMHTTPError(response.status_code)
+        return response.json()['choices'][0]['message']['content']
+
+    async def stream(self, messages, max_tokens: int = 1024, temperature: float = 0.7, timeout: float = None):
+        """
+        Run one chat completion with stream=true, yielding text deltas as they arrive
+        The deadline covers the whole stream; errors are raised like complete()
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        slots = self._slots()
+
+        def remaining():
+            left = deadline - loop.time()
+            if left <= 0:
+                raise LLMTimeout()
+            return left
+
+        self.requests += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), remaining())
+        except (asyncio.TimeoutError, LLMTimeout):
+            self.timeouts += 1
+            raise LLMTimeout()
+        try:
+            async with self._connection() as client:
+                request = client.build_request("POST", "/chat/completions", json=payload)
+                response = await asyncio.wait_for(client.send(request, stream=True), remaining())
+                self.status_codes[response.status_code] += 1
+                try:
+                    if response.status_code != 200:
+                        raise LLMHTTPError(response.status_code)
+                    lines = response.aiter_lines()
+                    while True:
+                        try:
+                            line = await asyncio.wait_for(lines.__anext__(), remaining())
+                        except StopAsyncIteration:
+                            break
+                        # SSE framing: "data: {json}" lines, ":" comments, "data: [DONE]" at the end
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        choices = json.loads(data).get('choices') or [{}]
+                        delta = (choices[0].get('delta') or {}).get('content')
+                        if delta:
+                            yield delta
+                finally:
+                    await response.aclose()
+        except (asyncio.TimeoutError, httpx.TimeoutException, LLMTimeout):
+            self.timeouts += 1
+            raise LLMTimeout()
+        except httpx.HTTPError:
+            self.transport_errors += 1
+            raise
+        finally:
+            slots.release()
+
+    def stats(self):
+        """Upstream call counts: requests, timeouts, transport errors and responses by status code"""
+        return {
+            'requests': self.requests,
+            'timeouts': self.timeouts,
+            'transport_errors': self.transport_errors,
+            'status_codes': dict(self.status_codes)
+        }
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Prometheus text exposition for the dashboard
+Hot paths bump plain counters (one uncontended lock per increment); gauges
+and the counters other components already keep (cache hits, upstream
+status codes, rate-limit rejections, ...) are read through callbacks only
+when /metrics is scraped. Per-route request counts and latency histograms
+come from request_timing.RouteLatency.
+"""
+
+import os
+import threading
+
+# Prefix for every exported metric name
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "l311")
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def process_rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+class Metrics:
+    """Counter registry plus scrape-time collectors, rendered as text exposition format 0.0.4"""
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._meta = {}          # name -> (type, help)
+        self._values = {}        # (name, sorted label pairs) -> value
+        self._collectors = []    # (name, type, help, fn)
+        self._lock = threading.Lock()
+
+    def _name(self, name):
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def counter(self, name: str, help: str):
+        """Declare a counter updated with inc()"""
+        self._meta[self._name(name)] = ('counter', help)
+
+    def inc(self, name: str, value=1, **labels):
+        key = (self._name(name), tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def collect(self, name: str, kind: str, help: str, fn):
+        """
+        Register a metric read at scrape time
+        fn returns a number, or a list of (labels dict, number) samples.
+        """
+        self._collectors.append((self._name(name), kind, help, fn))
+
+    def value(self, name: str, **labels):
+        return self._values.get((self._name(name), tuple(sorted(labels.items()))), 0)
+
+    def render(self, route_latency=None):
+        """All metrics in the Prometheus text format"""
+        lines = []
+        with self._lock:
+            values = dict(self._values)
+        by_name = {}
+        for (name, labels), value in values.items():
+            by_name.setdefault(name, []).append((labels, value))
+        for name, (kind, help) in self._meta.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_labels(labels)} {_number(v)}" for labels, v in sorted(by_name.get(name, []))]
+
+        for name, kind, help, fn in self._collectors:
+            result = fn()
+            samples = result if isinstance(result, list) else [({}, result)]
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_labels(sorted(labels.items()))} {_number(v)}" for labels, v in samples]
+
+        if route_latency is not None:
+            lines += self._route_lines(route_latency)
+        return "\n".join(lines) + "\n"
+
+    def _route_lines(self, route_latency):
+        requests = self._name('http_requests_total')
+        lines = [f"# HELP {requests} HTTP responses by route template and status", f"# TYPE {requests} counter"]
+        for (method, route, status), n in sorted(route_latency.statuses().items()):
+            lines.append(f"{requests}{_labels([('method', method), ('route', route), ('status', status)])} {n}")
+
+        duration = self._name('http_request_duration_seconds')
+        lines += [f"# HELP {duration} Request latency by route template", f"# TYPE {duration} histogram"]
+        for method, route, buckets, counts, count, total_ms in route_latency.histograms():
+            cumulative = 0
+            for bound, n in zip(list(buckets) + [None], counts):
+                cumulative += n
+                le = '+Inf' if bound is None else repr(bound / 1000)
+                lines.append(f"{duration}_bucket{_labels([('method', method), ('route', route), ('le', le)])} {cumulative}")
+            route_labels = _labels([('method', method), ('route', route)])
+            lines.append(f"{duration}_sum{route_labels} {total_ms / 1000!r}")
+            lines.append(f"{duration}_count{route_labels} {count}")
+        return lines
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+On-demand sampling profiler for live requests
+With PROFILING=1 and PROFILE_TOKEN set, a request carrying the token (the
+X-Profile-Token header or a __profile=<token> query parameter) is profiled:
+a background thread samples the Python stacks of every busy thread (the
+event loop and the threadpool running sync route handlers) until the
+response is sent. The result is written as JSON under PROFILE_DIR, keeping
+the newest PROFILE_MAX_FILES, and listed on /admin/profiles.
+
+Sampling every thread means a request running concurrently can show up in
+the same profile; keep that in mind on a busy instance.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+PROFILING_ENABLED = os.getenv("PROFILING", "0") == "1"
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path(__file__).parent / ".profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 20))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", 0.002))
+# Sampling stops after this long (e.g. a long SSE stream), the response still completes
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 30))
+
+PROFILE_QUERY_PARAM = '__profile'
+PROFILE_HEADER = 'x-profile-token'
+
+# Leaf frames of threads that are parked rather than working
+_IDLE_LEAVES = {
+    ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'), ('queue.py', 'get'),
+    ('selectors.py', 'select'), ('base_events.py', '_run_once'), ('_base.py', 'result'),
+}
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of all other busy threads at a fixed interval"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS, max_seconds: float = PROFILE_MAX_SECONDS):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()   # root -> leaf tuple of frame labels -> samples
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + self.max_seconds
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+        self.duration = time.perf_counter() - start
+
+    def report(self, top: int = 40):
+        """Samples by function: self (leaf) and total (anywhere on the stack), plus folded stacks"""
+        self_counts, total_counts = Counter(), Counter()
+        for stack, n in self.stacks.items():
+            self_counts[stack[-1]] += n
+            for label in set(stack):
+                total_counts[label] += n
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'duration_ms': round(self.duration * 1000, 2),
+            'top_self': self_counts.most_common(top),
+            'top_total': total_counts.most_common(top),
+            'folded': [[';'.join(stack), n] for stack, n in self.stacks.most_common()]
+        }
+
+
+def authorized(token: str, expected: str = None):
+    """Constant-time check of a profile/admin token (never true when no token is configured)"""
+    expected = PROFILE_TOKEN if expected is None else expected
+    return bool(expected) and bool(token) and hmac.compare_digest(token, expected)
+
+
+class ProfileStore:
+    """Profile JSON files in one directory, pruned to the newest max_files"""
+
+    def __init__(self, directory=PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def new_name(self, method: str, path: str):
+        slug = ''.join(c if c.isalnum() else '-' for c in path.strip('/'))[:40] or 'root'
+        return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{method.lower()}-{slug}"
+
+    def save(self, name: str, profile: dict):
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.directory / f".{name}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(profile, f)
+            os.replace(tmp_path, self.directory / f"{name}.json")
+            for old in self._paths()[self.max_files:]:
+                old.unlink(missing_ok=True)
+
+    def _paths(self):
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob('*.json'), reverse=True)
+
+    def recent(self):
+        """Summaries of stored profiles, newest first"""
+        summaries = []
+        for path in self._paths():
+            try:
+                with open(path, 'r') as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            summaries.append({'name': path.stem, **{k: profile.get(k) for k in
+                              ('method', 'path', 'status', 'started', 'duration_ms', 'samples')}})
+        return summaries
+
+    def load(self, name: str):
+        """One stored profile, or None (names outside the directory are rejected)"""
+        path = self.directory / f"{name}.json"
+        if path.parent != self.directory or not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware: profiles requests that carry the admin token, one at a time"""
+
+    def __init__(self, app, store: ProfileStore = profile_store, token: str = None):
+        self.app = app
+        self.store = store
+        self.token = PROFILE_TOKEN if token is None else token
+        self._busy = threading.Lock()
+
+    def _requested(self, scope):
+        for key, value in scope.get('headers', []):
+            if key == PROFILE_HEADER.encode():
+                return authorized(value.decode('latin-1'), self.token)
+        for key, value in parse_qsl(scope.get('query_string', b'').decode('latin-1')):
+            if key == PROFILE_QUERY_PARAM:
+                return authorized(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._requested(scope) or not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        name = self.store.new_name(scope['method'], scope['path'])
+        status = [500]
+
+        async def send_with_header(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+                message = {**message, 'headers': list(message.get('headers', [])) + [(b'x-profile', name.encode())]}
+            await send(message)
+
+        started = datetime.now().isoformat(timespec='seconds')
+        profiler = SamplingProfiler().start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            # Joining the sampler and writing the file block, so keep them off the event loop
+            await asyncio.to_thread(self._finish, profiler, name, {
+                'method': scope['method'], 'path': scope['path'], 'status': status[0], 'started': started})
+
+    def _finish(self, profiler, name: str, summary: dict):
+        profiler.stop()
+        self._busy.release()
+        self.store.save(name, {**summary, **profiler.report()})
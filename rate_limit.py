@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Rate limiting for the chat assistant
+Per-session question quotas plus a per-IP sliding window. Each key keeps a
+fixed ring of time buckets and a running total, so checks and updates are
+constant time and memory per key is bounded no matter how busy the key is.
+"""
+
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# Policies (defaults match the original 20 per session / 50 per IP per hour)
+MAX_QUESTIONS_PER_SESSION = int(os.getenv("MAX_QUESTIONS_PER_SESSION", 20))
+MAX_QUESTIONS_PER_IP_PER_HOUR = int(os.getenv("MAX_QUESTIONS_PER_IP_PER_HOUR", 50))
+IP_WINDOW_SECONDS = float(os.getenv("RATE_LIMIT_IP_WINDOW_SECONDS", 3600))
+
+# Window resolution and the cap on tracked keys (~550 bytes per key at 60 buckets,
+# so the default cap bounds the IP window to about 11MB on a 512MB instance)
+RATE_LIMIT_BUCKETS = int(os.getenv("RATE_LIMIT_BUCKETS", 60))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 20_000))
+
+
+class SlidingWindowCounter:
+    """
+    Approximate sliding-window event counts per key
+    The window is split into `buckets` slots; events older than the window fall
+    out a slot at a time, so counts are exact to within one slot width.
+    Slots are a packed array('I') of 4 bytes each; with the key, its state and
+    the map entry a key costs about 300 + 4 * buckets bytes, so the worst case
+    is max_keys times that (~11MB for 20k keys at 60 buckets).
+    """
+
+    def __init__(self, window_seconds: float, buckets: int = RATE_LIMIT_BUCKETS, max_keys: int = RATE_LIMIT_MAX_KEYS,
+                 clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.bucket_width = window_seconds / buckets
+        self.max_keys = max_keys
+        self.clock = clock
+        # Key -> [counts ring, newest bucket index, total]; ordered by last update
+        self._windows = OrderedDict()
+
+    def _advance(self, state, bucket: int):
+        """Drop slots that fell out of the window (at most `buckets` steps)"""
+        counts, newest, _ = state
+        elapsed = bucket - newest
+        if elapsed <= 0:
+            return
+        if elapsed >= self.buckets:
+            state[0] = array('I', [0]) * self.buckets
+            state[2] = 0
+        else:
+            for b in range(newest + 1, bucket + 1):
+                state[2] -= counts[b % self.buckets]
+                counts[b % self.buckets] = 0
+        state[1] = bucket
+
+    def _prune(self, bucket: int):
+        """Forget least recently updated keys whose window has fully elapsed, and enforce max_keys"""
+        while self._windows:
+            key, state = next(iter(self._windows.items()))
+            if bucket - state[1] < self.buckets and len(self._windows) <= self.max_keys:
+                break
+            self._windows.popitem(last=False)
+
+    def count(self, key):
+        """Events recorded for key within the window"""
+        state = self._windows.get(key)
+        if state is None:
+            return 0
+        self._advance(state, int(self.clock() // self.bucket_width))
+        return state[2]
+
+    def add(self, key, amount: int = 1):
+        """Record events for key and return the new windowed count"""
+        bucket = int(self.clock() // self.bucket_width)
+        state = self._windows.get(key)
+        if state is None:
+            state = self._windows[key] = [array('I', [0]) * self.buckets, bucket, 0]
+        else:
+            self._advance(state, bucket)
+            self._windows.move_to_end(key)
+        state[0][bucket % self.buckets] += amount
+        state[2] += amount
+        self._prune(bucket)
+        return state[2]
+
+    def clear(self):
+        self._windows.clear()
+
+    def __len__(self):
+        return len(self._windows)
+
+
+class ChatRateLimiter:
+    """Session quota + per-IP hourly window for chat questions"""
+
+    def __init__(self, per_session: int = MAX_QUESTIONS_PER_SESSION, per_ip: int = MAX_QUESTIONS_PER_IP_PER_HOUR,
+                 ip_window_seconds: float = IP_WINDOW_SECONDS, max_keys: int = RATE_LIMIT_MAX_KEYS,
+                 clock=time.monotonic):
+        self.per_session = per_session
+        self.per_ip = per_ip
+        self.max_keys = max_keys
+        self.ip_window = SlidingWindowCounter(ip_window_seconds, max_keys=max_keys, clock=clock)
+        self.rejected = 0
+        self.rejections = {'session': 0, 'ip': 0}
+        # Session id -> questions asked, ordered by last question (oldest evicted past max_keys)
+        self._session_counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, session_id: str, ip_address: str):
+        """
+        Check if a question is allowed
+        Returns: (is_allowed: bool, remaining_questions: int, error_message: str)
+        """
+        with self._lock:
+            session_count = self._session_counts.get(session_id, 0)
+            if session_count >= self.per_session:
+                self.rejected += 1
+                self.rejections['session'] += 1
+                return False, 0, f"You've reached the limit of {self.per_session} questions per session. Please clear your chat to start a new session."
+
+            ip_count = self.ip_window.count(ip_address)
+            if ip_count >= self.per_ip:
+                self.rejected += 1
+                self.rejections['ip'] += 1
+                return False, 0, f"You've reached the limit of {self.per_ip} questions per hour. Please try again later."
+
+            return True, min(self.per_session - session_count, self.per_ip - ip_count), ""
+
+    def record(self, session_id: str, ip_address: str):
+        """Count one question against both limits"""
+        with self._lock:
+            self._session_counts[session_id] = self._session_counts.get(session_id, 0) + 1
+            self._session_counts.move_to_end(session_id)
+            while len(self._session_counts) > self.max_keys:
+                self._session_counts.popitem(last=False)
+            self.ip_window.add(ip_address)
+
+    def reset_session(self, session_id: str):
+        """Forget a session's question count (chat cleared or session expired)"""
+        with self._lock:
+            self._session_counts.pop(session_id, None)
+
+    def stats(self):
+        return {
+            'sessions': len(self._session_counts),
+            'ips': len(self.ip_window),
+            'rejected': self.rejected,
+            'rejections': dict(self.rejections),
+            'per_session': self.per_session,
+            'per_ip': self.per_ip,
+            'ip_window_seconds': self.ip_window.window_seconds
+        }
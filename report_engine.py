@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Single-pass report engine for the call center analysis scripts
+Computes every metric printed by generate_summary_stats.py, nsr_deep_dive.py
+and call_center_bottleneck_analysis.py from one grouped pass over the call
+center rows and writes them to one JSON artifact. The scripts render their
+text reports from that artifact, and the dashboard's Call Center page reads it.
+
+    python report_engine.py                                           # cached merged frame
+    python report_engine.py --stream --chunk-rows 100000 --workers 8  # bounded memory, chunks in 8 processes
+"""
+
+import json
+import os
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from address_index import RepeatCallIndex
+from analysis_data import (
+    PROCESSED_CSV, RAW_CSV, NLP_CHUNK_ROWS, SourceLookup, load_merged, load_nlp_tables, stream_merged,
+    aggregate_chunks, is_call_center, infer_sources, parse_args
+)
+
+CURRENT_DIR = Path(__file__).parent
+REPORT_PATH = Path(os.getenv("L311_REPORT_PATH", CURRENT_DIR / "call_center_report.json"))
+
+# Bump when the artifact layout changes
+REPORT_FORMAT_VERSION = 1
+
+WASTE_SERVICES = [
+    'Solid Waste Container Request',
+    'Solid Waste Missed Services',
+    'Large Item Appointment',
+    'Trash',
+    'Solid Waste Violation'
+]
+
+# Grouping keys for the call center cube; missing values are stored as ''
+CUBE_KEYS = ['service_name', 'agency_responsible', 'urgency_level', 'sentiment', 'description']
+
+NSR_DETAIL_CATEGORIES = 6
+NSR_SAMPLE_DESCRIPTIONS = 20
+TOP_REPEAT_PATTERNS = 15
+
+
+def ranked(counts, limit=None, exclude=('',)):
+    """[[key, count], ...] largest first, ties by key, skipping missing keys"""
+    items = sorted(((k, int(n)) for k, n in counts.items() if k not in exclude and n),
+                   key=lambda item: (-item[1], str(item[0])))
+    return [list(item) for item in items[:limit]]
+
+
+def description_state(description):
+    """'short' (missing or under 20 chars), 'blank' (longer but only whitespace) or 'ok'"""
+    short = description.isna() | (description.str.len() < 20)
+    blank = ~short & (description.str.strip() == '')
+    return np.select([short, blank], ['short', 'blank'], 'ok')
+
+
+class CallCenterReport:
+    """
+    Running aggregates behind the call center report
+    update() folds in a slice of the merged frame (with its topic and entity
+    rows); finalize() derives every report metric from the aggregates. One
+    update() with the whole frame is the batch mode. merge() folds in a
+    partial report built from a later chunk, e.g. in a worker process.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.blank_source = 0
+        self.inferred_sources = Counter()
+        self.cube = Counter()                     # CUBE_KEYS tuple -> call center requests
+        self.topics = Counter()                   # topic -> summed count over call center rows
+        self.nsr_topics = defaultdict(Counter)    # NSR category -> topic -> requests mentioning it
+        self.repeat = RepeatCallIndex()           # (address, service_name) -> call center requests
+        self.metro_with_description = 0
+        self.metro_samples = []
+
+    def update(self, frame, topics, entities):
+        self.requests += len(frame)
+
+        source = frame['source']
+        blank_source = source.isna() | (source == '')
+        self.blank_source += int(blank_source.sum())
+        for clue, n in infer_sources(entities, frame.index[blank_source]).value_counts().items():
+            self.inferred_sources[clue] += int(n)
+
+        cc = frame[is_call_center(source)]
+        if cc.empty:
+            return
+
+        # One grouped pass: request counts per service/agency/urgency/sentiment/description state
+        keys = cc[CUBE_KEYS[:-1]].astype(object).fillna('').assign(description=description_state(cc['description']))
+        for key, n in keys.groupby(CUBE_KEYS, sort=False).size().items():
+            self.cube[key] += int(n)
+
+        cc_topics = topics[topics.index.isin(cc.index)]
+        for topic, n in cc_topics.groupby('topic', sort=False)['count'].sum().items():
+            self.topics[topic] += int(n)
+
+        nsr = cc[cc['service_name'].str.contains('NSR', na=False)]
+        nsr_topics = topics.join(nsr[['service_name']], how='inner')
+        for (category, topic), n in nsr_topics.groupby(['service_name', 'topic'], sort=False).size().items():
+            self.nsr_topics[category][topic] += int(n)
+
+        self.repeat.add(cc['address'], cc['service_name'])
+
+        metro = nsr[nsr['service_name'] == 'NSR Metro Agencies']
+        described = metro[metro['description'].notna() & (metro['description'].str.len() > 10)]
+        self.metro_with_description += len(described)
+        for label, text in described['description'].head(NSR_SAMPLE_DESCRIPTIONS - len(self.metro_samples)).items():
+            self.metro_samples.append([int(label) + 1, text[:150]])
+
+    def merge(self, other):
+        """Add another report's aggregates (partials must be merged in chunk order)"""
+        self.requests += other.requests
+        self.blank_source += other.blank_source
+        self.inferred_sources.update(other.inferred_sources)
+        self.cube.update(other.cube)
+        self.topics.update(other.topics)
+        for category, topics in other.nsr_topics.items():
+            self.nsr_topics[category].update(topics)
+        self.repeat.merge(other.repeat)
+        self.metro_with_description += other.metro_with_description
+        self.metro_samples.extend(other.metro_samples[:NSR_SAMPLE_DESCRIPTIONS - len(self.metro_samples)])
+        return self
+
+    def finalize(self, processed_rows=None, raw_rows=None, sources=None):
+        """The report artifact as a JSON-ready dict"""
+        cube = pd.DataFrame([key + (n,) for key, n in self.cube.items()], columns=CUBE_KEYS + ['n'])
+        if cube.empty:
+            cube = pd.DataFrame({column: pd.Series(dtype=object) for column in CUBE_KEYS} | {'n': pd.Series(dtype=int)})
+
+        def counts(rows, by):
+            return rows.groupby(by, sort=False)['n'].sum()
+
+        def levels(rows, by, names):
+            totals = counts(rows, by)
+            return {name: int(totals.get(name, 0)) for name in names}
+
+        low_medium = cube[cube['urgency_level'].isin(['low', 'medium'])]
+        routine = low_medium[low_medium['sentiment'] == 'neutral']
+        high = cube[cube['urgency_level'] == 'high']
+        negative = cube[cube['sentiment'] == 'negative']
+        bottleneck = high[high['sentiment'] == 'negative']
+        short = cube[cube['description'] == 'short']
+        minimal = cube[cube['description'] != 'ok']
+        nsr = cube[cube['service_name'].str.contains('NSR', regex=False)]
+        services = counts(cube, 'service_name')
+
+        urgency = levels(cube, 'urgency_level', ['high', 'medium', 'low'])
+        urgency['blank'] = int(counts(cube, 'urgency_level').get('', 0))
+        sentiment = levels(cube, 'sentiment', ['negative', 'neutral', 'positive'])
+        sentiment['blank'] = int(counts(cube, 'sentiment').get('', 0))
+
+        low_medium_services = []
+        for service, n in ranked(counts(low_medium, 'service_name')):
+            breakdown = counts(low_medium[low_medium['service_name'] == service], 'urgency_level')
+            low_medium_services.append([service, n, dict(ranked(breakdown))])
+
+        repeat = self.repeat.summary(TOP_REPEAT_PATTERNS)
+
+        nsr_categories = ranked(counts(nsr, 'service_name'))
+        nsr_details = {}
+        for category, n in nsr_categories[:NSR_DETAIL_CATEGORIES]:
+            rows = nsr[nsr['service_name'] == category]
+            nsr_details[category] = {
+                'requests': n,
+                'topics': ranked(self.nsr_topics.get(category, {}), 10),
+                'agencies': ranked(counts(rows, 'agency_responsible'), 10),
+                'urgency': levels(rows, 'urgency_level', ['high', 'medium', 'low']),
+                'sentiment': levels(rows, 'sentiment', ['negative', 'neutral', 'positive'])
+            }
+
+        return {
+            'format': REPORT_FORMAT_VERSION,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'sources': sources or {},
+            'totals': {
+                'requests': self.requests,
+                'processed_rows': self.requests if processed_rows is None else processed_rows,
+                'raw_rows': raw_rows,
+                'blank_source': self.blank_source,
+                'call_center': int(cube['n'].sum())
+            },
+            'inferred_sources': ranked(self.inferred_sources),
+            'call_center': {
+                'urgency': urgency,
+                'sentiment': sentiment,
+                'segments': {
+                    'nsr': int(nsr['n'].sum()),
+                    'low_medium_urgency': int(low_medium['n'].sum()),
+                    'routine': int(routine['n'].sum()),
+                    'high_urgency': int(high['n'].sum()),
+                    'negative': int(negative['n'].sum()),
+                    'bottleneck': int(bottleneck['n'].sum()),
+                    'empty_description': int(short['n'].sum()),
+                    'minimal_description': int(minimal['n'].sum())
+                },
+                'services': ranked(services),
+                'agencies': ranked(counts(cube, 'agency_responsible')),
+                'topics': ranked(self.topics, 50),
+                'segment_services': {
+                    'high_urgency': ranked(counts(high, 'service_name'), 20),
+                    'negative': ranked(counts(negative, 'service_name'), 20),
+                    'bottleneck': ranked(counts(bottleneck, 'service_name'), 20),
+                    'low_medium_urgency': low_medium_services[:20],
+                    'routine': ranked(counts(routine, 'service_name'), 20),
+                    'minimal_description': ranked(counts(minimal, 'service_name'), 20)
+                },
+                'bottleneck_agencies': ranked(counts(bottleneck, 'agency_responsible'), 20),
+                'waste': {
+                    'total': int(sum(services.get(s, 0) for s in WASTE_SERVICES)),
+                    'services': {s: int(services.get(s, 0)) for s in WASTE_SERVICES}
+                },
+                'repeat': {
+                    'pairs': repeat['pairs'],
+                    'calls': repeat['calls'],
+                    'top_patterns': repeat['top_patterns'],
+                    'services': repeat['services'][:20]
+                }
+            },
+            'nsr': {
+                'categories': nsr_categories,
+                'metro_agencies': {
+                    'requests': int(services.get('NSR Metro Agencies', 0)),
+                    'with_description': self.metro_with_description,
+                    'samples': self.metro_samples
+                },
+                'details': nsr_details
+            }
+        }
+
+
+def build_report(processed_csv=PROCESSED_CSV, raw_csv=RAW_CSV, cache_dir=None):
+    """Report for the cached merged frame (batch mode: one update over all rows)"""
+    merged_df = load_merged(processed_csv, raw_csv, cache_dir=cache_dir)
+    topics_df, entities_df = load_nlp_tables(processed_csv, raw_csv, cache_dir=cache_dir)
+    report = CallCenterReport()
+    report.update(merged_df, topics_df, entities_df)
+    return report.finalize(merged_df.attrs.get('processed_rows'), merged_df.attrs.get('raw_rows'),
+                           sources={'processed': str(processed_csv), 'raw': str(raw_csv)})
+
+
+def stream_report(processed_csv=PROCESSED_CSV, raw_csv=RAW_CSV, workers: int = 1, chunk_rows=NLP_CHUNK_ROWS):
+    """
+    Same report as build_report(), read chunk by chunk (see stream_merged)
+    Memory is bounded by the chunk size plus the aggregates, which grow with
+    distinct keys (services, topics, address/service pairs), not with rows.
+    With workers > 1 each chunk is decoded and aggregated in a worker process
+    and the partial reports are merged in chunk order.
+    """
+    lookup = SourceLookup.from_csv(raw_csv, chunk_rows)
+    report = CallCenterReport()
+    if workers > 1:
+        for partial in aggregate_chunks(chunk_report, processed_csv, raw_csv, chunk_rows, workers, lookup=lookup):
+            report.merge(partial)
+    else:
+        for frame, topics_df, entities_df in stream_merged(processed_csv, raw_csv, chunk_rows, lookup=lookup):
+            report.update(frame, topics_df, entities_df)
+    return report.finalize(report.requests, lookup.rows,
+                           sources={'processed': str(processed_csv), 'raw': str(raw_csv)})
+
+
+def chunk_report(frame, topics, entities):
+    """Partial report for one chunk (runs in aggregate_chunks' worker processes)"""
+    report = CallCenterReport()
+    report.update(frame, topics, entities)
+    return report
+
+
+def make_report(args):
+    """Report for the command line options: streamed with --stream, else from the cached merged frame"""
+    if args.stream:
+        return stream_report(workers=args.workers, chunk_rows=args.chunk_rows)
+    return build_report()
+
+
+def write_report(report, path=REPORT_PATH):
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_report(path=REPORT_PATH):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_report(args):
+    """Report for a script run: read --report if given, else build it from the CSVs and save the artifact"""
+    if args.report:
+        return read_report(args.report)
+    report = make_report(args)
+    write_report(report)
+    return report
+
+
+if __name__ == '__main__':
+    args = parse_args("Build the call center report artifact")
+    report = make_report(args)
+    write_report(report, args.report or REPORT_PATH)
+    print(f"Wrote {args.report or REPORT_PATH}: {report['totals']['call_center']:,} call center requests "
+          f"of {report['totals']['requests']:,}")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Per-request timing spans and per-route latency histograms
+With SERVER_TIMING=1 every response carries a Server-Timing header listing
+the named spans recorded while handling it (stats, chart:<id>, llm, ...),
+plus `handler` (route function), `render` (FT -> HTML) and `total`. When
+disabled that middleware is not installed and span() returns a shared
+no-op context manager, so instrumented code pays one ContextVar lookup.
+
+Request counts by status and latency per route template are kept in
+fixed-bucket histograms by RouteLatencyMiddleware (on unless
+ROUTE_METRICS=0) for /api/timing and /metrics.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "0") == "1"
+ROUTE_METRICS_ENABLED = os.getenv("ROUTE_METRICS", "1") == "1"
+
+# Histogram bucket upper bounds (milliseconds); the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Spans recorded for one request"""
+
+    __slots__ = ('start', 'spans', 'handler_start', 'render_start')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []
+        self.handler_start = None
+        self.render_start = None
+
+    def add(self, name: str, seconds: float):
+        self.spans.append((name, seconds))
+
+    def header(self, total: float):
+        """Server-Timing header value (durations in ms)"""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+class _Span:
+    __slots__ = ('name', 'timing', 'start')
+
+    def __init__(self, name, timing):
+        self.name = name
+        self.timing = timing
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """Context manager timing a named span of the current request (no-op outside a timed request)"""
+    timing = _current.get()
+    return _NO_SPAN if timing is None else _Span(name, timing)
+
+
+def handler_started(req):
+    """FastHTML `before` hook: the route function is about to run"""
+    timing = _current.get()
+    if timing is not None:
+        timing.handler_start = time.perf_counter()
+
+
+def handler_finished(req, resp):
+    """FastHTML `after` hook: the route function returned, rendering starts"""
+    timing = _current.get()
+    if timing is not None and timing.handler_start is not None:
+        timing.render_start = time.perf_counter()
+        timing.add('handler', timing.render_start - timing.handler_start)
+
+
+class LatencyHistogram:
+    """Request count, total time and fixed-bucket latency counts for one route"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def quantile(self, q: float):
+        """Upper bound of the bucket holding the q-th quantile (None when empty or past the last bound)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts))
+        }
+
+
+class RouteLatency:
+    """LatencyHistogram per (method, route template) and response counts per status"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._statuses = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, ms: float, status: int = 200):
+        with self._lock:
+            histogram = self._histograms.get((method, route))
+            if histogram is None:
+                histogram = self._histograms[(method, route)] = LatencyHistogram()
+            histogram.observe(ms)
+            key = (method, route, status)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {f"{method} {route}": h.snapshot() for (method, route), h in sorted(self._histograms.items())}
+
+    def histograms(self):
+        """[(method, route, buckets, counts, count, total_ms)] copied under the lock"""
+        with self._lock:
+            return [(method, route, h.buckets, list(h.counts), h.count, h.total_ms)
+                    for (method, route), h in sorted(self._histograms.items())]
+
+    def statuses(self):
+        """{(method, route, status): responses}"""
+        with self._lock:
+            return dict(self._statuses)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._statuses.clear()
+
+
+route_latency = RouteLatency()
+
+
+def route_template(scope):
+    """Path template of the matched route (`/chat/stream/{stream_id}`); unmatched paths share one label"""
+    return getattr(scope.get('route'), 'path', None) or '<unmatched>'
+
+
+class RouteLatencyMiddleware:
+    """ASGI middleware: records latency and response status per route template"""
+
+    def __init__(self, app, latency: RouteLatency = route_latency):
+        self.app = app
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.latency.observe(scope['method'], route_template(scope), (time.perf_counter() - start) * 1000, status[0])
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware: opens a RequestTiming per HTTP request and adds the Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+
+        async def send_with_header(message):
+            if message['type'] == 'http.response.start':
+                now = time.perf_counter()
+                if timing.render_start is not None:
+                    timing.add('render', now - timing.render_start)
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', timing.header(now - timing.start).encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+In-memory chat session store
+Holds the recent message history per chat session with an idle TTL, a cap on
+live sessions and a cap on total stored message bytes. Sessions are kept in
+last-activity order, so expiry and capacity eviction only ever look at the
+oldest entries (amortized O(1) per request, no full scans).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Idle lifetime and hard caps (sized for a 512MB instance)
+SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", 3600))
+SESSION_MAX_SESSIONS = int(os.getenv("CHAT_SESSION_MAX_SESSIONS", 5000))
+SESSION_MAX_BYTES = int(os.getenv("CHAT_SESSION_MAX_BYTES", 32 * 1024 * 1024))
+
+# Messages kept per session (last 10 exchanges)
+SESSION_MAX_MESSAGES = 20
+
+
+def message_bytes(message: dict):
+    return len(message['content'].encode('utf-8'))
+
+
+class _Session:
+    __slots__ = ('messages', 'bytes', 'last_active')
+
+    def __init__(self, now: float):
+        self.messages = deque()
+        self.bytes = 0
+        self.last_active = now
+
+
+class SessionStore:
+    """
+    TTL + capacity bounded map of session id -> message history
+    With one idle TTL for every session, last-activity order is also expiry
+    order: the oldest entry is always the next to expire, so the ordered map
+    doubles as the expiry queue. on_evict(session_id, reason) is called for
+    every eviction, with reason 'expired', 'sessions' or 'bytes'.
+    """
+
+    def __init__(self, ttl_seconds: float = SESSION_TTL_SECONDS, max_sessions: int = SESSION_MAX_SESSIONS,
+                 max_bytes: int = SESSION_MAX_BYTES, max_messages: int = SESSION_MAX_MESSAGES,
+                 on_evict=None, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.on_evict = on_evict
+        self.clock = clock
+        self.total_bytes = 0
+        self.evictions = {'expired': 0, 'sessions': 0, 'bytes': 0}
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _drop(self, session_id: str, reason: str):
+        session = self._sessions.pop(session_id)
+        self.total_bytes -= session.bytes
+        self.evictions[reason] += 1
+        if self.on_evict is not None:
+            self.on_evict(session_id, reason)
+
+    def _expire(self, now: float):
+        """Evict idle sessions from the old end until the oldest is still live"""
+        cutoff = now - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_active > cutoff:
+                break
+            self._drop(session_id, 'expired')
+
+    def _enforce_caps(self, keep: str):
+        """Evict least recently active sessions (never `keep`) past the session and byte caps"""
+        while len(self._sessions) > self.max_sessions:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest, 'sessions')
+        while self.total_bytes > self.max_bytes and len(self._sessions) > 1:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest, 'bytes')
+
+    def _touch(self, session_id: str, now: float):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(now)
+        else:
+            session.last_active = now
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def touch(self, session_id: str):
+        """Mark a session active (creating it), expiring idle sessions first"""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            self._touch(session_id, now)
+            self._enforce_caps(session_id)
+
+    def history(self, session_id: str):
+        """Copy of the session's messages, oldest first (empty when unknown or expired)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.last_active <= self.clock() - self.ttl_seconds:
+                return []
+            return list(session.messages)
+
+    def append(self, session_id: str, *messages: dict):
+        """Append messages, dropping the session's oldest past max_messages"""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            session = self._touch(session_id, now)
+            for message in messages:
+                size = message_bytes(message)
+                session.messages.append(message)
+                session.bytes += size
+                self.total_bytes += size
+                while len(session.messages) > self.max_messages:
+                    size = message_bytes(session.messages.popleft())
+                    session.bytes -= size
+                    self.total_bytes -= size
+            self._enforce_caps(session_id)
+
+    def clear(self, session_id: str):
+        """Forget a session's messages (the session itself stays live)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self.total_bytes -= session.bytes
+                session.messages.clear()
+                session.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            self._expire(self.clock())
+            return {
+                'live_sessions': len(self._sessions),
+                'total_bytes': self.total_bytes,
+                'max_sessions': self.max_sessions,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'evictions': dict(self.evictions)
+            }
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
@@ -17,6 +17,27 @@ def test_client():
     return TestClient(dashboard_app.app)
 
 
+@pytest.fixture
+def fake_openrouter():
+    """Local stand-in for the OpenRouter API"""
+    from fake_openrouter import FakeOpenRouter
+    with FakeOpenRouter() as server:
+        yield server
+
+
+@pytest.fixture
+def chat_client(test_client, fake_openrouter, monkeypatch):
+    """Test client with chat enabled against the fake OpenRouter server"""
+    import dashboard_app
+    from llm_client import OpenRouterClient
+    monkeypatch.setattr(dashboard_app, "CHAT_ENABLED", True)
+    monkeypatch.setattr(dashboard_app, "CHAT_STREAMING", False)
+    monkeypatch.setattr(dashboard_app.approved_answers, "min_score", 2.0)
+    dashboard_app.response_cache.clear()
+    monkeypatch.setattr(dashboard_app, "llm_client", OpenRouterClient("test-key", base_url=fake_openrouter.base_url))
+    return test_client
+
+
 @pytest.fixture(scope="module")
 def sample_data():
     """Load sample data for testing"""
@@ -32,6 +53,16 @@ def topic_data():
         return json.load(f)
 
 
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    """Synthetic processed + raw extracts (generate_synthetic_data.py)"""
+    from generate_synthetic_data import generate
+    directory = tmp_path_factory.mktemp("synthetic")
+    processed, raw = directory / "processed.csv", directory / "raw.csv"
+    generate(20_000, processed, raw, seed=7, chunk_rows=6_000)
+    return processed, raw
+
+
 class TestDataLoading:
     """Test that data files exist and load correctly"""
 
@@ -226,6 +257,22 @@ class TestCallCenterPageContent:
         response = test_client.get("/call-center")
         assert "Business Opportunity" in response.text
 
+    def test_figures_from_report(self, test_client, monkeypatch):
+        """Test page figures come from the report artifact when one is loaded"""
+        import dashboard_app
+        report = {
+            'totals': {'requests': 1000, 'call_center': 400},
+            'call_center': {'segments': {'nsr': 200, 'low_medium_urgency': 300, 'bottleneck': 40,
+                                         'minimal_description': 100},
+                            'waste': {'total': 50}},
+            'nsr': {'categories': [['NSR Metro Agencies', 120], ['NSR Social Services', 30]]}
+        }
+        monkeypatch.setattr(dashboard_app, "CALL_CENTER_REPORT", report)
+        response = test_client.get("/call-center")
+        assert "400 calls/year (40.0% of all requests)" in response.text
+        assert "120 calls/year (30.0%)" in response.text
+        assert "Focus agents on 40 truly urgent calls" in response.text
+
 
 class TestBusinessPageContent:
     """Test business page contains expected content"""
@@ -285,6 +332,1216 @@ class TestDataAnalytics:
         assert isinstance(critical, pd.DataFrame)
 
 
+class TestDataCache:
+    """Test the on-disk CSV cache used at startup"""
+
+    def test_cache_roundtrip_keeps_categoricals(self, tmp_path):
+        """Test cached load returns the same frame with categorical columns"""
+        from data_cache import read_csv_cached
+        csv_path = tmp_path / "data.csv"
+        pd.DataFrame({'sentiment': ['negative', 'neutral', 'negative'], 'score': [1, 2, 3]}).to_csv(csv_path, index=False)
+
+        first = read_csv_cached(csv_path, categorical_columns=['sentiment'], cache_dir=tmp_path / "cache")
+        second = read_csv_cached(csv_path, categorical_columns=['sentiment'], cache_dir=tmp_path / "cache")
+
+        assert isinstance(first['sentiment'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(first, second)
+        assert list((tmp_path / "cache").glob("*.pkl")), "Cache file was not written"
+
+    def test_cache_reparses_changed_csv(self, tmp_path):
+        """Test a modified CSV is re-parsed instead of served from cache"""
+        import os
+        from data_cache import read_csv_cached
+        csv_path = tmp_path / "data.csv"
+        pd.DataFrame({'sentiment': ['negative']}).to_csv(csv_path, index=False)
+        read_csv_cached(csv_path, cache_dir=tmp_path / "cache")
+
+        pd.DataFrame({'sentiment': ['negative', 'positive']}).to_csv(csv_path, index=False)
+        stat = csv_path.stat()
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert len(read_csv_cached(csv_path, cache_dir=tmp_path / "cache")) == 2
+
+    def test_dashboard_uses_categoricals(self):
+        """Test the dashboard frame stores low-cardinality columns as categoricals"""
+        import dashboard_app
+        for col in dashboard_app.CATEGORICAL_COLUMNS:
+            assert isinstance(dashboard_app.df[col].dtype, pd.CategoricalDtype), f"{col} is not categorical"
+
+
+class TestAggregates:
+    """Test the precomputed aggregate cube matches direct counts"""
+
+    def test_summary_stats_match_value_counts(self):
+        """Test summary stats read from the cube equal value_counts on df"""
+        import dashboard_app
+        df = dashboard_app.df
+        stats = dashboard_app.get_summary_stats()
+
+        assert stats['total'] == len(df)
+        assert stats['sentiment'] == df['sentiment'].value_counts()[lambda s: s > 0].to_dict()
+        assert stats['urgency'] == df['urgency_level'].value_counts()[lambda s: s > 0].to_dict()
+        assert set(stats['services'].values()) <= set(df['service_name'].value_counts().to_dict().values())
+
+    def test_critical_count(self):
+        """Test critical count equals high urgency + negative sentiment rows"""
+        import dashboard_app
+        df = dashboard_app.df
+        expected = ((df['urgency_level'] == 'high') & (df['sentiment'] == 'negative')).sum()
+        assert dashboard_app.AGGREGATES['critical'] == expected
+
+    def test_service_breakdown(self):
+        """Test per-service sentiment breakdown equals a direct filter"""
+        import dashboard_app
+        df = dashboard_app.df
+        service = next(iter(dashboard_app.get_summary_stats()['services']))
+        expected = df[df['service_name'] == service]['sentiment'].value_counts()
+        breakdown = dashboard_app.service_breakdown('sentiment_by_service', service)
+        for sentiment, count in expected.items():
+            assert breakdown.get(sentiment, 0) == count
+
+
+class TestChartCache:
+    """Test the rendered-chart fragment cache"""
+
+    def test_homepage_charts_cached(self, test_client):
+        """Test repeated homepage hits are served from the chart cache"""
+        import dashboard_app
+        test_client.get("/")
+        hits_before = dashboard_app.chart_cache.hits
+        response = test_client.get("/")
+        assert 'id="sentiment-pie"' in response.text
+        assert dashboard_app.chart_cache.hits >= hits_before + 4
+
+    def test_lru_eviction_respects_byte_limit(self):
+        """Test least recently used charts are evicted past max_bytes"""
+        import dashboard_app
+        cache = dashboard_app.ChartCache(max_bytes=25)
+        cache.get_or_render('a', lambda: 'a' * 10)
+        cache.get_or_render('b', lambda: 'b' * 10)
+        cache.get_or_render('a', lambda: 'unused')
+        cache.get_or_render('c', lambda: 'c' * 10)
+
+        assert cache.total_bytes <= 25
+        assert cache.get_or_render('a', lambda: 'miss') == 'a' * 10
+        assert cache.get_or_render('b', lambda: 'miss') == 'miss'
+
+    def test_reload_invalidates_charts(self, test_client):
+        """Test reloading the data clears cached charts"""
+        import dashboard_app
+        test_client.get("/")
+        assert len(dashboard_app.chart_cache) > 0
+        dashboard_app.reload_data()
+        assert len(dashboard_app.chart_cache) == 0
+        assert test_client.get("/").status_code == 200
+
+    def test_changed_data_files_trigger_reload(self, test_client, monkeypatch):
+        """Test a request after the data files change reloads them in the background, checking at most once per interval"""
+        import dashboard_app
+        test_client.get("/")
+        assert dashboard_app.check_data_files in dashboard_app.app.before
+        monkeypatch.setattr(dashboard_app, "DATASET_VERSION", "stale")
+        monkeypatch.setitem(dashboard_app._data_reload, 'checked', float('-inf'))
+        monkeypatch.setitem(dashboard_app._data_reload, 'thread', None)
+
+        assert test_client.get("/").status_code == 200
+        dashboard_app._data_reload['thread'].join(timeout=30)
+        assert dashboard_app.DATASET_VERSION == dashboard_app.get_dataset_version()
+
+        dashboard_app.DATASET_VERSION = "stale-again"
+        test_client.get("/")
+        assert dashboard_app.DATASET_VERSION == "stale-again"
+
+
+class TestServerTiming:
+    """Test Server-Timing spans and per-route latency histograms"""
+
+    @pytest.fixture
+    def timed_client(self, test_client, monkeypatch):
+        import dashboard_app
+        from request_timing import (
+            RouteLatency, RouteLatencyMiddleware, ServerTimingMiddleware, handler_started, handler_finished
+        )
+        monkeypatch.setattr(dashboard_app.app, "before", dashboard_app.app.before + [handler_started])
+        monkeypatch.setattr(dashboard_app.app, "after", dashboard_app.app.after + [handler_finished])
+        latency = RouteLatency()
+        return TestClient(RouteLatencyMiddleware(ServerTimingMiddleware(dashboard_app.app), latency)), latency
+
+    def test_header_lists_spans(self, timed_client):
+        """Test a page response names its stats, chart, handler and render spans"""
+        client, _ = timed_client
+        header = client.get("/").headers['server-timing']
+        names = [part.split(';')[0] for part in header.split(', ')]
+        assert {'stats', 'chart:sentiment-pie', 'handler', 'render', 'total'} <= set(names)
+        assert all(';dur=' in part for part in header.split(', '))
+
+    def test_histograms_keyed_by_route_template(self, timed_client):
+        """Test latency is grouped by route template, with unmatched paths under one label"""
+        client, latency = timed_client
+        client.get("/chat/stream/abc")
+        client.get("/chat/stream/def")
+        client.get("/no/such/page")
+        client.get("/another/missing")
+        routes = latency.snapshot()
+        assert routes['GET /chat/stream/{stream_id}']['count'] == 2
+        assert routes['GET <unmatched>']['count'] == 2
+        assert routes['GET /chat/stream/{stream_id}']['p50_ms'] is not None
+        assert latency.statuses()[('GET', '<unmatched>', 404)] == 2
+        # Route metrics are on by default (ROUTE_METRICS), independent of SERVER_TIMING
+        assert client.get("/api/timing").json()['enabled'] is True
+
+    def test_spans_are_noops_outside_requests(self):
+        """Test span() does nothing without an active timed request"""
+        from request_timing import span
+        with span('stats') as first, span('render') as second:
+            assert first is second
+
+    def test_histogram_quantiles(self):
+        """Test quantiles report the upper bound of the covering bucket"""
+        from request_timing import LatencyHistogram
+        histogram = LatencyHistogram(buckets=(1, 10, 100))
+        for ms in [0.5] * 90 + [50] * 9 + [500]:
+            histogram.observe(ms)
+        assert (histogram.quantile(0.5), histogram.quantile(0.95), histogram.quantile(0.999)) == (1, 100, None)
+
+
+class TestMetrics:
+    """Test the Prometheus text exposition"""
+
+    def test_counters_and_collectors(self):
+        """Test declared counters, labelled samples and scrape-time gauges render in text format"""
+        from metrics import Metrics
+        registry = Metrics(namespace='t')
+        registry.counter('questions_total', "Questions")
+        registry.inc('questions_total', outcome='llm')
+        registry.inc('questions_total', 2, outcome='llm')
+        registry.inc('questions_total', outcome='say "hi"')
+        registry.collect('sessions', 'gauge', "Sessions", lambda: 7)
+        registry.collect('responses_total', 'counter', "Responses", lambda: [({'status': 200}, 5), ({'status': 502}, 1)])
+        text = registry.render()
+        assert '# TYPE t_questions_total counter' in text
+        assert 't_questions_total{outcome="llm"} 3' in text
+        assert 't_questions_total{outcome="say \\"hi\\""} 1' in text
+        assert '# TYPE t_sessions gauge\nt_sessions 7' in text
+        assert 't_responses_total{status="502"} 1' in text
+
+    def test_route_histograms(self):
+        """Test route latency renders as cumulative histogram buckets in seconds"""
+        from metrics import Metrics
+        from request_timing import LATENCY_BUCKETS_MS, RouteLatency
+        latency = RouteLatency()
+        for ms in (0.5, 3, 3, 2000):
+            latency.observe('GET', '/', ms, 200)
+        text = Metrics(namespace='t').render(latency)
+        assert 't_http_requests_total{method="GET",route="/",status="200"} 4' in text
+        assert 't_http_request_duration_seconds_bucket{method="GET",route="/",le="0.001"} 1' in text
+        assert 't_http_request_duration_seconds_bucket{method="GET",route="/",le="0.005"} 3' in text
+        assert 't_http_request_duration_seconds_bucket{method="GET",route="/",le="+Inf"} 4' in text
+        assert 't_http_request_duration_seconds_count{method="GET",route="/"} 4' in text
+        assert text.count('_bucket{') == len(LATENCY_BUCKETS_MS) + 1
+
+    def test_metrics_endpoint(self, test_client):
+        """Test /metrics exposes route, chat, memory and dataset metrics"""
+        import dashboard_app
+        test_client.get("/")
+        response = test_client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('text/plain')
+        text = response.text
+        assert 'l311_http_requests_total{method="GET",route="/",status="200"}' in text
+        assert f"l311_dataset_rows {len(dashboard_app.df)}" in text
+        assert 'l311_chat_sessions ' in text and 'l311_llm_timeouts_total ' in text
+        rss = next(line for line in text.splitlines() if line.startswith('l311_process_resident_memory_bytes '))
+        assert int(rss.split()[1]) > 0
+
+
+class TestProfiler:
+    """Test on-demand request profiling"""
+
+    @pytest.fixture
+    def profiling(self, test_client, tmp_path, monkeypatch):
+        import dashboard_app
+        import profiler
+        store = profiler.ProfileStore(tmp_path, max_files=2)
+        monkeypatch.setattr(dashboard_app, "profile_store", store)
+        monkeypatch.setattr(dashboard_app, "PROFILING_ENABLED", True)
+        monkeypatch.setattr(profiler, "PROFILE_TOKEN", "secret")
+        return TestClient(profiler.ProfilingMiddleware(dashboard_app.app, store, token="secret")), store
+
+    def test_sampler_sees_worker_threads(self):
+        """Test stacks of a busy thread other than the caller are sampled"""
+        import threading
+        import time
+        from profiler import SamplingProfiler
+
+        def busy_loop():
+            end = time.perf_counter() + 0.2
+            while time.perf_counter() < end:
+                sum(range(1000))
+
+        sampler = SamplingProfiler(interval=0.001).start()
+        worker = threading.Thread(target=busy_loop)
+        worker.start()
+        worker.join()
+        report = sampler.stop().report()
+        assert report['samples'] > 0
+        assert any(label.startswith('busy_loop ') for label, _ in report['top_total'])
+        assert any(stack.endswith(tuple(label for label, _ in report['top_self'])) for stack, _ in report['folded'])
+
+    def test_only_token_requests_are_profiled(self, profiling):
+        """Test the token (header or query) triggers a stored profile and a wrong one does not"""
+        client, store = profiling
+        assert 'x-profile' not in client.get("/", headers={'X-Profile-Token': 'wrong'}).headers
+        assert store.recent() == []
+
+        name = client.get("/", headers={'X-Profile-Token': 'secret'}).headers['x-profile']
+        client.get("/sentiment?__profile=secret")
+        profiles = store.recent()
+        assert [p['path'] for p in profiles] == ['/sentiment', '/']
+        assert profiles[1]['name'] == name and profiles[1]['status'] == 200
+
+    def test_query_token_is_url_decoded(self, test_client, tmp_path):
+        """Test a percent-encoded __profile token matches the configured one"""
+        import dashboard_app
+        import profiler
+        store = profiler.ProfileStore(tmp_path)
+        client = TestClient(profiler.ProfilingMiddleware(dashboard_app.app, store, token="a+b/c="))
+        assert 'x-profile' not in client.get("/?__profile=a+b/c=").headers
+        assert 'x-profile' in client.get("/?__profile=a%2Bb%2Fc%3D").headers
+
+    def test_profile_saved_off_event_loop(self, profiling, monkeypatch):
+        """Test the sampler join and file write run in a worker thread, not on the event loop"""
+        import asyncio
+        client, store = profiling
+        on_loop = []
+
+        def save(name, profile):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+
+        monkeypatch.setattr(store, "save", save)
+        client.get("/", headers={'X-Profile-Token': 'secret'})
+        assert on_loop == [False]
+        assert 'x-profile' in client.get("/", headers={'X-Profile-Token': 'secret'}).headers
+
+    def test_store_keeps_newest_files(self, tmp_path):
+        """Test the profile directory is pruned to max_files"""
+        from profiler import ProfileStore
+        store = ProfileStore(tmp_path, max_files=2)
+        for i in range(4):
+            store.save(f"2024010{i}-get-root", {'path': f"/{i}"})
+        assert [p['name'] for p in store.recent()] == ['20240103-get-root', '20240102-get-root']
+
+    def test_admin_pages_require_token(self, profiling):
+        """Test the profile list and detail pages 404 without the admin token"""
+        client, store = profiling
+        name = client.get("/", headers={'X-Profile-Token': 'secret'}).headers['x-profile']
+        assert client.get("/admin/profiles").status_code == 404
+        assert client.get(f"/admin/profiles/{name}?token=wrong").status_code == 404
+
+        listing = client.get("/admin/profiles?token=secret")
+        assert listing.status_code == 200 and name in listing.text
+        detail = client.get(f"/admin/profiles/{name}", headers={'X-Profile-Token': 'secret'})
+        assert detail.status_code == 200 and 'Self samples' in detail.text
+        assert client.get(f"/admin/profiles/{name}?token=secret&format=json").json()['path'] == '/'
+        assert client.get("/admin/profiles/missing?token=secret").status_code == 404
+
+
+class TestTableRows:
+    """Test the column-wise table row builder"""
+
+    def test_rows_from_columns(self):
+        """Test truncation, colored spans and blank placeholders"""
+        from fasthtml.common import to_xml
+        import dashboard_app
+        frame = pd.DataFrame({'id': ['a', 'b'], 'description': ['x' * 12, None], 'sentiment': ['negative', None]})
+        rows = dashboard_app.table_rows(frame, [
+            dashboard_app.table_column('id', style='font-weight: 600;'),
+            dashboard_app.table_column('description', truncate=10),
+            dashboard_app.table_column('sentiment', colors=dashboard_app.SENTIMENT_COLORS, blank='-')
+        ])
+        html = [to_xml(row) for row in rows]
+        assert len(html) == 2
+        assert '<td style="font-weight: 600;">a</td>' in html[0]
+        assert 'xxxxxxxxxx...' in html[0] and 'xxxxxxxxxxx' not in html[0]
+        assert 'color: #ef4444' in html[0]
+        assert '<span>-</span>' in html[1] and 'nan' not in html[1]
+
+    def test_empty_frame_placeholder(self):
+        """Test an empty slice renders the placeholder row"""
+        from fasthtml.common import Td, Tr
+        import dashboard_app
+        placeholder = Tr(Td('none'))
+        assert dashboard_app.table_rows(pd.DataFrame({'id': []}), [dashboard_app.table_column('id')], empty=placeholder) == [placeholder]
+
+    def test_static_tables_cached(self, test_client):
+        """Test repeated page hits reuse the rendered table bodies"""
+        import dashboard_app
+        test_client.get("/urgency")
+        hits_before = dashboard_app.table_cache.hits
+        response = test_client.get("/urgency")
+        assert "requests need immediate attention" in response.text
+        assert dashboard_app.table_cache.hits >= hits_before + 2
+
+
+class TestChatClient:
+    """Test the async OpenRouter client and /chat/ask against a local stub server"""
+
+    def test_complete_returns_reply(self, fake_openrouter):
+        """Test a completion round-trips through the pooled client"""
+        import asyncio
+        from llm_client import OpenRouterClient
+        client = OpenRouterClient("test-key", base_url=fake_openrouter.base_url)
+        reply = asyncio.run(client.complete([{"role": "user", "content": "hi"}]))
+        assert reply == fake_openrouter.reply
+        assert fake_openrouter.requests[0]['model'] == client.model
+
+    def test_deadline_raises_timeout(self, fake_openrouter):
+        """Test a slow upstream response is cut off at the request deadline"""
+        import asyncio
+        from llm_client import OpenRouterClient, LLMTimeout
+        fake_openrouter.latency = 0.5
+        client = OpenRouterClient("test-key", base_url=fake_openrouter.base_url, timeout=0.1)
+        with pytest.raises(LLMTimeout):
+            asyncio.run(client.complete([{"role": "user", "content": "hi"}]))
+        assert client.stats()['timeouts'] == 1
+
+    def test_upstream_status_counts(self, fake_openrouter):
+        """Test responses are counted by upstream status code"""
+        import asyncio
+        from llm_client import OpenRouterClient, LLMHTTPError
+        client = OpenRouterClient("test-key", base_url=fake_openrouter.base_url)
+        asyncio.run(client.complete([{"role": "user", "content": "hi"}]))
+        fake_openrouter.status = 429
+        with pytest.raises(LLMHTTPError):
+            asyncio.run(client.complete([{"role": "user", "content": "hi"}]))
+        assert client.stats() == {'requests': 2, 'timeouts': 0, 'transport_errors': 0, 'status_codes': {200: 1, 429: 1}}
+
+    def test_concurrency_cap(self, fake_openrouter):
+        """Test no more than max_concurrency completions are in flight at once"""
+        import asyncio
+        from llm_client import OpenRouterClient
+        fake_openrouter.latency = 0.05
+        client = OpenRouterClient("test-key", base_url=fake_openrouter.base_url, max_concurrency=2)
+
+        async def run_many():
+            return await asyncio.gather(*[client.complete([{"role": "user", "content": str(i)}]) for i in range(6)])
+
+        assert len(asyncio.run(run_many())) == 6
+        assert fake_openrouter.max_in_flight <= 2
+
+    def test_calls_without_pool_close_their_connections(self, fake_openrouter, monkeypatch):
+        """Test calls on short-lived event loops don't leave a pool behind"""
+        import asyncio
+        from llm_client import OpenRouterClient
+        client = OpenRouterClient("test-key", base_url=fake_openrouter.base_url)
+        opened = []
+        new_client = client._new_client
+        monkeypatch.setattr(client, "_new_client", lambda: opened.append(new_client()) or opened[-1])
+        for _ in range(2):
+            asyncio.run(client.complete([{"role": "user", "content": "hi"}]))
+        assert len(opened) == 2 and all(http.is_closed for http in opened)
+
+    def test_pool_follows_app_lifespan(self, chat_client, fake_openrouter):
+        """Test the app opens one pool at startup, reuses it per request and closes it at shutdown"""
+        import dashboard_app
+        from starlette.testclient import TestClient
+        llm = dashboard_app.llm_client
+        with TestClient(dashboard_app.app) as client:
+            pool = llm._client
+            for i in range(2):
+                response = client.post("/chat/ask", data={"message": f"Pool question {i}?"},
+                                       headers={"X-Forwarded-For": f"10.0.1.{i}"})
+                assert fake_openrouter.reply in response.text
+            assert llm._client is pool and not pool.is_closed
+        assert pool.is_closed and llm._client is None
+
+    def test_chat_ask_uses_client(self, chat_client, fake_openrouter):
+        """Test /chat/ask renders the upstream reply"""
+        response = chat_client.post("/chat/ask", data={"message": "How do I report a pothole?"},
+                                    headers={"X-Forwarded-For": "10.0.0.1"})
+        assert response.status_code == 200
+        assert fake_openrouter.reply in response.text
+
+    def test_chat_ask_reports_upstream_error(self, chat_client, fake_openrouter):
+        """Test a non-200 upstream status is reported to the user"""
+        fake_openrouter.status = 503
+        response = chat_client.post("/chat/ask", data={"message": "Is there a mobile app?"},
+                                    headers={"X-Forwarded-For": "10.0.0.2"})
+        assert "HTTP 503" in response.text
+        import dashboard_app
+        assert dashboard_app.metrics.value('chat_questions_total', outcome='error') >= 1
+
+
+class TestChatStreaming:
+    """Test token streaming of chat replies over SSE"""
+
+    def test_client_stream_yields_tokens(self, fake_openrouter):
+        """Test the client relays streamed deltas in order"""
+        import asyncio
+        from llm_client import OpenRouterClient
+        client = OpenRouterClient("test-key", base_url=fake_openrouter.base_url)
+
+        async def collect():
+            return [delta async for delta in client.stream([{"role": "user", "content": "hi"}])]
+
+        deltas = asyncio.run(collect())
+        assert len(deltas) > 1
+        assert "".join(deltas) == fake_openrouter.reply
+
+    def test_ask_then_stream(self, chat_client, fake_openrouter, monkeypatch):
+        """Test /chat/ask hands off to an SSE stream that ends with feedback and follow-ups"""
+        import re
+        import dashboard_app
+        monkeypatch.setattr(dashboard_app, "CHAT_STREAMING", True)
+        session_id = "stream-test-session"
+        chat_client.cookies.set("chat_session_id", session_id)
+
+        response = chat_client.post("/chat/ask", data={"message": "How do I report a pothole?"},
+                                    headers={"X-Forwarded-For": "10.0.0.3"})
+        stream_url = re.search(r'sse-connect="([^"]+)"', response.text).group(1)
+
+        stream = chat_client.get(stream_url)
+        chat_client.cookies.clear()
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        assert stream.text.count("event: token") > 1
+        assert "event: done" in stream.text
+        assert "feedback-btn" in stream.text and "follow-up-btn" in stream.text
+
+        history = dashboard_app.chat_sessions.history(session_id)
+        assert history[-1] == {"role": "assistant", "content": fake_openrouter.reply}
+
+    def test_unknown_stream_closes(self, test_client):
+        """Test an expired stream id still sends the closing event"""
+        response = test_client.get("/chat/stream/not-a-real-stream")
+        assert "event: done" in response.text
+
+
+class TestApprovedAnswers:
+    """Test retrieval over the approved questions corpus"""
+
+    def test_seed_sql_parses(self):
+        """Test every seeded question loads with answer, keywords and variations"""
+        from approved_answers import load_approved_questions
+        questions = load_approved_questions()
+        assert len(questions) >= 50
+        for q in questions:
+            assert q['question_text'] and q['answer_text']
+            assert isinstance(q['keywords'], list)
+            assert isinstance(q['common_variations'], list)
+
+    def test_variation_matches_entry(self):
+        """Test a listed variation retrieves its approved entry"""
+        from approved_answers import ApprovedAnswerIndex
+        index = ApprovedAnswerIndex.from_migrations()
+        entry = index.match("When do I call 311 vs 911?")
+        assert entry is not None
+        assert entry['question_text'] == "What's the difference between 311 and 911?"
+
+    def test_off_topic_question_misses(self):
+        """Test an unrelated question falls through to the LLM"""
+        from approved_answers import ApprovedAnswerIndex
+        index = ApprovedAnswerIndex.from_migrations()
+        assert index.match("Is there a mobile app for 311?") is None
+        assert index.match("Which neighborhood has the most problems?") is None
+
+    def test_chat_ask_answers_without_llm(self, chat_client, fake_openrouter, monkeypatch):
+        """Test /chat/ask answers approved questions without an upstream call"""
+        import dashboard_app
+        monkeypatch.setattr(dashboard_app.approved_answers, "min_score", 0.85)
+        response = chat_client.post("/chat/ask", data={"message": "How do I request bulk trash pickup?"},
+                                    headers={"X-Forwarded-For": "10.0.0.4"})
+        assert "To request bulk item pickup" in response.text
+        assert fake_openrouter.request_count == 0
+
+
+class TestResponseCache:
+    """Test the first-turn chat response cache"""
+
+    def test_normalized_keys_match(self):
+        """Test case, whitespace and trailing punctuation don't change the key"""
+        from chat_cache import ResponseCache
+        cache = ResponseCache()
+        assert cache.make_key("How do I  report a pothole?", "ctx", "m") == cache.make_key("how do i report a pothole", "ctx", "m")
+        assert cache.make_key("q", "ctx", "m") != cache.make_key("q", "other ctx", "m")
+
+    def test_ttl_and_lru_bounds(self):
+        """Test expired entries miss and the size bound evicts the oldest"""
+        import time
+        from chat_cache import ResponseCache
+        cache = ResponseCache(max_entries=2, ttl_seconds=0.05)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.set("c", "C")
+        assert cache.get("a") is None
+        assert cache.get("c") == "C"
+        time.sleep(0.06)
+        assert cache.get("c") is None
+        assert cache.stats()['hits'] == 1
+
+    def test_repeat_first_turn_question_hits_cache(self, chat_client, fake_openrouter):
+        """Test a repeated first-turn question is served without a second upstream call"""
+        for i in range(2):
+            chat_client.cookies.set("chat_session_id", f"cache-session-{i}")
+            response = chat_client.post("/chat/ask", data={"message": "Who picks up dead animals?"},
+                                        headers={"X-Forwarded-For": "10.0.0.5"})
+            assert fake_openrouter.reply in response.text
+        chat_client.cookies.clear()
+        assert fake_openrouter.request_count == 1
+        stats = chat_client.get("/api/chat-cache").json()
+        assert stats['hits'] == 1
+
+
+class TestSingleFlight:
+    """Test coalescing of identical in-flight chat prompts"""
+
+    def test_concurrent_callers_share_one_call(self, fake_openrouter):
+        """Test identical concurrent completions reach upstream once"""
+        import asyncio
+        from chat_cache import SingleFlight
+        from llm_client import OpenRouterClient
+        fake_openrouter.latency = 0.2
+        client = OpenRouterClient("test-key", base_url=fake_openrouter.base_url)
+        flight = SingleFlight()
+        messages = [{"role": "user", "content": "hi"}]
+
+        async def main():
+            try:
+                return await asyncio.gather(*[flight.run("k", lambda: client.complete(messages)) for _ in range(5)])
+            finally:
+                await client.aclose()
+
+        replies = asyncio.run(main())
+        assert replies == [fake_openrouter.reply] * 5
+        assert fake_openrouter.request_count == 1
+        assert flight.shared == 4 and len(flight) == 0
+
+    def test_leader_error_reaches_waiters(self):
+        """Test waiters see the leader's exception and the key is released"""
+        import asyncio
+        from chat_cache import SingleFlight
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise ValueError("upstream down")
+
+        async def main():
+            return await asyncio.gather(*[flight.run("k", fail) for _ in range(3)], return_exceptions=True)
+
+        results = asyncio.run(main())
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(flight) == 0
+
+    def test_late_resolve_leaves_new_leader_alone(self):
+        """Test a failed leader's second resolve doesn't fail the next leader for the same key"""
+        import asyncio
+        from chat_cache import SingleFlight
+        flight = SingleFlight()
+
+        async def main():
+            first = flight.start("k")
+            flight.resolve("k", error=ValueError("upstream down"), future=first)
+            second = flight.start("k")
+            waiter = asyncio.ensure_future(flight.wait(second))
+            await asyncio.sleep(0)
+            # The failed stream's finally block runs after the new leader started
+            flight.resolve("k", error=ConnectionError("the original request was closed"), future=first)
+            assert flight.in_flight("k") is second and not second.done()
+            flight.resolve("k", "reply", future=second)
+            return await waiter
+
+        assert asyncio.run(main()) == "reply"
+        assert len(flight) == 0
+
+    def test_concurrent_chat_requests_coalesce(self, chat_client, fake_openrouter):
+        """Test simultaneous first-turn /chat/ask posts make one upstream call"""
+        import asyncio
+        import httpx
+        import dashboard_app
+        fake_openrouter.latency = 0.2
+        transport = httpx.ASGITransport(app=dashboard_app.app)
+
+        async def ask(i):
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver",
+                                         cookies={"chat_session_id": f"flight-{i}"}) as client:
+                response = await client.post("/chat/ask", data={"message": "When is bulky item pickup?"},
+                                             headers={"X-Forwarded-For": "10.0.0.6"})
+                return response.text
+
+        async def main():
+            try:
+                return await asyncio.gather(*[ask(i) for i in range(4)])
+            finally:
+                await dashboard_app.llm_client.aclose()
+
+        for text in asyncio.run(main()):
+            assert fake_openrouter.reply in text
+        assert fake_openrouter.request_count == 1
+
+
+class TestRateLimit:
+    """Test the chat rate limiter"""
+
+    def test_ip_window_slides(self):
+        """Test IP counts expire as the window slides past them"""
+        from rate_limit import ChatRateLimiter
+        now = [0.0]
+        limiter = ChatRateLimiter(per_session=100, per_ip=3, ip_window_seconds=3600, clock=lambda: now[0])
+        for i in range(3):
+            limiter.record(f"s{i}", "1.2.3.4")
+        assert limiter.check("s9", "1.2.3.4")[0] is False
+        assert limiter.check("s9", "5.6.7.8") == (True, 3, "")
+        now[0] = 3600 + 61
+        assert limiter.check("s9", "1.2.3.4") == (True, 3, "")
+
+    def test_session_quota_and_reset(self):
+        """Test the per-session quota and that clearing the chat resets it"""
+        from rate_limit import ChatRateLimiter
+        limiter = ChatRateLimiter(per_session=2, per_ip=50)
+        limiter.record("s", "ip")
+        assert limiter.check("s", "ip") == (True, 1, "")
+        limiter.record("s", "ip")
+        allowed, remaining, message = limiter.check("s", "ip")
+        assert not allowed and remaining == 0 and "per session" in message
+        limiter.reset_session("s")
+        assert limiter.check("s", "ip")[0] is True
+
+    def test_tracked_keys_are_bounded(self):
+        """Test memory stays bounded with many distinct keys"""
+        from rate_limit import ChatRateLimiter
+        limiter = ChatRateLimiter(max_keys=10)
+        for i in range(100):
+            limiter.record(f"s{i}", f"10.1.{i}.1")
+        assert limiter.stats()['sessions'] == 10
+        assert limiter.stats()['ips'] == 10
+
+    def test_window_footprint_at_default_cap(self):
+        """Test a full IP window at the default key cap stays within its documented ~11MB"""
+        import tracemalloc
+        from rate_limit import RATE_LIMIT_MAX_KEYS, SlidingWindowCounter
+        tracemalloc.start()
+        try:
+            counter = SlidingWindowCounter(3600)
+            for i in range(RATE_LIMIT_MAX_KEYS + 100):
+                counter.add(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}")
+            used = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        assert len(counter) == RATE_LIMIT_MAX_KEYS
+        assert used < 16 * 1024 * 1024
+
+    def test_chat_rejects_over_limit(self, chat_client, monkeypatch):
+        """Test /chat/ask refuses questions once the session quota is spent"""
+        import dashboard_app
+        from rate_limit import ChatRateLimiter
+        monkeypatch.setattr(dashboard_app, "rate_limiter", ChatRateLimiter(per_session=1, per_ip=50))
+        chat_client.cookies.set("chat_session_id", "limited-session")
+        first = chat_client.post("/chat/ask", data={"message": "How do I report graffiti?"})
+        second = chat_client.post("/chat/ask", data={"message": "How do I report graffiti?"})
+        chat_client.cookies.clear()
+        assert "Rate Limit Reached" not in first.text
+        assert "Rate Limit Reached" in second.text
+
+
+class TestSessionStore:
+    """Test the bounded chat session store"""
+
+    def test_idle_sessions_expire(self):
+        """Test sessions idle past the TTL are evicted and reported"""
+        from session_store import SessionStore
+        now = [0.0]
+        evicted = []
+        store = SessionStore(ttl_seconds=60, clock=lambda: now[0], on_evict=lambda *args: evicted.append(args))
+        store.append("a", {"role": "user", "content": "hi"})
+        now[0] = 30
+        store.touch("b")
+        now[0] = 61
+        store.touch("b")
+        assert "a" not in store and "b" in store
+        assert evicted == [("a", "expired")]
+        assert store.stats()['evictions']['expired'] == 1
+        assert store.total_bytes == 0
+
+    def test_history_is_trimmed(self):
+        """Test only the last max_messages messages are kept"""
+        from session_store import SessionStore
+        store = SessionStore(max_messages=4)
+        for i in range(5):
+            store.append("s", {"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"})
+        history = store.history("s")
+        assert [m['content'] for m in history] == ["q3", "a3", "q4", "a4"]
+        assert store.total_bytes == sum(len(m['content']) for m in history)
+
+    def test_session_and_byte_caps(self):
+        """Test the least recently active sessions go first past either cap"""
+        from session_store import SessionStore
+        store = SessionStore(max_sessions=3, max_bytes=1000)
+        for i in range(5):
+            store.touch(f"s{i}")
+        assert len(store) == 3 and "s0" not in store
+        store.append("big", {"role": "user", "content": "x" * 900})
+        store.append("s4", {"role": "user", "content": "y" * 200})
+        assert "big" not in store and "s4" in store
+        assert store.total_bytes <= 1000
+        assert store.stats()['evictions'] == {'expired': 0, 'sessions': 3, 'bytes': 2}
+
+    def test_capacity_eviction_keeps_quota(self, monkeypatch):
+        """Test a session pushed out by the caps keeps its question count; idle expiry resets it"""
+        import dashboard_app
+        from rate_limit import ChatRateLimiter
+        from session_store import SessionStore
+        limiter = ChatRateLimiter(per_session=2)
+        monkeypatch.setattr(dashboard_app, "rate_limiter", limiter)
+        now = [0.0]
+        store = SessionStore(ttl_seconds=60, max_sessions=1, clock=lambda: now[0], on_evict=dashboard_app.session_evicted)
+        store.touch("a")
+        limiter.record("a", "10.0.0.1")
+        limiter.record("a", "10.0.0.1")
+        store.touch("b")
+        assert "a" not in store and store.stats()['evictions']['sessions'] == 1
+        assert limiter.check("a", "10.0.0.2")[0] is False
+
+        store.touch("a")
+        now[0] = 61
+        store.touch("c")
+        assert store.stats()['evictions']['expired'] == 1
+        assert limiter.check("a", "10.0.0.2")[0] is True
+
+    def test_session_metrics_endpoint(self, test_client):
+        """Test /api/chat-sessions reports live sessions and evictions"""
+        data = test_client.get("/api/chat-sessions").json()
+        assert {'live_sessions', 'total_bytes', 'evictions', 'rate_limit'} <= set(data)
+
+
+class TestFeedbackLog:
+    """Test the append-only chat feedback log"""
+
+    def test_feedback_route_appends(self, test_client, tmp_path, monkeypatch):
+        """Test /chat/feedback appends one JSONL line per click"""
+        import dashboard_app
+        from feedback_log import FeedbackLog
+        log = FeedbackLog(tmp_path / "feedback.jsonl")
+        monkeypatch.setattr(dashboard_app, "feedback_log", log)
+        for i in range(3):
+            response = test_client.post("/chat/feedback", data={"message_id": f"m{i}", "feedback": "positive"})
+            assert "Thanks for the feedback" in response.text
+        assert log.flush()
+        lines = (tmp_path / "feedback.jsonl").read_text().splitlines()
+        assert [json.loads(line)['message_id'] for line in lines] == ["m0", "m1", "m2"]
+        log.close()
+
+    def test_concurrent_writes_are_not_lost(self, tmp_path):
+        """Test entries recorded from many threads all land in the log"""
+        import threading
+        from feedback_log import FeedbackLog
+        log = FeedbackLog(tmp_path / "feedback.jsonl", max_batch=50)
+        threads = [threading.Thread(target=lambda t=t: [log.record(f"m{t}-{i}", "negative") for i in range(100)])
+                   for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.close()
+        assert len((tmp_path / "feedback.jsonl").read_text().splitlines()) == 800
+        assert log.stats()['written'] == 800
+
+    def test_compaction_is_incremental(self, tmp_path):
+        """Test compaction counts per message and only reads new lines on later runs"""
+        from feedback_log import compact
+        log_path, summary_path = tmp_path / "feedback.jsonl", tmp_path / "summary.json"
+        entries = [("a", "positive"), ("a", "negative"), ("b", "positive")]
+        log_path.write_text("".join(json.dumps({'message_id': m, 'feedback': f}) + "\n" for m, f in entries))
+        summary = compact(log_path, summary_path)
+        assert summary['messages']['a'] == {'helpful': 1, 'not_helpful': 1}
+
+        with open(log_path, 'a') as f:
+            f.write(json.dumps({'message_id': 'b', 'feedback': 'positive'}) + "\n")
+            f.write('{"message_id": "c", "feedb')  # torn tail from a crash mid-write
+        summary = compact(log_path, summary_path)
+        assert summary['messages']['b'] == {'helpful': 2, 'not_helpful': 0}
+        assert 'c' not in summary['messages']
+        assert summary['total'] == {'helpful': 3, 'not_helpful': 1}
+
+
+class TestAnalysisData:
+    """Test the shared loader for the offline analysis scripts"""
+
+    @pytest.fixture
+    def extract_paths(self, tmp_path):
+        processed = pd.DataFrame({
+            'service_request_id': ['1', '2', '3'],
+            'service_name': ['NSR Metro Agencies', 'Pothole', 'Trash'],
+            'agency_responsible': ['Metro311', 'Public Works', 'Solid Waste'],
+            'address': ['1 MAIN ST', '2 MAIN ST', '1 MAIN ST'],
+            'description': ['', 'deep hole', 'missed pickup'],
+            'urgency_level': ['low', 'high', 'medium'],
+            'sentiment': ['neutral', 'negative', 'neutral'],
+            'topics_json': ['{"info": {"count": 1}}', '', '{"pickup": {"count": 2}}'],
+            'ner_json': ['{"entities": []}', '', '{"entities": []}'],
+            'latitude': [38.2, 38.3, 38.4]
+        })
+        raw = pd.DataFrame({'service_request_id': ['1', '2', '3'], 'source': [' Call Center', 'WEB', 'CALL CENTER'],
+                            'extra': [0, 0, 0]})
+        processed.to_csv(tmp_path / "processed.csv", index=False)
+        raw.to_csv(tmp_path / "raw.csv", index=False)
+        return tmp_path / "processed.csv", tmp_path / "raw.csv"
+
+    def test_merged_frame_is_cached(self, extract_paths, tmp_path, monkeypatch):
+        """Test the merge keeps only report columns and later loads skip the CSV parse"""
+        import analysis_data
+        processed_csv, raw_csv = extract_paths
+        merged = analysis_data.load_merged(processed_csv, raw_csv, cache_dir=tmp_path / "cache")
+        assert set(merged.columns) == set(analysis_data.ANALYSIS_COLUMNS) | {'source'}
+        assert merged.attrs == {'processed_rows': 3, 'raw_rows': 3}
+
+        monkeypatch.setattr(analysis_data, "read_sources", lambda *a: pytest.fail("CSV re-parsed"))
+        cached = analysis_data.load_merged(processed_csv, raw_csv, cache_dir=tmp_path / "cache")
+        pd.testing.assert_frame_equal(cached, merged)
+        assert cached.attrs['raw_rows'] == 3
+
+    def test_call_center_filter(self, extract_paths, tmp_path):
+        """Test source matching ignores case and surrounding whitespace"""
+        import analysis_data
+        merged = analysis_data.load_merged(*extract_paths, cache_dir=tmp_path / "cache")
+        assert list(analysis_data.call_center_requests(merged)['service_request_id']) == ['1', '3']
+
+    def test_source_lookup(self, tmp_path):
+        """Test the compact id -> source map keeps the first source and misses unknown ids"""
+        import analysis_data
+        pd.DataFrame({'service_request_id': ['b', 'a', 'c', 'a', None], 'source': ['WEB', 'CALL CENTER', None, 'WEB', 'WEB']}
+                     ).to_csv(tmp_path / "raw.csv", index=False)
+        lookup = analysis_data.SourceLookup.from_csv(tmp_path / "raw.csv", chunk_rows=2)
+        assert lookup.rows == 5 and len(lookup) == 3
+        sources = lookup.map(pd.Series(['a', 'zz', 'b', 'c', None], index=[10, 11, 12, 13, 14]))
+        assert list(sources.index) == [10, 11, 12, 13, 14]
+        assert sources[10] == 'CALL CENTER' and sources[12] == 'WEB'
+        assert sources[[11, 13, 14]].isna().all()
+
+    def test_streamed_report_matches_batch(self, extract_paths, tmp_path):
+        """Test the chunked report equals the report built from the cached merged frame"""
+        import report_engine
+        processed_csv, raw_csv = extract_paths
+        batch = report_engine.build_report(processed_csv, raw_csv, cache_dir=tmp_path / "cache")
+        streamed = report_engine.stream_report(processed_csv, raw_csv, chunk_rows=2)
+        batch.pop('generated_at'), streamed.pop('generated_at')
+        assert streamed == batch
+        assert streamed['totals']['call_center'] == 2
+
+    def test_topic_table_matches_row_loop(self, sample_data):
+        """Test the exploded topics table totals topics like the old per-row Counter loop"""
+        from collections import Counter
+        import analysis_data
+        frame = sample_data.astype({'service_request_id': str})
+        counter = Counter()
+        for value in frame['topics_json']:
+            if isinstance(value, str) and value:
+                for topic, data in json.loads(value).items():
+                    counter[topic] += data.get('count', 1)
+        topics = analysis_data.explode_topics(frame, chunk_rows=1000)
+        assert topics.groupby('topic')['count'].sum().to_dict() == dict(counter)
+        assert set(topics.index) <= set(frame.index)
+
+    def test_process_pool_matches_single_process(self, sample_data, tmp_path):
+        """Test per-chunk partial reports from worker processes merge into the single-process report"""
+        import numpy as np
+        import report_engine
+        frame = sample_data.astype({'service_request_id': str})
+        rng = np.random.default_rng(3)
+        frame.to_csv(tmp_path / "processed.csv", index=False)
+        pd.DataFrame({'service_request_id': frame['service_request_id'],
+                      'source': rng.choice(['CALL CENTER', 'WEB', None], size=len(frame))}
+                     ).to_csv(tmp_path / "raw.csv", index=False)
+        serial = report_engine.stream_report(tmp_path / "processed.csv", tmp_path / "raw.csv", chunk_rows=2000)
+        parallel = report_engine.stream_report(tmp_path / "processed.csv", tmp_path / "raw.csv", workers=2,
+                                               chunk_rows=2000)
+        serial.pop('generated_at'), parallel.pop('generated_at')
+        assert parallel == serial
+        assert parallel['call_center']['repeat']['calls'] > 0
+
+    def test_source_inference(self):
+        """Test the first entity carrying a contact clue decides the row"""
+        import analysis_data
+        frame = pd.DataFrame({
+            'service_request_id': ['a', 'b', 'c', 'd'],
+            'ner_json': [
+                '{"entities": [{"entity": "Main St", "type": "LOC"}, {"entity": "502-555-1234", "type": "LOC"}]}',
+                '{"entities": [{"entity": "the website", "type": "ORG"}, {"entity": "me@x.com", "type": "ORG"}]}',
+                'not json',
+                '{"entities": [{"entity": "Bob", "type": "PERSON"}]}'
+            ]
+        })
+        entities = analysis_data.explode_entities(frame)
+        assert list(entities['service_request_id']) == ['a', 'a', 'b', 'b', 'd']
+        inferred = analysis_data.infer_sources(entities, frame.index)
+        assert inferred.to_dict() == {0: 'phone', 1: 'web'}
+
+
+class TestFacetIndex:
+    """Test bitmap facet filters against pandas masks"""
+
+    def test_matches_boolean_masks(self, sample_data):
+        """Test counts and positions for AND across facets and OR within one"""
+        import numpy as np
+        from facet_index import FacetIndex
+        index = FacetIndex(sample_data)
+        mask = (sample_data['urgency_level'] == 'high') & sample_data['sentiment'].isin(['negative', 'neutral'])
+        bitmap = index.match(urgency='high', sentiment=['negative', 'neutral'])
+        expected = np.flatnonzero(mask.to_numpy())
+        assert index.count(bitmap) == mask.sum()
+        assert list(index.positions(bitmap)) == list(expected)
+        assert list(index.positions(bitmap, 7)) == list(expected[:7])
+        assert list(index.positions(bitmap, 5, start=int(expected[3]) + 1)) == list(expected[4:9])
+        assert index.facet_counts(bitmap, 'urgency') == {'high': mask.sum()}
+
+    def test_pages_cover_sorted_matches(self, sample_data):
+        """Test walking cursors returns every match once, in sort order and in frame order"""
+        import numpy as np
+        from facet_index import FacetIndex
+        index = FacetIndex(sample_data)
+        mask = (sample_data['urgency_level'] == 'high') & (sample_data['sentiment'] == 'negative')
+        bitmap = index.match(urgency='high', sentiment='negative')
+        for sort, expected in [
+            (None, np.flatnonzero(mask.to_numpy())),
+            ('urgency_score', np.flatnonzero(mask.to_numpy())[
+                np.argsort(-sample_data['urgency_score'][mask].fillna(-np.inf).to_numpy(), kind='stable')])
+        ]:
+            seen, cursor = [], 0
+            while cursor is not None:
+                positions, cursor = index.page(bitmap, 50, cursor, sort)
+                assert len(positions) <= 50
+                seen.extend(positions)
+            assert seen == list(expected)
+
+    def test_unknown_values_and_facets(self, sample_data):
+        """Test unknown values match nothing and unknown facets are rejected"""
+        from facet_index import FacetIndex
+        index = FacetIndex(sample_data)
+        assert index.count(index.match(service='No Such Service')) == 0
+        assert index.count(index.match()) == len(sample_data)
+        with pytest.raises(KeyError):
+            index.match(color='red')
+
+    def test_filter_endpoint(self, test_client):
+        """Test /api/filter returns the count and first records for a facet combination"""
+        import dashboard_app
+        frame = dashboard_app.df
+        mask = (frame['urgency_level'] == 'high') & (frame['sentiment'] == 'negative')
+        data = test_client.get("/api/filter?urgency=high&sentiment=negative&limit=3").json()
+        assert data['count'] == mask.sum()
+        assert data['filters'] == {'urgency': ['high'], 'sentiment': ['negative']}
+        assert [r['service_request_id'] for r in data['records']] == list(frame[mask]['service_request_id'].head(3))
+        assert test_client.get("/api/filter?limit=abc").status_code == 400
+
+    def test_records_endpoint_pages(self, test_client):
+        """Test /api/records pages through critical requests by urgency score"""
+        url = "/api/records?urgency=high&sentiment=negative&sort=urgency_score&limit=20"
+        first = test_client.get(url).json()
+        second = test_client.get(f"{url}&cursor={first['next_cursor']}").json()
+        scores = [r['urgency_score'] for r in first['records'] + second['records']]
+        assert scores == sorted(scores, reverse=True)
+        ids = [r['service_request_id'] for r in first['records'] + second['records']]
+        assert len(set(ids)) == len(ids) == min(40, first['count'])
+        assert test_client.get("/api/records?sort=address").status_code == 400
+
+    def test_records_partial(self, test_client):
+        """Test the HTMX partial returns rows and a link to the next page"""
+        response = test_client.get("/records/rows?urgency=high&limit=5", headers={'HX-Request': 'true'})
+        assert response.status_code == 200
+        assert response.text.count('<tr') == 6
+        assert 'hx-get="/records/rows?urgency=high&amp;limit=5&amp;cursor=' in response.text
+        assert 'hx-get="/records/rows?' in test_client.get("/urgency").text
+
+    def test_zero_limit_still_advances(self, test_client):
+        """Test limit=0 is clamped to one row so 'Load more' never repeats the same cursor"""
+        page = test_client.get("/api/records?urgency=high&limit=0").json()
+        assert len(page['records']) == 1
+        assert page['next_cursor'] is None or page['next_cursor'] > 0
+        response = test_client.get("/records/rows?urgency=high&limit=0")
+        assert response.text.count('<tr') == 2
+        assert 'cursor=0"' not in response.text
+
+
+class TestRepeatCallIndex:
+    """Test interned address ids and repeat-caller counting"""
+
+    def test_normalize_address(self):
+        """Test case, punctuation, spacing and suffix variants collapse to one form"""
+        from address_index import normalize_address
+        assert normalize_address(" 12 Main Street. ") == "12 MAIN ST"
+        assert normalize_address("12  main st") == "12 MAIN ST"
+        assert normalize_address("400 S 4th Avenue, #2") == "400 S 4TH AVE 2"
+
+    def test_matches_groupby(self, sample_data):
+        """Test counts over packed integer keys agree with grouping raw address strings"""
+        from address_index import RepeatCallIndex
+        index = RepeatCallIndex()
+        for start in range(0, len(sample_data), 700):
+            rows = sample_data.iloc[start:start + 700]
+            index.add(rows['address'], rows['service_name'])
+        pairs = sample_data.groupby(['address', 'service_name']).size()
+        repeats = pairs[pairs > 1]
+        summary = index.summary(top=5)
+        assert len(index) == len(pairs)
+        assert summary['pairs'] == len(repeats) and summary['calls'] == repeats.sum()
+        by_service = repeats.groupby(level='service_name').sum()
+        assert {s: n for s, n, _ in summary['services']} == by_service.to_dict()
+        assert [n for _, _, n in summary['top_patterns']] == sorted(repeats, reverse=True)[:5]
+
+    def test_incremental_updates(self):
+        """Test new requests join existing pairs and missing values are skipped"""
+        from address_index import RepeatCallIndex
+        index = RepeatCallIndex()
+        index.add(['1 Main St', '2 Oak Ave', None], ['Trash', 'Trash', 'Trash'])
+        index.add(['1 MAIN STREET', '1 main st'], ['Trash', 'Pothole'])
+        assert index.requests == 4
+        assert index.address_calls('1 main street') == {'Trash': 2, 'Pothole': 1}
+        assert index.summary()['top_patterns'] == [['1 MAIN ST', 'Trash', 2]]
+        assert index.address_calls('9 Nowhere Rd') == {}
+
+    def test_repeat_callers_endpoint(self, test_client):
+        """Test /api/repeat-callers returns summary stats and per-address counts"""
+        data = test_client.get("/api/repeat-callers?top=3").json()
+        assert {'pairs', 'calls', 'services', 'top_patterns'} <= set(data)
+        assert len(data['top_patterns']) <= 3
+        address = data['top_patterns'][0][0] if data['top_patterns'] else 'nowhere'
+        lookup = test_client.get("/api/repeat-callers", params={'address': address}).json()
+        assert lookup['address'] == address
+
+
+class TestReportEngine:
+    """Test the single-pass call center report engine"""
+
+    @pytest.fixture
+    def report_inputs(self, sample_data):
+        import numpy as np
+        import analysis_data
+        frame = sample_data.astype({'service_request_id': str})
+        rng = np.random.default_rng(7)
+        frame['source'] = rng.choice(['CALL CENTER', ' call center', 'WEB', None], size=len(frame))
+        topics, entities = analysis_data.explode_nlp(frame)
+        return frame, topics, entities
+
+    def test_metrics_match_direct_filters(self, report_inputs):
+        """Test report counts agree with the per-filter pandas the scripts used to run"""
+        import analysis_data
+        from report_engine import CallCenterReport
+        frame, topics, entities = report_inputs
+        engine = CallCenterReport()
+        engine.update(frame, topics, entities)
+        report = engine.finalize()
+
+        cc = analysis_data.call_center_requests(frame)
+        segments = report['call_center']['segments']
+        assert report['totals']['call_center'] == len(cc)
+        assert segments['bottleneck'] == len(cc[(cc['urgency_level'] == 'high') & (cc['sentiment'] == 'negative')])
+        assert segments['nsr'] == cc['service_name'].str.contains('NSR', na=False).sum()
+        assert segments['empty_description'] == (cc['description'].isna() | (cc['description'].str.len() < 20)).sum()
+        assert dict(report['call_center']['services']) == cc['service_name'].value_counts().to_dict()
+        pairs = cc.groupby(['address', 'service_name']).size()
+        assert report['call_center']['repeat']['calls'] == pairs[pairs > 1].sum()
+        json.dumps(report)
+
+    def test_chunked_updates_match_batch(self, report_inputs):
+        """Test folding the frame in slices gives the same report as one update"""
+        from report_engine import CallCenterReport
+        frame, topics, entities = report_inputs
+        batch = CallCenterReport()
+        batch.update(frame, topics, entities)
+        chunked = CallCenterReport()
+        for start in range(0, len(frame), 1000):
+            rows = frame.iloc[start:start + 1000]
+            chunked.update(rows, topics[topics.index.isin(rows.index)], entities[entities.index.isin(rows.index)])
+        expected, actual = batch.finalize(), chunked.finalize()
+        expected.pop('generated_at'), actual.pop('generated_at')
+        assert actual == expected
+
+
+class TestRouteBenchmark:
+    """Test the route benchmark helpers in bench_routes.py"""
+
+    def test_every_route_has_a_case(self, test_client):
+        """Test new routes get a benchmark case (or an explicit skip)"""
+        import dashboard_app
+        import bench_routes
+        cases = bench_routes.route_cases(dashboard_app)
+        assert bench_routes.app_routes(dashboard_app.app) - set(bench_routes.SKIPPED_ROUTES) <= set(cases)
+
+    def test_run_reports_percentiles_and_allocations(self, test_client):
+        """Test each route reports cold, p50/p95/p99 latency and allocations"""
+        import dashboard_app
+        import bench_routes
+        cases = bench_routes.route_cases(dashboard_app)
+        results = bench_routes.run_benchmarks(test_client, {r: cases[r] for r in ('GET /', 'GET /api/filter')},
+                                              iterations=3, log=lambda line: None)
+        for result in results.values():
+            assert result['count'] == 3 and result['statuses'] == [200]
+            assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] <= result['max_ms']
+            assert result['alloc_peak_kb'] > 0
+
+    def test_scale_frame(self, sample_data):
+        """Test resampling keeps the columns and assigns unique request ids"""
+        import bench_routes
+        scaled = bench_routes.scale_frame(sample_data, len(sample_data) * 3)
+        assert len(scaled) == len(sample_data) * 3 and list(scaled.columns) == list(sample_data.columns)
+        assert scaled['service_request_id'].is_unique
+        assert set(scaled['service_name'].dropna()) <= set(sample_data['service_name'].dropna())
+
+    def test_compare_flags_p95_regressions(self):
+        """Test only slowdowns past both the ratio and the absolute floor are regressions"""
+        import bench_routes
+        baseline = {'GET /': {'p95_ms': 10.0}, 'GET /metrics': {'p95_ms': 1.0}, 'GET /chat': {'p95_ms': 10.0}}
+        results = {'GET /': {'p95_ms': 20.0}, 'GET /metrics': {'p95_ms': 2.5}, 'GET /chat': {'p95_ms': 11.0},
+                   'GET /topics': {'p95_ms': 50.0}}
+        assert [r[0] for r in bench_routes.compare(results, baseline, threshold=0.25)] == ['GET /']
+
+
+class TestSyntheticData:
+    """Test the synthetic 311 extract generator"""
+
+    def test_schema_and_matching_raw_file(self, synthetic, sample_data):
+        """Test the processed file has the sample columns and the raw file covers the same ids"""
+        processed, raw = synthetic
+        frame = pd.read_csv(processed, low_memory=False)
+        sources = pd.read_csv(raw)
+        assert list(frame.columns) == list(sample_data.columns)
+        assert len(frame) == 20_000 and frame['service_request_id'].is_unique
+        assert sources['service_request_id'].tolist() == frame['service_request_id'].tolist()
+        assert set(sources['source'].dropna()) == {'CALL CENTER'}
+
+    def test_distributions_follow_aggregates(self, synthetic):
+        """Test call center share, sentiment and high + negative calls track the 2024 reports"""
+        import analysis_data
+        processed, raw = synthetic
+        merged = analysis_data.load_merged(processed, raw, cache_dir=processed.parent / "cache")
+        cc = analysis_data.call_center_requests(merged)
+        assert 0.60 < len(cc) / len(merged) < 0.66
+        assert 0.37 < (cc['sentiment'] == 'negative').mean() < 0.43
+        assert 0.10 < ((cc['urgency_level'] == 'high') & (cc['sentiment'] == 'negative')).mean() < 0.12
+        assert cc['service_name'].value_counts().index[0] == 'NSR Metro Agencies'
+
+    def test_nlp_columns_decode(self, synthetic):
+        """Test topics_json / ner_json decode into the long tables the scripts use"""
+        import analysis_data
+        processed, _ = synthetic
+        frame = pd.read_csv(processed, low_memory=False)
+        topics = analysis_data.explode_topics(frame)
+        entities = analysis_data.explode_entities(frame)
+        assert topics['service_request_id'].nunique() > 0.98 * len(frame)
+        assert {'location', 'organization'} <= set(entities['type'])
+
+    def test_deterministic_for_seed(self, tmp_path):
+        """Test the same seed and chunk size reproduce the same files"""
+        from generate_synthetic_data import generate
+        for name in ('a', 'b'):
+            generate(500, tmp_path / f"{name}.csv", tmp_path / f"{name}_raw.csv", seed=3, chunk_rows=200)
+        assert (tmp_path / "a.csv").read_bytes() == (tmp_path / "b.csv").read_bytes()
+        assert (tmp_path / "a_raw.csv").read_bytes() == (tmp_path / "b_raw.csv").read_bytes()
+
+
 class TestRequirements:
     """Test that requirements.txt has all dependencies"""
 